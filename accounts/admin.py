@@ -2,6 +2,7 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 
 from accounts.models import User
+from accounts.tokens import revoke_tokens
 
 
 # Register your models here.
@@ -33,6 +34,12 @@ class UserModelAdmin(BaseUserAdmin):
     ordering = ["email"]
     filter_horizontal = []
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if change:
+            # The user's tokens carry its previous claims
+            revoke_tokens(obj)
+
 
 # Now register the new UserModelAdmin
 admin.site.register(User, UserModelAdmin)
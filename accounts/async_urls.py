@@ -0,0 +1,8 @@
+from django.urls import path
+
+from accounts.async_views import AsyncCurrentUserView
+
+# Served under ASGI only, in front of accounts.urls, see core.asgi_urls
+urlpatterns = [
+    path('me/', AsyncCurrentUserView.as_view()),
+]
@@ -0,0 +1,89 @@
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from accounts.tokens import get_token_version, stream_ticket, stream_ticket_user
+from accounts.views import get_current_user
+from core.async_api import AsyncAPIView
+from core.cache import user_scope
+from core.events import get_broker
+
+
+class AsyncCurrentUserView(AsyncAPIView):
+    """
+        Native async GET of get_current_user, which only needs the authenticated user.
+    """
+    view_class = get_current_user.cls
+
+    async def aget(self, request, *args, **kwargs):
+        user = request.user
+        return Response({
+            'id': user.id,
+            'name': user.name,
+            'email': user.email,
+            'role': user.role,
+        })
+
+
+class EventStreamAPIView(APIView):
+    """
+        Permissions and error responses of AsyncEventStreamView, which serves the stream itself.
+    """
+    permission_classes = [IsAuthenticated]
+
+
+class AsyncEventStreamView(AsyncAPIView):
+    """
+        Server-Sent Events stream of the purchase request changes of the requesting user.
+
+        Sends a ``created`` event for every new purchase request and a ``status`` event for every status
+        change the user is a party to, and a ``reset`` event when the client fell too far behind and
+        should refetch. Browsers' EventSource can't send headers, so the stream is opened with a short-lived
+        ``?ticket=`` from EventStreamTicketView rather than the access token, which would end up in access
+        logs. The stream is closed after EVENT_STREAM_MAX_AGE seconds with a ``ticket`` event carrying the
+        ticket of the next one, so a dashboard stays live after its access token expired, as long as the
+        user's tokens aren't revoked.
+
+        Only routed under ASGI: a stream would hold a WSGI worker for its whole duration.
+    """
+    view_class = EventStreamAPIView
+    retry_ms = 5000
+
+    async def authenticate(self, request):
+        ticket = request.query_params.get('ticket')
+        if ticket:
+            return await sync_to_async(stream_ticket_user)(ticket)
+        return await super().authenticate(request)
+
+    async def aget(self, request, *args, **kwargs):
+        version = await sync_to_async(get_token_version)(request.user.id)
+        response = StreamingHttpResponse(self.stream(user_scope(request.user.id), request.user.id, version),
+                                         content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        # Don't let a proxy such as nginx buffer the stream
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    async def stream(self, channel, user_id, version):
+        subscription = get_broker().subscribe(channel)
+        loop = asyncio.get_running_loop()
+        closes_at = loop.time() + settings.EVENT_STREAM_MAX_AGE
+        try:
+            yield f'retry: {self.retry_ms}\n\n'
+            while (remaining := closes_at - loop.time()) > 0:
+                try:
+                    event = await asyncio.wait_for(subscription.get(), min(settings.EVENT_STREAM_KEEPALIVE, remaining))
+                except asyncio.TimeoutError:
+                    yield ': keep-alive\n\n'
+                    continue
+                yield f'event: {event["type"]}\ndata: {json.dumps(event, cls=DjangoJSONEncoder)}\n\n'
+            yield f'event: ticket\ndata: {json.dumps({"ticket": stream_ticket(user_id, version)})}\n\n'
+        finally:
+            subscription.close()
@@ -0,0 +1,50 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from accounts.tokens import TOKEN_VERSION_CLAIM, claims_user
+from accounts.user_cache import user_cache
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+        JWT authentication that reads the user from the database, through the per-process LRU of
+        accounts.user_cache, so most requests don't query it.
+
+        The checks of JWTAuthentication.get_user run on every request, cached user or not.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        user = user_cache.get_or_load(user_id, self.load_user)
+        if user is None:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+        if not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        if api_settings.CHECK_REVOKE_TOKEN and \
+                validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(_("The user's password has been changed."), code='password_changed')
+        return user
+
+    def load_user(self, user_id):
+        return self.user_model.objects.filter(**{api_settings.USER_ID_FIELD: user_id}).first()
+
+
+class TokenClaimsAuthentication(CachedJWTAuthentication):
+    """
+        JWT authentication that builds the user from the claims signed into its token (see accounts.tokens)
+        instead of selecting it, so authenticated requests need no database query.
+
+        Tokens issued without the claims are still accepted, with the user read as CachedJWTAuthentication does.
+    """
+
+    def get_user(self, validated_token):
+        if TOKEN_VERSION_CLAIM not in validated_token:
+            return super().get_user(validated_token)
+        return claims_user(validated_token)
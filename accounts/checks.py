@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Tags, Warning, register
+from django.utils.module_loading import import_string
+
+from accounts.authentication import TokenClaimsAuthentication
+
+
+@register(Tags.security, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """
+        Token revocation and logouts are spread through the cache, which a local memory cache doesn't
+        share between processes, see accounts.tokens.
+    """
+    authentication_class = import_string(settings.API_AUTHENTICATION_CLASS)
+    if not issubclass(authentication_class, TokenClaimsAuthentication) or \
+            not isinstance(caches['default'], LocMemCache):
+        return []
+    return [Warning(
+        'The default cache is local to each process, so revoked tokens and logged out refresh tokens keep '
+        f'working in the other processes for up to TOKEN_REVOCATION_CACHE_TIMEOUT '
+        f'({settings.TOKEN_REVOCATION_CACHE_TIMEOUT}) seconds.',
+        hint='Set CACHE_URL to a shared cache, e.g. redis://...',
+        id='accounts.W001',
+    )]
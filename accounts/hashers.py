@@ -0,0 +1,20 @@
+"""
+Password hashers of the PASSWORD_HASHER_PROFILE setting.
+
+The profile only picks the preferred hasher, the others stay listed so existing hashes keep verifying.
+Django rehashes a password with the preferred hasher and parameters on the next successful login
+(AbstractBaseUser.check_password), so switching profile or iteration count needs no migration.
+"""
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """
+        PBKDF2-SHA256 with PASSWORD_PBKDF2_ITERATIONS iterations. Hashes with any other count, higher or
+        lower, are updated on login.
+    """
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_PBKDF2_ITERATIONS
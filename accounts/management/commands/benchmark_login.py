@@ -0,0 +1,84 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory
+
+from accounts.models import User
+from accounts.views import UserLoginView
+
+PASSWORD = 'bench-password-123'
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    """
+        Benchmark the login endpoint with each password hasher profile of PASSWORD_HASHER_PROFILES.
+
+        Logins run one after the other in this process, so the rate is per core: multiply it by the
+        cores of the web servers for the capacity of a deployment. The benchmark user and the tokens it
+        gets are created in a transaction that is rolled back at the end.
+    """
+    help = 'Report logins per second per core of each password hasher profile.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=20, help='Logins per profile.')
+        parser.add_argument('--profile', action='append', dest='profiles', choices=settings.PASSWORD_HASHER_PROFILES,
+                            help='Profile to benchmark, may be repeated. Defaults to all of them.')
+        parser.add_argument('--pbkdf2-iterations', type=int, action='append', dest='iterations',
+                            help='PBKDF2 iteration count to benchmark, may be repeated. '
+                                 'Defaults to PASSWORD_PBKDF2_ITERATIONS.')
+
+    def handle(self, *args, **options):
+        if options['logins'] < 1:
+            raise CommandError('--logins must be at least 1.')
+        cases = []
+        for profile in options['profiles'] or settings.PASSWORD_HASHER_PROFILES:
+            if profile == 'pbkdf2':
+                for iterations in options['iterations'] or [settings.PASSWORD_PBKDF2_ITERATIONS]:
+                    cases.append((f'pbkdf2 ({iterations:,} iterations)', profile, iterations))
+            else:
+                cases.append((profile, profile, settings.PASSWORD_PBKDF2_ITERATIONS))
+
+        self.stdout.write(f'{"profile":<32}{"ms/login":>10}{"logins/s/core":>16}')
+        for name, profile, iterations in cases:
+            preferred = settings.PASSWORD_HASHER_PROFILES[profile]
+            hashers = [preferred, *(hasher for hasher in settings.PASSWORD_HASHERS if hasher != preferred)]
+            with override_settings(PASSWORD_HASHERS=hashers, PASSWORD_PBKDF2_ITERATIONS=iterations):
+                try:
+                    elapsed = self.run(options['logins'])
+                except ValueError as exc:
+                    # The hasher's library isn't installed, e.g. argon2-cffi
+                    self.stdout.write(f'{name:<32}  skipped: {exc}')
+                    continue
+            self.stdout.write(f'{name:<32}{elapsed * 1000 / options["logins"]:>10.1f}'
+                              f'{options["logins"] / elapsed:>16.1f}')
+
+    @staticmethod
+    def run(logins):
+        view = UserLoginView.as_view()
+        factory = APIRequestFactory()
+        elapsed = 0
+        try:
+            with transaction.atomic():
+                # Hashed with the profile, so the logins don't rehash it
+                User.objects.create(email='bench-login@example.com', name='Bench Login', role='Buyer',
+                                    password=make_password(PASSWORD))
+                for _ in range(logins):
+                    request = factory.post('/api/users/login/', {'email': 'bench-login@example.com',
+                                                                 'password': PASSWORD}, format='json')
+                    start = time.perf_counter()
+                    response = view(request)
+                    elapsed += time.perf_counter() - start
+                    if response.status_code != 200:
+                        raise CommandError(f'Login failed with status {response.status_code}.')
+                raise Rollback
+        except Rollback:
+            pass
+        return elapsed
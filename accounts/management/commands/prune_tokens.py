@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+
+class Command(BaseCommand):
+    """
+        Delete the expired rows of simplejwt's outstanding token table, and with them their blacklist rows.
+        Every login adds an outstanding token, and nothing else ever deletes them.
+
+        Rows are deleted in chunks of ``--chunk-size`` in id order, each in its own short transaction, so
+        logins and logouts are never blocked for long, and an interrupted run is resumed by the next one.
+        Expired tokens can't be used anymore, blacklisted or not, so deleting them revokes nothing.
+    """
+    help = 'Delete expired outstanding and blacklisted tokens, in chunks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Tokens deleted per transaction.')
+        parser.add_argument('--max-chunks', type=int,
+                            help='Stop after this many chunks, to spread a large backlog over several runs.')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the expired tokens.')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1.')
+
+        now = timezone.now()
+        expired = OutstandingToken.objects.filter(expires_at__lte=now)
+        if options['dry_run']:
+            self.stdout.write(f'{expired.count()} tokens expired before {now:%Y-%m-%d %H:%M} would be deleted.')
+            return
+
+        pruned = chunks = last_id = 0
+        while options['max_chunks'] is None or chunks < options['max_chunks']:
+            deleted, last_id = self.prune_chunk(expired.filter(id__gt=last_id), options['chunk_size'])
+            if last_id is None:
+                break
+            pruned += deleted
+            chunks += 1
+            if options['verbosity'] > 1:
+                self.stdout.write(f'Deleted {pruned} tokens, up to id {last_id}.')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {pruned} tokens expired before {now:%Y-%m-%d %H:%M} in {chunks} chunks.'
+        ))
+
+    @staticmethod
+    def prune_chunk(queryset, chunk_size):
+        """
+            Delete the first ``chunk_size`` tokens of ``queryset`` by id in one transaction. Return the
+            number of outstanding tokens deleted and the last id read, None when nothing was left.
+        """
+        with transaction.atomic():
+            # Tokens are issued in id order, so the expired ones come first in the primary key index
+            ids = list(queryset.order_by('id').values_list('id', flat=True)[:chunk_size])
+            if not ids:
+                return 0, None
+            _, deleted = OutstandingToken.objects.filter(id__in=ids).delete()
+        return deleted.get(OutstandingToken._meta.label, 0), ids[-1]
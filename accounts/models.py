@@ -52,6 +52,8 @@ class User(AbstractBaseUser):
     role = models.CharField(max_length=10, choices=ROLE_CHOICES)
     is_active = models.BooleanField(default=True)
     is_admin = models.BooleanField(default=False)
+    # Signed into the access tokens and bumped to revoke them, see accounts.tokens
+    token_version = models.PositiveIntegerField(default=1)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
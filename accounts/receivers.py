@@ -0,0 +1,38 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from accounts.models import User
+from accounts.tokens import forget_token_version
+from accounts.user_cache import bump_stamp, user_cache
+from core.cache import bump_versions, user_scope
+
+
+@receiver(post_save, sender=User)
+def invalidate_cache_on_user_save(sender, instance, created, raw=False, **kwargs):
+    """
+        Invalidate the cached buyer/seller directory and the user's own responses on any
+        user write, which includes updates and soft deletes.
+    """
+    if raw:
+        return
+    bump_versions('users', user_scope(instance.pk))
+
+
+@receiver(post_delete, sender=User)
+def revoke_tokens_on_user_delete(sender, instance, **kwargs):
+    """
+        Reject the tokens of a deleted user right away, rather than once its cached token version expires.
+    """
+    forget_token_version(instance.pk)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_cache(sender, instance, raw=False, **kwargs):
+    """
+        Drop the user from the authentication cache of this process, and of the others through its stamp.
+    """
+    if raw:
+        return
+    user_cache.invalidate(instance.pk)
+    bump_stamp(instance.pk)
@@ -1,7 +1,29 @@
+import asyncio
+import json
+from datetime import timedelta
+from io import StringIO
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db.models import F
+from django.test import AsyncClient, override_settings
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APITestCase
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import AccessToken
 from accounts.models import User
+from accounts.tokens import RevocableRefreshToken, revoke_tokens
+from accounts.user_cache import bump_stamp, user_cache
+from accounts.views import get_tokens_for_user
+from buyer.history import status_history
+from buyer.models import PurchaseRequest
+from buyer.signals import purchase_request_status_changed
+from core.events import InProcessBroker
 
 
 class UserRegistrationTests(APITestCase):
@@ -169,3 +191,282 @@ class UserLoginTests(APITestCase):
 
         self.assertIn('This field may not be blank.', response.data['email'])
         self.assertIn('This field may not be blank.', response.data['password'])
+
+    def test_user_login_rehashes_outdated_password(self):
+        """
+        Test that a successful login rehashes a password with the current hasher profile.
+        """
+        data = {'email': self.user_data['email'], 'password': self.user_data['password']}
+        with override_settings(PASSWORD_PBKDF2_ITERATIONS=1000):
+            self.assertEqual(self.client.post(self.login_url, data, format='json').status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$1000$'))
+
+        scrypt_first = sorted(settings.PASSWORD_HASHERS, key=lambda hasher: 'Scrypt' not in hasher)
+        with override_settings(PASSWORD_HASHERS=scrypt_first):
+            self.assertEqual(self.client.post(self.login_url, data, format='json').status_code, status.HTTP_200_OK)
+            self.user.refresh_from_db()
+            self.assertTrue(self.user.password.startswith('scrypt$'))
+            self.assertTrue(self.user.check_password(self.user_data['password']))
+
+
+class TokenClaimsAuthenticationTests(APITestCase):
+    """
+    Test case for the authentication from the user claims signed into the tokens.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.buyer = User.objects.create_user(email='buyer@yopmail.com', name='Buyer', password='testpass123',
+                                              role='Buyer')
+        self.superadmin = User.objects.create_user(email='admin@yopmail.com', name='Admin', password='testpass123',
+                                                   role='Superadmin')
+        response = self.client.post(reverse('user-login'), {'email': 'buyer@yopmail.com', 'password': 'testpass123'},
+                                    format='json')
+        self.token = response.data['token']['access']
+
+    def get_me(self, token):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        return self.client.get(reverse('get_current_user'))
+
+    def test_current_user_without_queries(self):
+        self.assertEqual(AccessToken(self.token)['role'], 'Buyer')
+        self.get_me(self.token)
+        with self.assertNumQueries(0):
+            response = self.get_me(self.token)
+        self.assertEqual(response.data, {'id': self.buyer.id, 'name': 'Buyer', 'email': 'buyer@yopmail.com',
+                                         'role': 'Buyer'})
+
+    def test_tokens_without_claims_read_the_user(self):
+        with self.assertNumQueries(1):
+            response = self.get_me(AccessToken.for_user(self.buyer))
+        self.assertEqual(response.data['role'], 'Buyer')
+
+    def test_edit_and_deactivation_revoke_tokens(self):
+        admin_token = get_tokens_for_user(self.superadmin)['access']
+        url = reverse('buyer-retrieve-update-delete', kwargs={'pk': self.buyer.pk})
+        self.assertEqual(self.get_me(self.token).status_code, status.HTTP_200_OK)
+
+        self.get_me(admin_token)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(url, {'name': 'Renamed'})
+        response = self.get_me(self.token)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response.data['detail'].code, 'token_revoked')
+
+        fresh_token = get_tokens_for_user(User.objects.get(pk=self.buyer.pk))['access']
+        self.assertEqual(self.get_me(fresh_token).data['name'], 'Renamed')
+        self.get_me(admin_token)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(url)
+        self.assertEqual(self.get_me(fresh_token).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_revocation_from_another_process(self):
+        with override_settings(TOKEN_REVOCATION_CACHE_TIMEOUT=0):
+            self.assertEqual(self.get_me(self.token).status_code, status.HTTP_200_OK)
+            # Another process revoked the tokens, its cache doesn't reach this one: the version read expired
+            User.objects.filter(pk=self.buyer.pk).update(token_version=F('token_version') + 1)
+            self.assertEqual(self.get_me(self.token).status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class CachedJWTAuthenticationTests(APITestCase):
+    """
+    Test case for the per-process cache of the users read by the JWT authentication.
+    """
+
+    def setUp(self):
+        cache.clear()
+        user_cache.clear()
+        self.buyer = User.objects.create_user(email='buyer@yopmail.com', name='Buyer', password='testpass123',
+                                              role='Buyer')
+        # Without the user claims the user is read from the database
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.buyer)}')
+        self.url = reverse('get_current_user')
+
+    def test_user_read_once(self):
+        with self.assertNumQueries(1):
+            self.client.get(self.url)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.url).data['name'], 'Buyer')
+        self.assertEqual({key: value for key, value in user_cache.get_stats().items() if key != 'max_size'},
+                         {'hits': 1, 'misses': 1, 'hit_rate': 0.5, 'size': 1})
+
+    def test_invalidated_by_user_writes(self):
+        self.client.get(self.url)
+        self.buyer.name = 'Renamed'
+        self.buyer.save()
+        self.assertEqual(self.client.get(self.url).data['name'], 'Renamed')
+
+        # Another process saved the user: only the stamp in the shared cache moved on
+        User.objects.filter(pk=self.buyer.pk).update(is_active=False)
+        bump_stamp(self.buyer.pk)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_bounded_and_expiring(self):
+        other = User.objects.create_user(email='other@yopmail.com', name='Other', password='testpass123',
+                                         role='Buyer')
+        with override_settings(USER_CACHE_SIZE=1):
+            self.client.get(self.url)
+            self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(other)}')
+            self.client.get(self.url)
+            self.assertEqual(user_cache.get_stats()['size'], 1)
+        user_cache.clear()
+        with override_settings(USER_CACHE_TIMEOUT=0), self.assertNumQueries(2):
+            self.client.get(self.url)
+            self.client.get(self.url)
+
+
+class TokenBlacklistTests(APITestCase):
+    """
+    Test case for the revocation of refresh tokens on logout and the pruning of expired tokens.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.buyer = User.objects.create_user(email='buyer@yopmail.com', name='Buyer', password='testpass123',
+                                              role='Buyer')
+        self.tokens = get_tokens_for_user(self.buyer)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.tokens["access"]}')
+
+    def test_logout_revokes_refresh_token(self):
+        with self.assertNumQueries(1):
+            RevocableRefreshToken(self.tokens['refresh'])
+        with self.assertNumQueries(0):
+            RevocableRefreshToken(self.tokens['refresh'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('user-logout'), {'refresh_token': self.tokens['refresh']})
+        self.assertEqual(response.status_code, status.HTTP_205_RESET_CONTENT)
+        with self.assertNumQueries(0), self.assertRaises(TokenError):
+            RevocableRefreshToken(self.tokens['refresh'])
+        # The blacklist still answers once the revocation set is lost
+        cache.clear()
+        with self.assertRaises(TokenError):
+            RevocableRefreshToken(self.tokens['refresh'])
+        response = self.client.post(reverse('user-logout'), {'refresh_token': self.tokens['refresh']})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_logout_from_another_process(self):
+        with override_settings(TOKEN_REVOCATION_CACHE_TIMEOUT=0):
+            RevocableRefreshToken(self.tokens['refresh'])
+            # Blacklisted by another process, whose cache doesn't reach this one
+            BlacklistedToken.objects.create(token=OutstandingToken.objects.get())
+            with self.assertRaises(TokenError):
+                RevocableRefreshToken(self.tokens['refresh'])
+
+    def test_prune_tokens(self):
+        live = OutstandingToken.objects.get()
+        expired = [OutstandingToken.objects.get(jti=RevocableRefreshToken.for_user(self.buyer)['jti'])
+                   for _ in range(3)]
+        OutstandingToken.objects.filter(id__in=[token.id for token in expired]).update(
+            expires_at=timezone.now() - timedelta(minutes=1))
+        BlacklistedToken.objects.create(token=expired[0])
+        BlacklistedToken.objects.create(token=live)
+
+        out = StringIO()
+        call_command('prune_tokens', chunk_size=2, dry_run=True, stdout=out)
+        self.assertIn('3 tokens', out.getvalue())
+        call_command('prune_tokens', chunk_size=2, stdout=out)
+        self.assertIn('Deleted 3 tokens', out.getvalue())
+        self.assertQuerysetEqual(OutstandingToken.objects.all(), [live])
+        self.assertQuerysetEqual(BlacklistedToken.objects.values_list('token', flat=True), [live.id])
+
+
+class EventStreamTests(APITestCase):
+    """
+    Test case for the Server-Sent Events stream of purchase request changes.
+    """
+
+    def setUp(self):
+        self.events_url = reverse('user-events', urlconf='core.asgi_stream_urls')
+        self.buyer = User.objects.create_user(email='buyer@yopmail.com', name='Buyer', password='testpass123',
+                                              role='Buyer')
+        self.seller = User.objects.create_user(email='seller@yopmail.com', name='Seller', password='testpass123',
+                                               role='Seller')
+        self.other_buyer = User.objects.create_user(email='other@yopmail.com', name='Other', password='testpass123',
+                                                    role='Buyer')
+        self.token = str(AccessToken.for_user(self.buyer))
+
+    def create_request(self, buyer, description):
+        with self.captureOnCommitCallbacks(execute=True):
+            return PurchaseRequest.objects.create(buyer=buyer, seller=self.seller, description=description,
+                                                  total_amount=25)
+
+    def approve(self, purchase_request):
+        self.addCleanup(status_history.flush)
+        with self.captureOnCommitCallbacks(execute=True):
+            changes = PurchaseRequest.objects.filter(pk=purchase_request.pk).set_status('Approved', self.seller.id)
+            purchase_request_status_changed.send(sender=PurchaseRequest, changes=changes)
+
+    @staticmethod
+    async def next_event(stream):
+        chunk = (await asyncio.wait_for(anext(stream), timeout=5)).decode()
+        fields = dict(line.split(': ', 1) for line in chunk.strip().split('\n'))
+        return fields['event'], json.loads(fields['data'])
+
+    def get_ticket(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        response = self.client.post(reverse('user-events-ticket'))
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data['ticket']
+
+    async def test_streams_events_of_the_user(self):
+        ticket = await sync_to_async(self.get_ticket)()
+        response = await AsyncClient().get(self.events_url, {'ticket': ticket})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = response.streaming_content
+        self.assertEqual(await anext(stream), b'retry: 5000\n\n')
+
+        await sync_to_async(self.create_request)(self.other_buyer, 'Not mine')
+        purchase_request = await sync_to_async(self.create_request)(self.buyer, 'Mine')
+        await sync_to_async(self.approve)(purchase_request)
+
+        event_type, event = await self.next_event(stream)
+        self.assertEqual(event_type, 'created')
+        self.assertEqual((event['id'], event['description'], event['status'], event['total_amount']),
+                         (purchase_request.id, 'Mine', 'In-Process', '25.00'))
+        event_type, event = await self.next_event(stream)
+        self.assertEqual(event_type, 'status')
+        self.assertEqual((event['id'], event['from_status'], event['to_status'], event['version']),
+                         (purchase_request.id, 'In-Process', 'Approved', 2))
+        await stream.aclose()
+
+    @override_settings(EVENT_STREAM_KEEPALIVE=0.01, EVENT_STREAM_MAX_AGE=0.05)
+    async def test_keep_alive_and_max_age(self):
+        response = await AsyncClient().get(self.events_url, headers={'Authorization': f'Bearer {self.token}'})
+        chunks = [chunk async for chunk in response.streaming_content]
+        self.assertEqual(chunks[0], b'retry: 5000\n\n')
+        self.assertIn(b': keep-alive\n\n', chunks[1:])
+        # The closing stream hands the ticket of the next one
+        self.assertTrue(chunks[-1].startswith(b'event: ticket\ndata: '))
+        ticket = json.loads(chunks[-1].decode().split('data: ', 1)[1])['ticket']
+        response = await AsyncClient().get(self.events_url, {'ticket': ticket})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        await response.streaming_content.aclose()
+
+    async def test_requires_authentication(self):
+        response = await AsyncClient().get(self.events_url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        response = await AsyncClient().get(self.events_url, {'ticket': 'invalid'})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        # Access tokens don't go in the URL
+        response = await AsyncClient().get(self.events_url, {'token': self.token})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        ticket = await sync_to_async(self.get_ticket)()
+        await sync_to_async(revoke_tokens)(self.buyer)
+        response = await AsyncClient().get(self.events_url, {'ticket': ticket})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response.json()['detail'], 'Token has been revoked')
+
+    @override_settings(EVENT_QUEUE_SIZE=2)
+    async def test_slow_subscriber_is_reset(self):
+        broker = InProcessBroker()
+        subscription = broker.subscribe('user:1')
+        for index in range(3):
+            broker.publish('user:1', {'type': 'created', 'id': index})
+        await asyncio.sleep(0)
+        self.assertEqual(await subscription.get(), {'type': 'reset'})
+        subscription.close()
+        self.assertEqual(broker.subscriber_count('user:1'), 0)
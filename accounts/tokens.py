@@ -0,0 +1,201 @@
+"""
+User claims signed into the JWTs, so requests are authenticated without reading the user.
+
+``get_tokens_for_user`` adds the user's ``role``, ``is_active``, ``name``, ``email`` and ``token_version``
+to its tokens, and accounts.authentication builds a ClaimsUser from them instead of selecting the User.
+
+The claims are as fresh as the token, so any change to them must revoke the tokens: ``revoke_tokens``
+bumps the user's ``token_version``, and tokens carrying an older one are rejected. The current version is
+read through the cache framework, so the check costs a database query only when the cache misses.
+
+Revocation reaches the other processes through the cache, so CACHE_URL must point to a shared cache (see
+accounts.checks). With a per-process cache a process keeps trusting the version it read for up to
+TOKEN_REVOCATION_CACHE_TIMEOUT seconds, the bound on how late it sees a revocation made elsewhere.
+
+Refresh tokens are RevocableRefreshTokens, blacklisted on logout: their revocation is recorded by ``jti`` in
+the cache framework too, until the token expires, so checking it doesn't join simplejwt's blacklist and
+outstanding token tables, which only grow until ``manage.py prune_tokens`` deletes their expired rows.
+Tokens found not revoked are remembered for TOKEN_REVOCATION_CACHE_TIMEOUT seconds only, the most a
+process with its own cache takes to see a logout made in another.
+
+The event stream is opened with a short-lived stream ticket rather than the access token, since browsers
+can only pass it in the URL, see accounts.async_views.
+"""
+import time
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.models import User
+
+TOKEN_VERSION_CLAIM = 'token_version'
+USER_CLAIMS = ('role', 'is_active', 'name', 'email', TOKEN_VERSION_CLAIM)
+TOKEN_VERSION_KEY_PREFIX = 'token-version'
+REVOKED_KEY_PREFIX = 'revoked-jti'
+STREAM_TICKET_SALT = 'accounts.stream-ticket'
+
+
+def _token_version_key(user_id):
+    return f'{TOKEN_VERSION_KEY_PREFIX}:{user_id}'
+
+
+def add_user_claims(token, user):
+    for claim in USER_CLAIMS:
+        token[claim] = getattr(user, claim)
+    return token
+
+
+def get_token_version(user_id):
+    """
+        Return the current token version of a user, None if the user doesn't exist.
+    """
+    key = _token_version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = User.objects.filter(pk=user_id).values_list('token_version', flat=True).first()
+        if version is not None:
+            # add() rather than set(): a version read before a concurrent revoke_tokens() committed must
+            # not overwrite the one it stores.
+            cache.add(key, version, timeout=settings.TOKEN_REVOCATION_CACHE_TIMEOUT)
+    return version
+
+
+def revoke_tokens(user):
+    """
+        Invalidate every token issued to ``user`` so far, from the moment the current transaction commits.
+    """
+    User.objects.filter(pk=user.pk).update(token_version=F('token_version') + 1)
+    user.refresh_from_db(fields=['token_version'])
+    version = user.token_version
+    transaction.on_commit(lambda: cache.set(_token_version_key(user.pk), version,
+                                            timeout=settings.TOKEN_REVOCATION_CACHE_TIMEOUT))
+
+
+def forget_token_version(user_id):
+    cache.delete(_token_version_key(user_id))
+
+
+class ClaimsUser(TokenUser):
+    """
+        Authenticated user built from the claims of its access token, see add_user_claims.
+
+        It is not a model instance: filter on ``<foreign key>_id=request.user.id`` rather than on the user.
+    """
+
+    @cached_property
+    def is_active(self):
+        return self.token.get('is_active', False)
+
+    @cached_property
+    def role(self):
+        return self.token.get('role')
+
+    @cached_property
+    def name(self):
+        return self.token.get('name')
+
+    @cached_property
+    def email(self):
+        return self.token.get('email')
+
+    def __str__(self):
+        return self.email or super().__str__()
+
+
+def claims_user(validated_token):
+    """
+        Return the ClaimsUser of a validated token carrying the user claims, after checking that the
+        user is active and the token wasn't revoked.
+    """
+    user = ClaimsUser(validated_token)
+    if not user.is_active:
+        raise exceptions.AuthenticationFailed(_('User is inactive'), code='user_inactive')
+    version = get_token_version(user.id)
+    if version is None:
+        raise exceptions.AuthenticationFailed(_('User not found'), code='user_not_found')
+    if version != validated_token[TOKEN_VERSION_CLAIM]:
+        raise exceptions.AuthenticationFailed(_('Token has been revoked'), code='token_revoked')
+    return user
+
+
+def _revoked_key(jti):
+    return f'{REVOKED_KEY_PREFIX}:{jti}'
+
+
+def _until_expiry(exp):
+    # Past its expiry a token is rejected anyway, nothing needs remembering about it
+    return max(int(exp - time.time()), 1)
+
+
+def is_revoked(jti, exp):
+    """
+        Return whether the token ``jti``, expiring at the timestamp ``exp``, is blacklisted.
+    """
+    key = _revoked_key(jti)
+    revoked = cache.get(key)
+    if revoked is None:
+        revoked = BlacklistedToken.objects.filter(token__jti=jti).exists()
+        # add() rather than set(): a blacklisting committed meanwhile must not be overwritten. A blacklisting
+        # is final, but "not revoked" only holds until a logout, which a per-process cache doesn't share.
+        timeout = _until_expiry(exp)
+        if not revoked:
+            timeout = min(timeout, settings.TOKEN_REVOCATION_CACHE_TIMEOUT)
+        cache.add(key, revoked, timeout=timeout)
+    return revoked
+
+
+def mark_revoked(jti, exp):
+    transaction.on_commit(lambda: cache.set(_revoked_key(jti), True, timeout=_until_expiry(exp)))
+
+
+class RevocableRefreshToken(RefreshToken):
+    """
+        Refresh token whose blacklisting is checked through the revocation set of the cache, see is_revoked.
+    """
+
+    def check_blacklist(self):
+        if is_revoked(self.payload[api_settings.JTI_CLAIM], self.payload['exp']):
+            raise TokenError(_('Token is blacklisted'))
+
+    def blacklist(self):
+        blacklisted = super().blacklist()
+        mark_revoked(self.payload[api_settings.JTI_CLAIM], self.payload['exp'])
+        return blacklisted
+
+
+def stream_ticket(user_id, version):
+    """
+        Return a signed ticket opening the event stream of the user as of its token version ``version``,
+        valid for EVENT_STREAM_TICKET_MAX_AGE seconds.
+    """
+    return signing.dumps({'user': user_id, 'version': version}, salt=STREAM_TICKET_SALT)
+
+
+def stream_ticket_user(ticket):
+    """
+        Return the active User of a stream ticket, read from the database, after checking that the ticket
+        is unexpired and the user's tokens weren't revoked since it was issued.
+    """
+    try:
+        payload = signing.loads(ticket, salt=STREAM_TICKET_SALT, max_age=settings.EVENT_STREAM_TICKET_MAX_AGE)
+    except signing.BadSignature:
+        raise exceptions.AuthenticationFailed(_('Ticket is invalid or expired'), code='ticket_invalid')
+    user = User.objects.filter(pk=payload['user']).first()
+    if user is None:
+        raise exceptions.AuthenticationFailed(_('User not found'), code='user_not_found')
+    if not user.is_active:
+        raise exceptions.AuthenticationFailed(_('User is inactive'), code='user_inactive')
+    if user.token_version != payload['version']:
+        raise exceptions.AuthenticationFailed(_('Token has been revoked'), code='token_revoked')
+    return user
@@ -1,11 +1,14 @@
 from django.urls import path
 
-from accounts.views import UserRegistrations, UserLoginView, UserLogoutView, get_current_user
+from accounts.views import UserRegistrations, UserLoginView, UserLogoutView, get_current_user, \
+    get_cache_stats, EventStreamTicketView
 
 urlpatterns = [
     path('registration/', UserRegistrations.as_view(), name='user-registration'),
     path('login/', UserLoginView.as_view(), name='user-login'),
     path('logout/', UserLogoutView.as_view(), name='user-logout'),
     path('me/', get_current_user, name='get_current_user'),
+    path('cache-stats/', get_cache_stats, name='cache-stats'),
+    path('events/ticket/', EventStreamTicketView.as_view(), name='user-events-ticket'),
 
 ]
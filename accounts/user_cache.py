@@ -0,0 +1,116 @@
+"""
+Per-process LRU cache of the users looked up by the JWT authentication, see accounts.authentication.
+
+Up to USER_CACHE_SIZE users are kept in memory for USER_CACHE_TIMEOUT seconds. Every user write
+invalidates the user's entry in the writing process right away, and in every other process through a
+stamp per user kept in the cache framework: entries are tagged with the stamp current when they were
+loaded, and a user's ``post_save`` moves its stamp on (see accounts.receivers), so reading the stamp
+costs one cache lookup instead of one database query per request.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+STAMP_KEY_PREFIX = 'user-stamp'
+
+
+def _stamp_key(user_id):
+    return f'{STAMP_KEY_PREFIX}:{user_id}'
+
+
+def get_stamp(user_id):
+    key = _stamp_key(user_id)
+    stamp = cache.get(key)
+    if stamp is None:
+        # Start from the clock, as core.cache does, so a stamp lost to eviction never repeats an older one
+        cache.add(key, time.time_ns(), timeout=None)
+        stamp = cache.get(key)
+    return stamp
+
+
+def _bump_stamp(user_id):
+    key = _stamp_key(user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
+
+
+def bump_stamp(user_id):
+    """
+        Invalidate the cached entries of a user in every process, right away and again once the current
+        transaction commits, so a process that reads the user before the commit can't keep it.
+    """
+    _bump_stamp(user_id)
+    transaction.on_commit(lambda: _bump_stamp(user_id))
+
+
+class UserCache:
+    """
+        Thread-safe LRU of users by id, each entry valid until it expires or its user's stamp moves on.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # user id: (user, stamp, expiry time)
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_load(self, user_id, load):
+        """
+            Return a copy of the cached user ``user_id``, loaded with ``load(user_id)`` on a miss.
+            Users ``load`` doesn't find (None) aren't cached.
+        """
+        # Read the stamp before loading, so a write committed in between outdates the entry
+        stamp = get_stamp(user_id)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[1] == stamp and entry[2] > now:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return copy.copy(entry[0])
+            self.misses += 1
+
+        user = load(user_id)
+        if user is None or settings.USER_CACHE_SIZE <= 0:
+            return user
+        with self._lock:
+            self._entries[user_id] = (user, stamp, now + settings.USER_CACHE_TIMEOUT)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > settings.USER_CACHE_SIZE:
+                self._entries.popitem(last=False)
+        # Requests get their own copy, so nothing they set on the user leaks into the cache
+        return copy.copy(user)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def get_stats(self):
+        """
+            Return the hit/miss counters of this process since it started, or since ``clear()``.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+                'size': len(self._entries),
+                'max_size': settings.USER_CACHE_SIZE,
+            }
+
+
+user_cache = UserCache()
@@ -7,15 +7,21 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.token_blacklist.models import OutstandingToken, BlacklistedToken
-from rest_framework_simplejwt.tokens import RefreshToken
 
+from accounts.permissions import IsSuperAdmin
 from accounts.serializers import UserCreateSerializer, UserLoginSerializer
+from accounts.tokens import RevocableRefreshToken, add_user_claims, get_token_version, stream_ticket
+from accounts.user_cache import user_cache
+from core import cache
 
 
 # Create your views here.
 # Generate Token Manually
 def get_tokens_for_user(user):
-    refresh = RefreshToken.for_user(user)
+    """
+        Issue a refresh and an access token carrying the user claims, see accounts.tokens.
+    """
+    refresh = add_user_claims(RevocableRefreshToken.for_user(user), user)
     return {
         'refresh': str(refresh),
         'access': str(refresh.access_token),
@@ -80,7 +86,7 @@ class UserLogoutView(APIView):
     def post(self, request):
         try:
             refresh_token = request.data["refresh_token"]
-            token = RefreshToken(refresh_token)
+            token = RevocableRefreshToken(refresh_token)
             token.blacklist()
 
             return Response({'msg': 'Logout successful.'}, status=status.HTTP_205_RESET_CONTENT)
@@ -88,9 +94,22 @@ class UserLogoutView(APIView):
             return Response(status=status.HTTP_400_BAD_REQUEST)
 
 
+class EventStreamTicketView(APIView):
+    """
+        Issue a ticket opening the event stream (accounts.async_views.AsyncEventStreamView), which can't
+        be sent the access token in a header, for EVENT_STREAM_TICKET_MAX_AGE seconds.
+    """
+    permission_classes = (IsAuthenticated,)
+
+    def post(self, request):
+        ticket = stream_ticket(request.user.id, get_token_version(request.user.id))
+        return Response({'ticket': ticket}, status=status.HTTP_201_CREATED)
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])  # Ensure the user is authenticated
 def get_current_user(request):
+    # Read from the token claims, without a database query
     user = request.user
     return Response({
         'id': user.id,
@@ -98,3 +117,13 @@ def get_current_user(request):
         'email': user.email,
         'role': user.role,
     })
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsSuperAdmin])
+def get_cache_stats(request):
+    """
+        Return the hit/miss counters of the GET API response cache, to help size it, and under
+        ``user_cache`` those of the authentication user cache of the process that served the request.
+    """
+    return Response({**cache.get_stats(), 'user_cache': user_cache.get_stats()})
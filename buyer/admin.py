@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from buyer.models import PurchaseRequest
+from buyer.models import ArchivedPurchaseRequest, PurchaseRequest
 
 
 # Register your models here.
@@ -9,4 +9,43 @@ class PurchaseRequestAdmin(admin.ModelAdmin):
     list_display = (
         'id', 'buyer', 'seller', 'status', 'description', 'created_at'
     )
-    search_fields = ('status',)
+    search_fields = ('status', 'description')
+    # The KPI counters and the daily rollup follow creations and status changes only
+    locked_fields = ('buyer', 'seller', 'total_amount')
+
+    def get_readonly_fields(self, request, obj=None):
+        if obj is None:
+            return self.readonly_fields
+        return tuple(self.readonly_fields) + self.locked_fields
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def get_search_results(self, request, queryset, search_term):
+        """
+            Match a status exactly, anything else against the descriptions through
+            PurchaseRequestQuerySet.search, which uses the full-text index on PostgreSQL.
+        """
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        if search_term in dict(PurchaseRequest.STATUS_CHOICES):
+            return queryset.filter(status=search_term), False
+        return queryset.search(search_term), False
+
+
+@admin.register(ArchivedPurchaseRequest)
+class ArchivedPurchaseRequestAdmin(admin.ModelAdmin):
+    """
+        Read-only: rows only enter the archive through the ``archive_purchase_requests`` command.
+    """
+    list_display = (
+        'id', 'buyer', 'seller', 'status', 'description', 'created_at', 'archived_at'
+    )
+    list_filter = ('status',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,31 @@
+from django.utils import timezone
+
+from buyer.models import PurchaseRequestDailyStats
+from buyer.serializers import PurchaseAnalyticsSerializer
+from core.cache import cache_response
+
+
+def default_range_day(request):
+    # Without ``end`` the range ends today, so the response changes at midnight
+    return '' if request.query_params.get('end') else timezone.localdate().isoformat()
+
+
+class PurchaseRequestAnalyticsMixin:
+    """
+        Return the purchase request counts and amounts per status of the requesting user, per day,
+        week or month over a date range.
+
+        The series is read from the PurchaseRequestDailyStats rollup, so its cost depends on the number
+        of days in the range, never on the number of purchase requests. Query parameters: ``interval``
+        (day, week or month), ``start`` and ``end`` (YYYY-MM-DD, both included).
+    """
+    analytics_side = None
+
+    @cache_response('user', conditional=True, vary=default_range_day)
+    def get(self, request, *args, **kwargs):
+        params = PurchaseAnalyticsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        interval, start, end = (params.validated_data[key] for key in ('interval', 'start', 'end'))
+        series = PurchaseRequestDailyStats.objects.series(request.user, self.analytics_side, interval, start, end)
+        return self.create_response(data={'interval': interval, 'start': start, 'end': end, 'series': series},
+                                    message="Purchase analytics retrieved successfully")
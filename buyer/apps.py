@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class BuyerConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'buyer'
+
+    def ready(self):
+        # Connect the purchase request signal receivers
+        from buyer import receivers  # noqa: F401
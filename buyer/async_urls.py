@@ -0,0 +1,10 @@
+from django.urls import path
+
+from buyer.async_views import AsyncBuyersListView, AsyncPurchaseRequestListView, AsyncBuyerDashboardView
+
+# Served under ASGI only, in front of buyer.urls, see core.asgi_urls
+urlpatterns = [
+    path('list/', AsyncBuyersListView.as_view()),
+    path('purchase-request/', AsyncPurchaseRequestListView.as_view()),
+    path('kpi-card/', AsyncBuyerDashboardView.as_view()),
+]
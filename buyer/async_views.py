@@ -0,0 +1,46 @@
+from buyer.models import PurchaseRequestStats
+from buyer.views import BuyersListAPIView, BuyerDashboardView, PurchaseRequestListCreateAPIView, \
+    purchase_request_rows, user_rows
+from core.async_api import AsyncAPIView
+from core.cache import cache_response
+
+
+class AsyncBuyersListView(AsyncAPIView):
+    """
+        Native async GET of BuyersListAPIView.
+    """
+    view_class = BuyersListAPIView
+
+    @cache_response('users', conditional=True)
+    async def aget(self, request, *args, **kwargs):
+        rows = [row async for row in user_rows.values(self.api_view.get_queryset())]
+        return self.api_view.create_response(data=user_rows.serialize(rows), message="Buyers retrieved successfully")
+
+
+class AsyncPurchaseRequestListView(AsyncAPIView):
+    """
+        Native async GET of PurchaseRequestListCreateAPIView, with the same search, filters and cursor pages.
+    """
+    view_class = PurchaseRequestListCreateAPIView
+
+    @cache_response('user', conditional=True)
+    async def aget(self, request, *args, **kwargs):
+        view = self.api_view
+        queryset = view.filter_queryset(view.get_queryset())
+        page = await view.paginator.apaginate_queryset(purchase_request_rows.values(queryset, *view.cursor_fields),
+                                                       request, view=view)
+        return view.create_response(data=purchase_request_rows.serialize(page),
+                                    message="Purchase Request retrieved successfully",
+                                    links=view.paginator.get_links())
+
+
+class AsyncBuyerDashboardView(AsyncAPIView):
+    """
+        Native async GET of BuyerDashboardView.
+    """
+    view_class = BuyerDashboardView
+
+    @cache_response('user', conditional=True)
+    async def aget(self, request, *args, **kwargs):
+        data = await PurchaseRequestStats.objects.akpi_for(request.user, 'buyer')
+        return self.api_view.create_response(data=data, message="Buyer KPI dashboard retrieved successfully")
@@ -0,0 +1,51 @@
+from rest_framework import serializers
+from rest_framework.settings import api_settings
+
+from buyer.models import PurchaseRequest, PurchaseRequestWithArchive
+from buyer.serializers import PurchaseRequestFilterSerializer
+
+
+def purchase_requests(request):
+    """
+        Return the manager the purchase request lists and exports read from: the live PurchaseRequest
+        rows, or the PurchaseRequestWithArchive union of live and archived rows with ``?include_archived=true``.
+
+        Malformed values read as false here and are rejected by the filter serializer.
+    """
+    value = request.query_params.get('include_archived')
+    if value in serializers.BooleanField.TRUE_VALUES:
+        return PurchaseRequestWithArchive.objects
+    return PurchaseRequest.objects
+
+
+class PurchaseRequestFilterMixin:
+    """
+        Narrow a purchase request list view down with the PurchaseRequestFilterSerializer query
+        parameters: ``status`` (repeatable), ``created_after``, ``created_before``, ``min_amount``,
+        ``max_amount``, ``buyer`` and ``seller``.
+
+        Unknown query parameters are rejected rather than ignored, so a misspelt filter can't silently
+        return the unfiltered list.
+    """
+    filter_serializer_class = PurchaseRequestFilterSerializer
+
+    def get_allowed_query_params(self):
+        allowed = set(self.filter_serializer_class().fields)
+        if api_settings.URL_FORMAT_OVERRIDE:
+            allowed.add(api_settings.URL_FORMAT_OVERRIDE)
+        if self.pagination_class is not None:
+            paginator = self.paginator
+            allowed.update((paginator.cursor_query_param, paginator.page_size_query_param))
+        search_param = getattr(self, 'search_param', None)
+        if search_param:
+            allowed.add(search_param)
+        return allowed
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        unknown = sorted(set(self.request.query_params) - self.get_allowed_query_params())
+        if unknown:
+            raise serializers.ValidationError({param: 'Unknown query parameter.' for param in unknown})
+        params = self.filter_serializer_class(data=self.request.query_params)
+        params.is_valid(raise_exception=True)
+        return params.filter_queryset(queryset)
@@ -0,0 +1,100 @@
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+
+from buyer.models import PurchaseRequestStatusHistory
+
+logger = logging.getLogger(__name__)
+
+
+class StatusHistoryWriter:
+    """
+        Per-process buffer of status history events, written with one ``bulk_create`` per batch.
+
+        Events are buffered once their transaction commits, so rolled back changes are never recorded,
+        and the status update itself never waits on a history INSERT. The buffer is written when it
+        holds STATUS_HISTORY_BATCH_SIZE events, STATUS_HISTORY_FLUSH_INTERVAL seconds after its first
+        event, and at interpreter exit. A batch whose INSERT fails goes back to the front of the buffer
+        and is retried on the next write. Events still buffered when the process is killed are lost.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._events = []
+        self._timer = None
+
+    def record(self, changes, using=None):
+        """
+            Buffer the StatusChange tuples ``changes`` once the current transaction commits.
+        """
+        changed_at = timezone.now()
+        events = [PurchaseRequestStatusHistory(purchase_request_id=change.request_id,
+                                               from_status=change.from_status, to_status=change.to_status,
+                                               changed_by_id=change.changed_by_id, changed_at=changed_at)
+                  for change in changes]
+        if events:
+            transaction.on_commit(lambda: self._add(events), using=using)
+
+    def flush(self):
+        """
+            Write every buffered event now and return how many were written.
+        """
+        with self._lock:
+            events, self._events = self._events, []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if events:
+            try:
+                PurchaseRequestStatusHistory.objects.bulk_create(events,
+                                                                 batch_size=settings.STATUS_HISTORY_BATCH_SIZE)
+            except Exception:
+                self._requeue(events)
+                raise
+        return len(events)
+
+    def pending(self):
+        with self._lock:
+            return len(self._events)
+
+    def _requeue(self, events):
+        # bulk_create writes its batches in one transaction, so none of ``events`` was stored
+        with self._lock:
+            self._events[:0] = events
+            self._schedule()
+
+    def _schedule(self):
+        if self._timer is None:
+            self._timer = threading.Timer(settings.STATUS_HISTORY_FLUSH_INTERVAL, self._flush_in_background)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _add(self, events):
+        with self._lock:
+            self._events.extend(events)
+            full = len(self._events) >= settings.STATUS_HISTORY_BATCH_SIZE
+            if not full:
+                self._schedule()
+        if full:
+            self._safe_flush()
+
+    def _flush_in_background(self):
+        try:
+            self._safe_flush()
+        finally:
+            # The timer thread opened its own connections
+            connections.close_all()
+
+    def _safe_flush(self):
+        try:
+            self.flush()
+        except Exception:
+            logger.exception('Failed to write the purchase request status history')
+
+
+status_history = StatusHistoryWriter()
+atexit.register(status_history._safe_flush)
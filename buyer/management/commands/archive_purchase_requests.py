@@ -0,0 +1,91 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from buyer.models import ArchivedPurchaseRequest, PurchaseRequest
+from core.cache import bump_versions, user_scope
+
+CLOSED_STATUSES = ('Approved', 'Rejected')
+
+
+class Command(BaseCommand):
+    """
+        Move the Approved and Rejected purchase requests last updated more than ``--older-than`` days ago
+        (PURCHASE_REQUEST_ARCHIVE_AFTER_DAYS by default) to the archive table.
+
+        Rows move in chunks of ``--chunk-size`` in id order, each copied and deleted in its own short
+        transaction, so the live table is never locked for long. An interrupted run loses nothing: the
+        committed chunks are archived and the next run picks up the rest. Copies of rows already in the
+        archive are skipped, so a row is never archived twice.
+
+        The KPI counters and the daily rollup are left as they are, archived requests still count.
+    """
+    help = 'Move closed purchase requests past the archive age to the archive table, in chunks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than', type=int, metavar='DAYS',
+                            help='Archive the requests last updated more than DAYS days ago. '
+                                 'Defaults to PURCHASE_REQUEST_ARCHIVE_AFTER_DAYS.')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Requests moved per transaction.')
+        parser.add_argument('--max-chunks', type=int,
+                            help='Stop after this many chunks, to spread a large backlog over several runs.')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the requests to archive.')
+
+    def handle(self, *args, **options):
+        days = options['older_than']
+        if days is None:
+            days = settings.PURCHASE_REQUEST_ARCHIVE_AFTER_DAYS
+        if days < 0:
+            raise CommandError('--older-than must not be negative.')
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1.')
+
+        cutoff = timezone.now() - timedelta(days=days)
+        closed = PurchaseRequest.objects.filter(status__in=CLOSED_STATUSES, updated_at__lt=cutoff)
+        if options['dry_run']:
+            self.stdout.write(f'{closed.count()} purchase requests closed before {cutoff:%Y-%m-%d %H:%M} '
+                              f'would be archived.')
+            return
+
+        archived = chunks = last_id = 0
+        while options['max_chunks'] is None or chunks < options['max_chunks']:
+            moved, last_id = self.archive_chunk(closed.filter(id__gt=last_id), options['chunk_size'])
+            if last_id is None:
+                break
+            archived += moved
+            chunks += 1
+            if options['verbosity'] > 1:
+                self.stdout.write(f'Archived {archived} purchase requests, up to id {last_id}.')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {archived} purchase requests closed before {cutoff:%Y-%m-%d %H:%M} in {chunks} chunks.'
+        ))
+
+    @staticmethod
+    def archive_chunk(queryset, chunk_size):
+        """
+            Move the first ``chunk_size`` requests of ``queryset`` by id to the archive in one transaction.
+            Return the number of requests moved and the last id read, None when nothing was left.
+        """
+        fields = [field.attname for field in ArchivedPurchaseRequest._meta.concrete_fields
+                  if field.name != 'archived_at']
+        with transaction.atomic():
+            queryset = queryset.order_by('id')
+            if connection.features.has_select_for_update_skip_locked:
+                # Leave alone the rows another run or an admin edit is holding
+                queryset = queryset.select_for_update(skip_locked=True)
+            rows = list(queryset.values(*fields)[:chunk_size])
+            if not rows:
+                return 0, None
+            archived_at = timezone.now()
+            ArchivedPurchaseRequest.objects.bulk_create(
+                [ArchivedPurchaseRequest(archived_at=archived_at, **row) for row in rows], ignore_conflicts=True)
+            ids = [row['id'] for row in rows]
+            moved, _ = PurchaseRequest.objects.filter(id__in=ids).delete()
+            # The lists without include_archived just lost these rows
+            bump_versions(*{user_scope(row[side]) for row in rows for side in ('buyer_id', 'seller_id')
+                            if row[side] is not None})
+        return moved, ids[-1]
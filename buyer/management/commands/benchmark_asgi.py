@@ -0,0 +1,138 @@
+import asyncio
+import io
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand
+from django.core.wsgi import get_wsgi_application
+from django.test import override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import User
+from buyer.models import PurchaseRequest
+
+HOST = 'localhost'
+PATHS = ('/api/users/me/', '/api/buyers/kpi-card/', '/api/buyers/purchase-request/',
+         '/api/sellers/seller-kpi-card/', '/api/sellers/all-sale-request-list/')
+
+
+class Command(BaseCommand):
+    """
+        Benchmark the GET API endpoints served through ASGI, with the native async views, against WSGI.
+
+        No server is involved: the ASGI application is driven by an event loop with ``--concurrency``
+        requests in flight, and the WSGI application by a pool of ``--concurrency`` threads, as a threaded
+        WSGI server would. The response cache is disabled so every request reaches the database.
+
+        The benchmark rows are committed, since the concurrent requests read them through their own
+        connections, and deleted at the end.
+    """
+    help = 'Compare requests per second of the GET API endpoints under ASGI and WSGI.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000, help='Requests per path and application.')
+        parser.add_argument('--concurrency', type=int, default=100, help='Requests in flight at once.')
+        parser.add_argument('--rows', type=int, default=1000, help='Number of purchase requests to list.')
+        parser.add_argument('--path', action='append', dest='paths',
+                            help='Path to request, may be repeated. Defaults to the hot GET endpoints.')
+
+    def handle(self, *args, **options):
+        total, concurrency = options['requests'], options['concurrency']
+        buyer, seller = self.seed(options['rows'])
+        tokens = {'buyer': str(AccessToken.for_user(buyer)), 'seller': str(AccessToken.for_user(seller))}
+        asgi_application, wsgi_application = get_asgi_application(), get_wsgi_application()
+        try:
+            with override_settings(ALLOWED_HOSTS=[HOST], API_RESPONSE_CACHE_TIMEOUT=0,
+                                   ASGI_ROOT_URLCONF='core.asgi_urls'):
+                self.stdout.write(f'{total:,} requests per path, concurrency {concurrency}')
+                self.stdout.write(f'{"path":<40}{"wsgi req/s":>12}{"asgi req/s":>12}{"speedup":>10}  errors')
+                for path in options['paths'] or PATHS:
+                    token = tokens['seller' if path.startswith('/api/sellers/') else 'buyer']
+                    wsgi, wsgi_statuses = self.run_wsgi(wsgi_application, path, token, total, concurrency)
+                    asgi, asgi_statuses = asyncio.run(self.run_asgi(asgi_application, path, token, total,
+                                                                    concurrency))
+                    errors = {f'{name} {code}': count for name, statuses in (('wsgi', wsgi_statuses),
+                                                                             ('asgi', asgi_statuses))
+                              for code, count in statuses.items() if code != 200}
+                    self.stdout.write(f'{path:<40}{total / wsgi:>12,.0f}{total / asgi:>12,.0f}'
+                                      f'{wsgi / asgi:>9.1f}x  {errors or "-"}')
+        finally:
+            PurchaseRequest.objects.filter(buyer=buyer).delete()
+            User.objects.filter(pk__in=[buyer.pk, seller.pk]).delete()
+
+    @staticmethod
+    def seed(rows):
+        buyer = User.objects.create(email='bench-asgi-buyer@example.com', name='Bench Buyer', role='Buyer')
+        seller = User.objects.create(email='bench-asgi-seller@example.com', name='Bench Seller', role='Seller')
+        PurchaseRequest.objects.bulk_create([
+            PurchaseRequest(buyer=buyer, seller=seller, description=f'Benchmark request {index}',
+                            total_amount=index % 1000 + 0.5)
+            for index in range(rows)
+        ], batch_size=1000)
+        return buyer, seller
+
+    @staticmethod
+    def run_wsgi(application, path, token, total, concurrency):
+        url = urlsplit(path)
+
+        def request(_):
+            environ = {
+                'REQUEST_METHOD': 'GET', 'PATH_INFO': url.path, 'QUERY_STRING': url.query, 'SCRIPT_NAME': '',
+                'SERVER_NAME': HOST, 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+                'HTTP_HOST': HOST, 'HTTP_AUTHORIZATION': f'Bearer {token}',
+                'wsgi.input': io.BytesIO(), 'wsgi.errors': sys.stderr, 'wsgi.url_scheme': 'http',
+                'wsgi.multithread': True, 'wsgi.multiprocess': False, 'wsgi.run_once': False,
+            }
+            status = []
+            body = application(environ, lambda line, headers, exc_info=None: status.append(int(line[:3])))
+            try:
+                b''.join(body)
+            finally:
+                body.close()
+            return status[0]
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            statuses = Counter(executor.map(request, range(total)))
+        return time.perf_counter() - start, statuses
+
+    @staticmethod
+    async def run_asgi(application, path, token, total, concurrency):
+        url = urlsplit(path)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def request():
+            scope = {
+                'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+                'scheme': 'http', 'path': url.path, 'raw_path': url.path.encode(),
+                'query_string': url.query.encode(), 'root_path': '',
+                'headers': [(b'host', HOST.encode()), (b'authorization', f'Bearer {token}'.encode())],
+                'client': ('127.0.0.1', 0), 'server': (HOST, 80),
+            }
+            done = asyncio.Event()
+            messages = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+            status = []
+
+            async def receive():
+                if messages:
+                    return messages.pop()
+                await done.wait()
+                return {'type': 'http.disconnect'}
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    status.append(message['status'])
+                elif not message.get('more_body'):
+                    done.set()
+
+            async with semaphore:
+                await application(scope, receive, send)
+            return status[0]
+
+        start = time.perf_counter()
+        statuses = Counter(await asyncio.gather(*(request() for _ in range(total))))
+        return time.perf_counter() - start, statuses
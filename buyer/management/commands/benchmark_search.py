@@ -0,0 +1,87 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from accounts.models import User
+from buyer.models import PurchaseRequest
+
+WORDS = ('steel', 'copper', 'cable', 'pipe', 'valve', 'pump', 'motor', 'bearing', 'gasket', 'bolt', 'paint',
+         'timber', 'glass', 'cement', 'sensor', 'filter', 'hose', 'switch', 'relay', 'panel', 'office', 'chair',
+         'desk', 'laptop', 'printer', 'toner', 'paper', 'monitor', 'router', 'server', 'license', 'support')
+QUERIES = ('copper cable', 'pump', '"steel pipe"', 'laptop -printer', 'sensor or relay')
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    """
+        Benchmark the ``?q=`` description search of the purchase request lists.
+
+        The first result page of each query is timed with PurchaseRequestQuerySet.search, against a plain
+        case-insensitive LIKE scan of the same rows. The rows are created in a transaction that is rolled
+        back at the end, so the command can run against any database without leaving data behind.
+    """
+    help = 'Measure the latency of the purchase request description search.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000000, help='Number of purchase requests to search.')
+        parser.add_argument('--repeat', type=int, default=20, help='Runs per query.')
+        parser.add_argument('--page-size', type=int, default=50, help='Rows fetched per query.')
+
+    def handle(self, *args, **options):
+        rows, repeat, page_size = options['rows'], options['repeat'], options['page_size']
+        try:
+            with transaction.atomic():
+                buyer = self.seed(rows)
+                if connection.vendor == 'postgresql':
+                    with connection.cursor() as cursor:
+                        cursor.execute('ANALYZE buyer_purchaserequest')
+                queryset = PurchaseRequest.objects.filter(buyer=buyer)
+                self.stdout.write(f'{connection.vendor}, {rows:,} rows, first {page_size} results')
+                self.stdout.write(f'{"query":<20}{"matches":>10}{"search p50 ms":>16}{"search p95 ms":>16}'
+                                  f'{"like p50 ms":>14}')
+                for text in QUERIES:
+                    searched = queryset.search(text).order_by('-search_rank', '-id')
+                    # The LIKE baseline only looks for the first word, it can't use an index either way
+                    liked = queryset.filter(description__icontains=text.strip('"').split()[0]).order_by('-id')
+                    search = self.timings(repeat, lambda: list(searched.values('id', 'search_rank')[:page_size]))
+                    like = self.timings(repeat, lambda: list(liked.values('id')[:page_size]))
+                    self.stdout.write(f'{text:<20}{searched.count():>10,}{self.ms(search, 50):>16.2f}'
+                                      f'{self.ms(search, 95):>16.2f}{self.ms(like, 50):>14.2f}')
+                raise Rollback
+        except Rollback:
+            pass
+
+    @staticmethod
+    def seed(rows):
+        generator = random.Random(0)
+        buyer = User.objects.create(email='bench-buyer@example.com', name='Bench Buyer', role='Buyer')
+        seller = User.objects.create(email='bench-seller@example.com', name='Bench Seller', role='Seller')
+        batch_size = 5000
+        for start in range(0, rows, batch_size):
+            PurchaseRequest.objects.bulk_create([
+                PurchaseRequest(buyer=buyer, seller=seller, total_amount=index % 1000 + 0.5,
+                                description=' '.join(generator.choices(WORDS, k=6)))
+                for index in range(start, min(start + batch_size, rows))
+            ])
+        return buyer
+
+    @staticmethod
+    def timings(repeat, run):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - start)
+        return sorted(timings)
+
+    @staticmethod
+    def ms(timings, percentile):
+        if len(timings) == 1:
+            return timings[0] * 1000
+        return statistics.quantiles(timings, n=100, method='inclusive')[percentile - 1] * 1000
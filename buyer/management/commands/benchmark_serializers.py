@@ -0,0 +1,75 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from accounts.models import User
+from buyer.models import PurchaseRequest
+from buyer.row_serializers import RowSerializer
+from buyer.serializers import PurchaseRequestSerializer, UserSerializer
+from seller.serializers import PurchaseRequestSellerSerializer
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    """
+        Benchmark the list serialization paths: DRF ModelSerializer against the values() RowSerializer.
+
+        The benchmark rows are created in a transaction that is rolled back at the end, so the command
+        can run against any database without leaving data behind.
+    """
+    help = 'Compare serialized rows per second of the DRF serializers and the values() fast path.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help='Number of rows to serialize.')
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per path, the best one is reported.')
+
+    def handle(self, *args, **options):
+        rows, repeat = options['rows'], options['repeat']
+        try:
+            with transaction.atomic():
+                users, purchase_requests = self.seed(rows)
+                cases = [
+                    ('UserSerializer', UserSerializer, users, ()),
+                    ('PurchaseRequestSerializer', PurchaseRequestSerializer, purchase_requests, ('seller',)),
+                    ('PurchaseRequestSellerSerializer', PurchaseRequestSellerSerializer, purchase_requests,
+                     ('buyer',)),
+                ]
+                self.stdout.write(f'{"serializer":<34}{"drf rows/s":>14}{"values rows/s":>16}{"speedup":>10}')
+                for name, serializer_class, queryset, related in cases:
+                    row_serializer = RowSerializer(serializer_class)
+                    drf = self.best(repeat, lambda: serializer_class(queryset.select_related(*related),
+                                                                     many=True).data)
+                    fast = self.best(repeat, lambda: row_serializer.serialize(row_serializer.values(queryset)))
+                    self.stdout.write(f'{name:<34}{rows / drf:>14,.0f}{rows / fast:>16,.0f}{drf / fast:>9.1f}x')
+                raise Rollback
+        except Rollback:
+            pass
+
+    @staticmethod
+    def seed(rows):
+        buyer = User.objects.create(email='bench-buyer@example.com', name='Bench Buyer', role='Buyer')
+        sellers = User.objects.bulk_create([
+            User(email=f'bench-seller-{index}@example.com', name=f'Bench Seller {index}', role='Seller')
+            for index in range(rows)
+        ])
+        PurchaseRequest.objects.bulk_create([
+            PurchaseRequest(buyer=buyer, seller=seller, description=f'Benchmark request {index}',
+                            total_amount=index % 1000 + 0.5)
+            for index, seller in enumerate(sellers)
+        ], batch_size=1000)
+        users = User.objects.filter(email__startswith='bench-seller-').order_by('id')
+        purchase_requests = PurchaseRequest.objects.filter(buyer=buyer).order_by('id')
+        return users, purchase_requests
+
+    @staticmethod
+    def best(repeat, run):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
@@ -0,0 +1,62 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from buyer import partitions
+
+
+class Command(BaseCommand):
+    """
+        Maintain the monthly PostgreSQL partitions of the purchase request table, see buyer.partitions.
+
+        ``--setup`` converts the table once. Every run then creates the partitions of the next ``--ahead``
+        months (PURCHASE_REQUEST_PARTITIONS_AHEAD by default), so schedule it e.g. daily, and with
+        ``--detach-older-than`` detaches the partitions of months that ended that many months ago.
+    """
+    help = 'Create the upcoming monthly partitions of the purchase request table and detach old ones (PostgreSQL).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--setup', action='store_true',
+                            help='Convert the purchase request table to a partitioned table first, if it is not yet.')
+        parser.add_argument('--ahead', type=int, metavar='MONTHS',
+                            help='Months to create partitions for after the current one. '
+                                 'Defaults to PURCHASE_REQUEST_PARTITIONS_AHEAD.')
+        parser.add_argument('--detach-older-than', type=int, metavar='MONTHS',
+                            help='Detach the partitions that ended at least MONTHS months before the current month.')
+        parser.add_argument('--force', action='store_true',
+                            help='Also detach partitions that still hold purchase requests.')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError(f'Partitioning needs PostgreSQL, the purchase requests stay in one table on '
+                               f'{connection.vendor}.')
+        ahead = options['ahead']
+        if ahead is None:
+            ahead = settings.PURCHASE_REQUEST_PARTITIONS_AHEAD
+        if ahead < 0 or (options['detach_older_than'] or 0) < 0:
+            raise CommandError('--ahead and --detach-older-than must not be negative.')
+
+        # A schema editor for the index DDL; it also runs everything in one transaction
+        with connection.schema_editor() as schema_editor:
+            if not partitions.is_partitioned(connection):
+                if not options['setup']:
+                    raise CommandError(f'{partitions.TABLE} is not partitioned, run with --setup to convert it.')
+                partitions.convert(connection, schema_editor)
+                self.stdout.write(f'Converted {partitions.TABLE}, the existing rows are in '
+                                  f'{partitions.LEGACY_PARTITION}.')
+
+            this_month = partitions.month_start(timezone.now())
+            created = partitions.create_partitions(connection, partitions.add_months(this_month, ahead))
+            detached, skipped = [], []
+            if options['detach_older_than'] is not None:
+                before = partitions.add_months(this_month, -options['detach_older_than'])
+                detached, skipped = partitions.detach_partitions(connection, before, force=options['force'])
+
+        for name in skipped:
+            self.stdout.write(f'Kept {name}, it still holds purchase requests: archive them first, or --force.')
+        for name in detached:
+            self.stdout.write(f'Detached {name}, dump or drop the table when it is no longer needed.')
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {len(created)} partitions, detached {len(detached)}.'
+        ))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.dateparse import parse_date
+
+from buyer.models import PurchaseRequestDailyStats
+
+
+class Command(BaseCommand):
+    """
+        Backfill the daily purchase analytics rollup from the purchase requests.
+
+        ``--since`` limits the rebuild to the days from that date on, e.g. to repair a recent window
+        without rewriting years of history.
+    """
+    help = 'Rebuild the PurchaseRequestDailyStats rollup table from the purchase requests.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help='Only rebuild the days from this date (YYYY-MM-DD) on.')
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            try:
+                since = parse_date(options['since'])
+            except ValueError:
+                since = None
+            if since is None:
+                raise CommandError(f'Invalid --since date: {options["since"]}')
+
+        with transaction.atomic():
+            written = PurchaseRequestDailyStats.objects.rebuild(since=since)
+
+        scope = f'from {since}' if since else 'for all days'
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {written} daily stats rows {scope}.'))
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from buyer.models import PurchaseRequestStats, PurchaseRequestWithArchive
+
+
+class Command(BaseCommand):
+    """
+        Rebuild the per-user KPI counters from scratch and report any drift.
+
+        Archived purchase requests still count, so the live and archived rows are read together.
+
+        The stats rows are locked while the expected values are computed, so run it when
+        purchase request writes are quiet to keep the blocking window short.
+    """
+    help = 'Rebuild the PurchaseRequestStats table from the purchase requests and report any drift.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help='Only report drift, leave the stats table untouched.')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            current = {(stats.user_id, stats.side): stats.to_kpi()
+                       for stats in PurchaseRequestStats.objects.select_for_update()}
+            expected = {}
+            for side, _ in PurchaseRequestStats.SIDE_CHOICES:
+                queryset = PurchaseRequestWithArchive.objects.filter(**{f'{side}__isnull': False})
+                for user_id, summary in queryset.kpi_summary(group_by=side).items():
+                    expected[(user_id, side)] = summary
+
+            empty = PurchaseRequestStats().to_kpi()
+            drifted = 0
+            for key in sorted(set(current) | set(expected)):
+                have, want = current.get(key, empty), expected.get(key, empty)
+                differences = [f'{field} {have[field]} != {want[field]}'
+                               for field in PurchaseRequestStats.KPI_FIELDS if have[field] != want[field]]
+                if differences:
+                    drifted += 1
+                    self.stdout.write(f'{key[1]} {key[0]}: ' + ', '.join(differences))
+
+            if not options['check']:
+                PurchaseRequestStats.objects.all().delete()
+                PurchaseRequestStats.objects.bulk_create([
+                    PurchaseRequestStats(user_id=user_id, side=side, **summary)
+                    for (user_id, side), summary in expected.items()
+                ])
+
+        action = 'Checked' if options['check'] else 'Rebuilt'
+        self.stdout.write(self.style.SUCCESS(
+            f'{action} {len(expected)} stats rows, {drifted} with drift.'
+        ))
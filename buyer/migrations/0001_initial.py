@@ -0,0 +1,33 @@
+# Generated by Django 4.2.16 on 2026-10-18 01:58
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PurchaseRequest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('In-Process', 'In-Process'), ('Approved', 'Approved'), ('Rejected', 'Rejected')], default='In-Process', max_length=10)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('total_amount', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('buyer', models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='buyer_requests', to=settings.AUTH_USER_MODEL)),
+                ('seller', models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='seller_requests', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['buyer', 'status', 'created_at'], name='purchase_buyer_status_idx'), models.Index(fields=['seller', 'status', 'created_at'], name='purchase_seller_status_idx'), models.Index(fields=['buyer', '-created_at', '-id'], name='purchase_buyer_recent_idx'), models.Index(fields=['seller', '-created_at', '-id'], name='purchase_seller_recent_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 4.2.16 on 2026-10-18 02:02
+
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_stats(apps, schema_editor):
+    """
+        Fill the KPI counters from the purchase requests that already exist.
+    """
+    PurchaseRequest = apps.get_model('buyer', 'PurchaseRequest')
+    PurchaseRequestStats = apps.get_model('buyer', 'PurchaseRequestStats')
+    keys = {'In-Process': 'in_process', 'Approved': 'approved', 'Rejected': 'rejected'}
+    stats = {}
+    for side in ('buyer', 'seller'):
+        rows = (PurchaseRequest.objects.filter(**{f'{side}__isnull': False}).order_by()
+                .values(side, 'status').annotate(count=models.Count('id'), amount=models.Sum('total_amount')))
+        for row in rows:
+            row_stats = stats.setdefault((row[side], side), PurchaseRequestStats(user_id=row[side], side=side))
+            key, amount = keys[row['status']], row['amount'] or Decimal('0.00')
+            row_stats.total_purchases += row['count']
+            row_stats.total_amount += amount
+            setattr(row_stats, key, getattr(row_stats, key) + row['count'])
+            setattr(row_stats, f'{key}_amount', getattr(row_stats, f'{key}_amount') + amount)
+    PurchaseRequestStats.objects.bulk_create(stats.values())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('buyer', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PurchaseRequestStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('side', models.CharField(choices=[('buyer', 'Buyer'), ('seller', 'Seller')], max_length=6)),
+                ('total_purchases', models.IntegerField(default=0)),
+                ('in_process', models.IntegerField(default=0)),
+                ('approved', models.IntegerField(default=0)),
+                ('rejected', models.IntegerField(default=0)),
+                ('total_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('in_process_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('approved_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('rejected_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='purchase_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='purchaserequeststats',
+            constraint=models.UniqueConstraint(fields=('user', 'side'), name='purchase_stats_user_side_uniq'),
+        ),
+        migrations.RunPython(populate_stats, migrations.RunPython.noop),
+    ]
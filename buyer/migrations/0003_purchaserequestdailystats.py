@@ -0,0 +1,53 @@
+# Generated by Django 4.2.16 on 2026-10-18 02:15
+
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models.functions import TruncDate
+
+
+def populate_daily_stats(apps, schema_editor):
+    """
+        Fill the daily rollup from the purchase requests that already exist.
+    """
+    PurchaseRequest = apps.get_model('buyer', 'PurchaseRequest')
+    PurchaseRequestDailyStats = apps.get_model('buyer', 'PurchaseRequestDailyStats')
+    rollup = []
+    for side in ('buyer', 'seller'):
+        rows = (PurchaseRequest.objects.filter(**{f'{side}__isnull': False}).order_by()
+                .values(side, 'status', created_day=TruncDate('created_at'))
+                .annotate(request_count=models.Count('id'), request_amount=models.Sum('total_amount')))
+        rollup += [PurchaseRequestDailyStats(user_id=row[side], side=side, day=row['created_day'],
+                                             status=row['status'], count=row['request_count'],
+                                             amount=row['request_amount'] or Decimal('0.00'))
+                   for row in rows]
+    PurchaseRequestDailyStats.objects.bulk_create(rollup, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('buyer', '0002_purchaserequeststats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PurchaseRequestDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('side', models.CharField(choices=[('buyer', 'Buyer'), ('seller', 'Seller')], max_length=6)),
+                ('day', models.DateField()),
+                ('status', models.CharField(choices=[('In-Process', 'In-Process'), ('Approved', 'Approved'), ('Rejected', 'Rejected')], max_length=10)),
+                ('count', models.IntegerField(default=0)),
+                ('amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='purchase_daily_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='purchaserequestdailystats',
+            constraint=models.UniqueConstraint(fields=('user', 'side', 'day', 'status'), name='purchase_daily_user_day_uniq'),
+        ),
+        migrations.RunPython(populate_daily_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+from django.db import migrations
+
+# A generated column is maintained by PostgreSQL itself on every INSERT and UPDATE, including bulk
+# writes and raw SQL, so it can never drift from the description.
+ADD_SEARCH_VECTOR = [
+    "ALTER TABLE buyer_purchaserequest ADD COLUMN search_vector tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('english', coalesce(description, ''))) STORED",
+    "CREATE INDEX purchase_search_vector_idx ON buyer_purchaserequest USING GIN (search_vector)",
+]
+DROP_SEARCH_VECTOR = [
+    "DROP INDEX IF EXISTS purchase_search_vector_idx",
+    "ALTER TABLE buyer_purchaserequest DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def run_on_postgresql(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            # Other databases search with a LIKE fallback, see PurchaseRequestQuerySet.search
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('buyer', '0003_purchaserequestdailystats'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_on_postgresql(ADD_SEARCH_VECTOR), run_on_postgresql(DROP_SEARCH_VECTOR)),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.16 on 2026-10-18 02:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('buyer', '0004_purchaserequest_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='purchaserequest',
+            index=models.Index(fields=['buyer', 'seller', '-created_at', '-id'], name='purchase_buyer_seller_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchaserequest',
+            index=models.Index(fields=['seller', 'buyer', '-created_at', '-id'], name='purchase_seller_buyer_idx'),
+        ),
+    ]
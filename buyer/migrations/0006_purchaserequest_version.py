@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-18 02:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('buyer', '0005_purchaserequest_counterparty_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='purchaserequest',
+            name='version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.16 on 2026-10-18 02:28
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('buyer', '0006_purchaserequest_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PurchaseRequestStatusHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(choices=[('In-Process', 'In-Process'), ('Approved', 'Approved'), ('Rejected', 'Rejected')], max_length=10)),
+                ('to_status', models.CharField(choices=[('In-Process', 'In-Process'), ('Approved', 'Approved'), ('Rejected', 'Rejected')], max_length=10)),
+                ('changed_at', models.DateTimeField()),
+                ('changed_by', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('purchase_request', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='status_history', to='buyer.purchaserequest')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['purchase_request', '-changed_at', '-id'], name='purchase_history_recent_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 4.2.16 on 2026-10-18 02:57
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+VIEW = 'buyer_purchaserequest_with_archive'
+COLUMNS = 'id, buyer_id, seller_id, status, description, total_amount, created_at, updated_at, version'
+
+
+def view_sql(columns):
+    return (f"CREATE VIEW {VIEW} AS "
+            f"SELECT {columns}, FALSE AS archived FROM buyer_purchaserequest "
+            f"UNION ALL SELECT {columns}, TRUE AS archived FROM buyer_archivedpurchaserequest")
+
+
+# Also recreated by buyer.partitions after converting the live table
+POSTGRESQL_VIEW_SQL = view_sql(f'{COLUMNS}, search_vector')
+
+# The archive gets the same generated search_vector column as the live table on PostgreSQL (see
+# migration 0004), so PurchaseRequestQuerySet.search works on the union too.
+POSTGRESQL_STATEMENTS = [
+    "ALTER TABLE buyer_archivedpurchaserequest ADD COLUMN search_vector tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('english', coalesce(description, ''))) STORED",
+    "CREATE INDEX archived_search_vector_idx ON buyer_archivedpurchaserequest USING GIN (search_vector)",
+    POSTGRESQL_VIEW_SQL,
+]
+
+
+def create_view(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        statements = POSTGRESQL_STATEMENTS
+    else:
+        statements = [view_sql(COLUMNS)]
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def drop_view(apps, schema_editor):
+    # The search_vector column and its index go with the archive table
+    schema_editor.execute(f'DROP VIEW IF EXISTS {VIEW}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('buyer', '0007_purchaserequeststatushistory'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PurchaseRequestWithArchive',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('In-Process', 'In-Process'), ('Approved', 'Approved'), ('Rejected', 'Rejected')], max_length=10)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('total_amount', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('version', models.PositiveIntegerField()),
+                ('archived', models.BooleanField()),
+            ],
+            options={
+                'db_table': 'buyer_purchaserequest_with_archive',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedPurchaseRequest',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('In-Process', 'In-Process'), ('Approved', 'Approved'), ('Rejected', 'Rejected')], max_length=10)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('total_amount', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('version', models.PositiveIntegerField(default=1)),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('buyer', models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('seller', models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['buyer', '-created_at', '-id'], name='archived_buyer_recent_idx'), models.Index(fields=['seller', '-created_at', '-id'], name='archived_seller_recent_idx')],
+            },
+        ),
+        migrations.RunPython(create_view, drop_view),
+    ]
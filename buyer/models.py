@@ -1,20 +1,523 @@
-from django.db import models
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connections, models
+from django.db.models import Count, F, FloatField, Q, Sum, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast, Coalesce, TruncDate, TruncDay, TruncMonth, TruncWeek
+from django.utils import timezone
 
 from accounts.models import User
+from buyer.signals import StatusChange
+
+
+# KPI key prefix for each status
+KPI_STATUSES = (('in_process', 'In-Process'),
+                ('approved', 'Approved'),
+                ('rejected', 'Rejected'))
+KPI_STATUS_KEYS = {status: key for key, status in KPI_STATUSES}
+
+# Text search configuration of the search_vector column, see migration 0004
+SEARCH_CONFIG = 'english'
+
+# Analytics periods, keyed by their first day (weeks start on Monday)
+PERIOD_TRUNCATE = {'day': TruncDay, 'week': TruncWeek, 'month': TruncMonth}
+
+
+def empty_kpi():
+    kpi = {'total_purchases': 0, 'total_amount': Decimal('0.00')}
+    for key, _ in KPI_STATUSES:
+        kpi[key] = 0
+        kpi[f'{key}_amount'] = Decimal('0.00')
+    return kpi
+
+
+def period_start(day, interval):
+    if interval == 'week':
+        return day - timedelta(days=day.weekday())
+    if interval == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def next_period(start, interval):
+    if interval == 'week':
+        return start + timedelta(days=7)
+    if interval == 'month':
+        return (start + timedelta(days=31)).replace(day=1)
+    return start + timedelta(days=1)
 
 
 # Create your models here.
+class PurchaseRequestQuerySet(models.QuerySet):
+    def kpi_summary(self, group_by=None):
+        """
+            Return the KPI card counts and total_amount sums per status in a single query.
+
+            With ``group_by`` (e.g. ``'seller'``) return a ``{group value: summary}`` dict instead,
+            still from one grouped query.
+        """
+        zero = Value(Decimal('0.00'), output_field=models.DecimalField(max_digits=12, decimal_places=2))
+        aggregates = {
+            'total_purchases': Count('id'),
+            # Aliased so it doesn't shadow the total_amount field the other sums refer to.
+            'all_amount': Coalesce(Sum('total_amount'), zero),
+        }
+        for key, status in KPI_STATUSES:
+            aggregates[key] = Count('id', filter=Q(status=status))
+            aggregates[f'{key}_amount'] = Coalesce(Sum('total_amount', filter=Q(status=status)), zero)
+
+        if group_by is None:
+            summary = self.aggregate(**aggregates)
+            summary['total_amount'] = summary.pop('all_amount')
+            return summary
+
+        summaries = {}
+        for row in self.order_by().values(group_by).annotate(**aggregates):
+            row['total_amount'] = row.pop('all_amount')
+            summaries[row.pop(group_by)] = row
+        return summaries
+
+    def search(self, text):
+        """
+            Keep the purchase requests whose description matches ``text`` and annotate their
+            ``search_rank``, higher is more relevant.
+
+            On PostgreSQL ``text`` is a web search query (quoted phrases, ``or``, ``-word``) matched
+            against the GIN-indexed ``search_vector`` column and ranked with ts_rank. Other databases
+            fall back to a case-insensitive match of every word, without ranking.
+        """
+        if connections[self.db].vendor == 'postgresql':
+            from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVectorField
+
+            query = SearchQuery(text, config=SEARCH_CONFIG, search_type='websearch')
+            table = connections[self.db].ops.quote_name(self.model._meta.db_table)
+            # The column is maintained by the database, not a model field
+            document = RawSQL(f'{table}.search_vector', [], output_field=SearchVectorField())
+            # ts_rank is a real; as a double precision it survives the cursor round trip exactly
+            rank = Cast(SearchRank(document, query), FloatField())
+            return self.alias(search_document=document).filter(search_document=query).annotate(search_rank=rank)
+
+        condition = Q()
+        for word in text.split():
+            condition &= Q(description__icontains=word)
+        return self.filter(condition).annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    def set_status(self, status, changed_by_id=None, version=None):
+        """
+            Move every purchase request of the queryset that may legally move to ``status`` to it,
+            and return the StatusChange of each updated row.
+
+            This is a single ``UPDATE ... RETURNING`` without any prior read or row lock: the legal
+            previous status (and ``version``, when given) are part of its WHERE clause, so a row that
+            a concurrent writer already moved is simply not updated. Every update bumps the version.
+        """
+        from_status = PurchaseRequest.STATUS_SOURCES.get(status)
+        if from_status is None:
+            return []
+        candidates = self.filter(status=from_status)
+        if version is not None:
+            candidates = candidates.filter(version=version)
+
+        connection = connections[self.db]
+        opts = self.model._meta
+        quote_name = connection.ops.quote_name
+        returned = [opts.get_field(name) for name in ('id', 'buyer', 'seller', 'total_amount', 'created_at', 'version')]
+        ids_sql, ids_params = candidates.order_by().values('id').query.sql_with_params()
+        # The outer conditions are re-checked on the row being updated, after any concurrent write
+        conditions = [f'{quote_name("id")} IN ({ids_sql})', f'{quote_name("status")} = %s']
+        params = [status, opts.get_field('updated_at').get_db_prep_value(timezone.now(), connection),
+                  *ids_params, from_status]
+        if version is not None:
+            conditions.append(f'{quote_name("version")} = %s')
+            params.append(version)
+        sql = (f'UPDATE {quote_name(opts.db_table)} '
+               f'SET {quote_name("status")} = %s, {quote_name("version")} = {quote_name("version")} + 1, '
+               f'{quote_name("updated_at")} = %s '
+               f'WHERE {" AND ".join(conditions)} '
+               f'RETURNING {", ".join(quote_name(field.column) for field in returned)}')
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+
+        converters = []
+        for field in returned:
+            column = field.get_col(opts.db_table)
+            converters.append((column, connection.ops.get_db_converters(column) + column.get_db_converters(connection)))
+        changes = []
+        for row in rows:
+            values = []
+            for value, (column, column_converters) in zip(row, converters):
+                for converter in column_converters:
+                    value = converter(value, column, connection)
+                values.append(value)
+            request_id, buyer_id, seller_id, total_amount, created_at, new_version = values
+            changes.append(StatusChange(request_id=request_id, buyer_id=buyer_id, seller_id=seller_id,
+                                        total_amount=total_amount, created_at=created_at, from_status=from_status,
+                                        to_status=status, changed_by_id=changed_by_id, version=new_version))
+        return changes
+
+
 class PurchaseRequest(models.Model):
     STATUS_CHOICES = (('In-Process', 'In-Process'),
                       ('Approved', 'Approved'),
                       ('Rejected', 'Rejected'))
-    buyer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='buyer_requests', null=True, blank=True)
-    seller = models.ForeignKey(User, on_delete=models.CASCADE, related_name='seller_requests', null=True, blank=True)
+    # Legal status moves: a purchase request is decided once, from In-Process.
+    STATUS_TRANSITIONS = {'In-Process': ('Approved', 'Rejected')}
+    # Each target status has a single legal source, so an UPDATE conditioned on it knows the previous
+    # status of every row it changed without reading it first.
+    STATUS_SOURCES = {target: source for source, targets in STATUS_TRANSITIONS.items() for target in targets}
+
+    # The composite indexes below lead with buyer/seller, so the implicit FK indexes are redundant.
+    buyer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='buyer_requests', null=True, blank=True,
+                              db_index=False)
+    seller = models.ForeignKey(User, on_delete=models.CASCADE, related_name='seller_requests', null=True, blank=True,
+                               db_index=False)
     status = models.CharField(max_length=10,
                               choices=STATUS_CHOICES, default='In-Process')
     description = models.TextField(null=True, blank=True)
     total_amount = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Bumped by every status change, for optimistic concurrency control, see PurchaseRequestQuerySet.set_status
+    version = models.PositiveIntegerField(default=1)
+
+    objects = PurchaseRequestQuerySet.as_manager()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored status so a later save() can tell whether it changed.
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
+
+    def save(self, *args, **kwargs):
+        loaded_status = getattr(self, '_loaded_status', None)
+        if loaded_status is not None and loaded_status != self.status:
+            # Status changes saved directly (e.g. in the admin) bump the version like set_status does
+            self.version += 1
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'version'}
+        super().save(*args, **kwargs)
+
+    class Meta:
+        indexes = [
+            # KPI cards: filter by (buyer|seller, status).
+            models.Index(fields=['buyer', 'status', 'created_at'], name='purchase_buyer_status_idx'),
+            models.Index(fields=['seller', 'status', 'created_at'], name='purchase_seller_status_idx'),
+            # Lists: filter by buyer|seller, keyset ordered on (created_at, id).
+            models.Index(fields=['buyer', '-created_at', '-id'], name='purchase_buyer_recent_idx'),
+            models.Index(fields=['seller', '-created_at', '-id'], name='purchase_seller_recent_idx'),
+            # Lists filtered on the counterparty, same keyset order. Amount ranges are applied while
+            # walking one of the indexes above, the list owner alone already bounds the scan.
+            models.Index(fields=['buyer', 'seller', '-created_at', '-id'], name='purchase_buyer_seller_idx'),
+            models.Index(fields=['seller', 'buyer', '-created_at', '-id'], name='purchase_seller_buyer_idx'),
+        ]
+
+
+class ArchivedPurchaseRequest(models.Model):
+    """
+        Closed purchase requests moved out of PurchaseRequest by the ``archive_purchase_requests`` command.
+
+        Rows keep their id and every column of the live table, so the archive is read through the
+        PurchaseRequestWithArchive union like live rows. Closed requests never change again and their
+        KPI counters stay in PurchaseRequestStats, which the move doesn't touch.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    buyer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+', null=True, blank=True,
+                              db_index=False)
+    seller = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+', null=True, blank=True,
+                               db_index=False)
+    status = models.CharField(max_length=10, choices=PurchaseRequest.STATUS_CHOICES)
+    description = models.TextField(null=True, blank=True)
+    total_amount = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    version = models.PositiveIntegerField(default=1)
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # Lists with include_archived, same keyset order as the live table.
+            models.Index(fields=['buyer', '-created_at', '-id'], name='archived_buyer_recent_idx'),
+            models.Index(fields=['seller', '-created_at', '-id'], name='archived_seller_recent_idx'),
+        ]
+
+
+class PurchaseRequestWithArchive(models.Model):
+    """
+        Read-only database view of the live and archived purchase requests together (UNION ALL), see
+        migration 0008. ``archived`` tells the two apart.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    buyer = models.ForeignKey(User, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+', null=True,
+                              blank=True)
+    seller = models.ForeignKey(User, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+', null=True,
+                               blank=True)
+    status = models.CharField(max_length=10, choices=PurchaseRequest.STATUS_CHOICES)
+    description = models.TextField(null=True, blank=True)
+    total_amount = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    version = models.PositiveIntegerField()
+    archived = models.BooleanField()
+
+    objects = PurchaseRequestQuerySet.as_manager()
+
+    class Meta:
+        managed = False
+        db_table = 'buyer_purchaserequest_with_archive'
+
+
+class PurchaseRequestStatsManager(models.Manager):
+
+    def kpi_for(self, user, side):
+        """
+            Return the KPI card of a user as a buyer or seller, read from its single stats row.
+        """
+        stats = self.filter(user_id=user.id, side=side).first() or self.model(user_id=user.id, side=side)
+        return stats.to_kpi()
+
+    async def akpi_for(self, user, side):
+        stats = await self.filter(user_id=user.id, side=side).afirst() or self.model(user_id=user.id, side=side)
+        return stats.to_kpi()
+
+    def record_created(self, requests):
+        """
+            Count newly created purchase requests for their buyers and sellers.
+        """
+        deltas = {}
+        for request in requests:
+            key = KPI_STATUS_KEYS[request.status]
+            amount = request.total_amount or Decimal('0.00')
+            for side, user_id in (('buyer', request.buyer_id), ('seller', request.seller_id)):
+                self._add(deltas, user_id, side, {
+                    'total_purchases': 1, key: 1,
+                    'total_amount': amount, f'{key}_amount': amount,
+                })
+        self.apply_deltas(deltas)
+
+    def record_status_changes(self, changes):
+        """
+            Move purchase requests between status counters after their status changed.
+        """
+        deltas = {}
+        for change in changes:
+            old_key, new_key = KPI_STATUS_KEYS[change.from_status], KPI_STATUS_KEYS[change.to_status]
+            amount = change.total_amount or Decimal('0.00')
+            for side, user_id in (('buyer', change.buyer_id), ('seller', change.seller_id)):
+                self._add(deltas, user_id, side, {
+                    old_key: -1, new_key: 1,
+                    f'{old_key}_amount': -amount, f'{new_key}_amount': amount,
+                })
+        self.apply_deltas(deltas)
+
+    def apply_deltas(self, deltas):
+        """
+            Add ``{(user_id, side): {field: delta}}`` to the stats rows with F() expressions.
+
+            Missing rows are inserted first (ignoring conflicts), so concurrent writers only ever
+            increment the same row and never lose each other's updates.
+        """
+        if not deltas:
+            return
+        self.bulk_create([self.model(user_id=user_id, side=side) for user_id, side in deltas],
+                         ignore_conflicts=True)
+        for (user_id, side), fields in deltas.items():
+            changes = {field: F(field) + delta for field, delta in fields.items() if delta}
+            if changes:
+                self.filter(user_id=user_id, side=side).update(updated_at=timezone.now(), **changes)
+
+    @staticmethod
+    def _add(deltas, user_id, side, fields):
+        if user_id is None:
+            return
+        row = deltas.setdefault((user_id, side), {})
+        for field, delta in fields.items():
+            row[field] = row.get(field, 0) + delta
+
+
+class PurchaseRequestStats(models.Model):
+    """
+        Incrementally maintained KPI counters of a user, one row per user and side (buyer or seller).
+
+        Rows are updated in the same transaction as the purchase request writes, see buyer.receivers,
+        and can be rebuilt with the ``rebuild_purchase_stats`` management command.
+    """
+    SIDE_CHOICES = (('buyer', 'Buyer'),
+                    ('seller', 'Seller'))
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='purchase_stats', db_index=False)
+    side = models.CharField(max_length=6, choices=SIDE_CHOICES)
+    total_purchases = models.IntegerField(default=0)
+    in_process = models.IntegerField(default=0)
+    approved = models.IntegerField(default=0)
+    rejected = models.IntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    in_process_amount = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    approved_amount = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    rejected_amount = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = PurchaseRequestStatsManager()
+
+    KPI_FIELDS = ('total_purchases', 'in_process', 'approved', 'rejected',
+                  'total_amount', 'in_process_amount', 'approved_amount', 'rejected_amount')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'side'], name='purchase_stats_user_side_uniq'),
+        ]
+
+    def to_kpi(self):
+        return {field: getattr(self, field) for field in self.KPI_FIELDS}
+
+
+class PurchaseRequestDailyStatsManager(models.Manager):
+
+    def record_created(self, requests):
+        """
+            Count newly created purchase requests in the day bucket of their creation.
+        """
+        deltas = {}
+        for request in requests:
+            amount = request.total_amount or Decimal('0.00')
+            for key in self._keys(request.buyer_id, request.seller_id, request.created_at):
+                self._add(deltas, key + (request.status,), 1, amount)
+        self.apply_deltas(deltas)
+
+    def record_status_changes(self, changes):
+        """
+            Move purchase requests between the status buckets of their creation day.
+        """
+        deltas = {}
+        for change in changes:
+            amount = change.total_amount or Decimal('0.00')
+            for key in self._keys(change.buyer_id, change.seller_id, change.created_at):
+                self._add(deltas, key + (change.from_status,), -1, -amount)
+                self._add(deltas, key + (change.to_status,), 1, amount)
+        self.apply_deltas(deltas)
+
+    def apply_deltas(self, deltas):
+        """
+            Add ``{(user_id, side, day, status): (count, amount)}`` to the rollup rows with F() expressions,
+            inserting the missing rows first like PurchaseRequestStatsManager.apply_deltas.
+        """
+        deltas = {key: delta for key, delta in deltas.items() if delta[0] or delta[1]}
+        if not deltas:
+            return
+        self.bulk_create([self.model(user_id=user_id, side=side, day=day, status=status)
+                          for user_id, side, day, status in deltas], ignore_conflicts=True)
+        for (user_id, side, day, status), (count, amount) in deltas.items():
+            self.filter(user_id=user_id, side=side, day=day, status=status).update(
+                count=F('count') + count, amount=F('amount') + amount)
+
+    def rebuild(self, since=None):
+        """
+            Recompute the rollup rows from the purchase requests, all of them or only the days from
+            ``since`` on, with one grouped query per side. Return the number of rows written.
+
+            Must run inside a transaction, so readers never see the emptied days.
+        """
+        rows = self.all() if since is None else self.filter(day__gte=since)
+        rows.delete()
+        # Archived requests still count on the day they were created
+        requests = PurchaseRequestWithArchive.objects.all()
+        if since is not None:
+            # Local midnight of ``since``, matching the local creation days of the rollup
+            requests = requests.filter(created_at__date__gte=since)
+        rollup = []
+        for side, _ in PurchaseRequestStats.SIDE_CHOICES:
+            grouped = (requests.filter(**{f'{side}__isnull': False}).order_by()
+                       .values(side, 'status', created_day=TruncDate('created_at'))
+                       .annotate(request_count=Count('id'), request_amount=Sum('total_amount')))
+            rollup += [self.model(user_id=row[side], side=side, day=row['created_day'], status=row['status'],
+                                  count=row['request_count'], amount=row['request_amount'] or Decimal('0.00'))
+                       for row in grouped]
+        self.bulk_create(rollup, batch_size=1000)
+        return len(rollup)
+
+    def series(self, user, side, interval, start, end):
+        """
+            Return the KPI counts and amounts per status of every ``interval`` ('day', 'week' or 'month')
+            period from the one holding ``start`` to the one holding ``end``, oldest first.
+
+            Periods are whole, keyed by their first day, and empty periods are included with zeros.
+        """
+        first, last = period_start(start, interval), period_start(end, interval)
+        until = next_period(last, interval) - timedelta(days=1)
+        rows = (self.filter(user_id=user.id, side=side, day__range=(first, until), count__gt=0)
+                .annotate(period=PERIOD_TRUNCATE[interval]('day'))
+                .order_by().values('period', 'status')
+                .annotate(period_count=Sum('count'), period_amount=Sum('amount')))
+        periods = {}
+        period = first
+        while period <= last:
+            periods[period] = empty_kpi()
+            period = next_period(period, interval)
+        for row in rows:
+            summary, key = periods[row['period']], KPI_STATUS_KEYS[row['status']]
+            summary[key] += row['period_count']
+            summary[f'{key}_amount'] += row['period_amount']
+            summary['total_purchases'] += row['period_count']
+            summary['total_amount'] += row['period_amount']
+        return [{'period': period, **summary} for period, summary in periods.items()]
+
+    @staticmethod
+    def _keys(buyer_id, seller_id, created_at):
+        day = timezone.localdate(created_at)
+        return [(user_id, side, day) for side, user_id in (('buyer', buyer_id), ('seller', seller_id))
+                if user_id is not None]
+
+    @staticmethod
+    def _add(deltas, key, count, amount):
+        previous_count, previous_amount = deltas.get(key, (0, 0))
+        deltas[key] = (previous_count + count, previous_amount + amount)
+
+
+class PurchaseRequestDailyStats(models.Model):
+    """
+        Daily rollup of purchase requests per user, side, creation day and status, behind the analytics
+        endpoints.
+
+        Requests are counted on the day they were created (in TIME_ZONE) and move between status buckets
+        when their status changes. Rows are maintained with PurchaseRequestStats, see buyer.receivers,
+        and can be backfilled with the ``rebuild_purchase_daily_stats`` management command.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='purchase_daily_stats', db_index=False)
+    side = models.CharField(max_length=6, choices=PurchaseRequestStats.SIDE_CHOICES)
+    day = models.DateField()
+    status = models.CharField(max_length=10, choices=PurchaseRequest.STATUS_CHOICES)
+    count = models.IntegerField(default=0)
+    amount = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+
+    objects = PurchaseRequestDailyStatsManager()
+
+    class Meta:
+        constraints = [
+            # Also the index of the analytics range scans on (user, side, day).
+            models.UniqueConstraint(fields=['user', 'side', 'day', 'status'], name='purchase_daily_user_day_uniq'),
+        ]
+
+
+class PurchaseRequestStatusHistory(models.Model):
+    """
+        Append-only audit trail of purchase request status changes.
 
+        Rows are written in batches by buyer.history.StatusHistoryWriter after the change commits. The
+        foreign keys have no database constraint, so the trail outlives the request and the user, and a
+        batch can never fail because one of them was deleted in the meantime.
+    """
+    purchase_request = models.ForeignKey(PurchaseRequest, on_delete=models.DO_NOTHING, db_constraint=False,
+                                         db_index=False, related_name='status_history')
+    from_status = models.CharField(max_length=10, choices=PurchaseRequest.STATUS_CHOICES)
+    to_status = models.CharField(max_length=10, choices=PurchaseRequest.STATUS_CHOICES)
+    changed_by = models.ForeignKey(User, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True,
+                                   related_name='+')
+    changed_at = models.DateTimeField()
 
+    class Meta:
+        indexes = [
+            # History of one request, keyset ordered on (changed_at, id).
+            models.Index(fields=['purchase_request', '-changed_at', '-id'], name='purchase_history_recent_idx'),
+        ]
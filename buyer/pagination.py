@@ -0,0 +1,160 @@
+import base64
+import binascii
+import datetime
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, _positive_int
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetCursorPagination(BasePagination):
+    """
+        Keyset (seek) pagination over a pair of ordering fields, by default ``(created_at, id)``.
+
+        A page is selected with a WHERE clause on the last seen position instead of an OFFSET,
+        and no COUNT(*) is issued, so page N costs the same as page 1. The position is handed
+        back to the client as an opaque ``cursor`` query parameter in the next/previous links.
+
+        Both ordering fields must sort in the same direction and the second one must be unique.
+        Views may override the ordering with a ``cursor_ordering`` attribute.
+    """
+    cursor_query_param = 'cursor'
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    ordering = ('-created_at', '-id')
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self._set_page(list(self._page_queryset(queryset, request, view)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+            Async variant of ``paginate_queryset``, for the native async views.
+        """
+        return self._set_page([item async for item in self._page_queryset(queryset, request, view)])
+
+    def _page_queryset(self, queryset, request, view):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.ordering = getattr(view, 'cursor_ordering', self.ordering)
+        self.page_size = self.get_page_size(request)
+        self.position, self.reverse = self.decode_cursor(request, queryset)
+
+        ordering = self._inverted_ordering() if self.reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if self.position is not None:
+            queryset = queryset.filter(self._seek_filter(self.position, self.reverse))
+        # Fetch one extra row to know whether there is a following page.
+        return queryset[:self.page_size + 1]
+
+    def _set_page(self, results):
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if self.reverse:
+            results.reverse()
+            self.has_next, self.has_previous = self.position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.position is not None
+
+        self.page = results
+        return results
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                return _positive_int(
+                    request.query_params[self.page_size_query_param],
+                    strict=True,
+                    cutoff=self.max_page_size
+                )
+            except (KeyError, ValueError):
+                pass
+        return self.page_size
+
+    def get_links(self):
+        """
+            Return the next/previous links for the current page, ``None`` when there is none.
+        """
+        return OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+        ])
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self._position_of(self.page[-1]), reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self._position_of(self.page[0]), reverse=True)
+
+    def decode_cursor(self, request, queryset):
+        """
+            Return the ``(position, reverse)`` pair encoded in the request cursor, the position values
+            converted by the ordering fields of ``queryset``.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            position = payload['p']
+            reverse = bool(payload.get('r', False))
+            if not isinstance(position, list) or len(position) != 2:
+                raise ValueError(position)
+            position = [self._ordering_field(queryset, field).to_python(value)
+                        for field, value in zip(self.ordering, position)]
+            if None in position:
+                raise ValueError(position)
+        except (TypeError, ValueError, KeyError, UnicodeError, binascii.Error, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def encode_cursor(self, position, reverse):
+        payload = {'p': [self._encode_value(value) for value in position]}
+        if reverse:
+            payload['r'] = 1
+        encoded = base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode('utf-8'))
+        url = remove_query_param(self.base_url, self.cursor_query_param)
+        return replace_query_param(url, self.cursor_query_param, encoded.decode('ascii'))
+
+    def _seek_filter(self, position, reverse):
+        (first, second) = [field.lstrip('-') for field in self.ordering]
+        descending = self.ordering[0].startswith('-')
+        lookup = 'lt' if descending != reverse else 'gt'
+        first_value, second_value = position
+        seek = Q(**{f'{first}__{lookup}': first_value}) | Q(**{first: first_value, f'{second}__{lookup}': second_value})
+        # The redundant bound on the first field alone lets PostgreSQL skip the created_at partitions past
+        # the cursor (see buyer.partitions), which it can't infer from the OR.
+        return Q(**{f'{first}__{lookup}e': first_value}) & seek
+
+    @staticmethod
+    def _ordering_field(queryset, name):
+        name = name.lstrip('-')
+        if name in queryset.query.annotations:
+            return queryset.query.annotations[name].output_field
+        return queryset.model._meta.get_field(name)
+
+    def _inverted_ordering(self):
+        return tuple(field[1:] if field.startswith('-') else f'-{field}' for field in self.ordering)
+
+    def _position_of(self, item):
+        fields = [field.lstrip('-') for field in self.ordering]
+        if isinstance(item, dict):
+            return [item[field] for field in fields]
+        return [getattr(item, field) for field in fields]
+
+    @staticmethod
+    def _encode_value(value):
+        if isinstance(value, (datetime.datetime, datetime.date)):
+            return value.isoformat()
+        if isinstance(value, (int, float, str)) or value is None:
+            return value
+        return str(value)
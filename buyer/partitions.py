@@ -0,0 +1,198 @@
+"""
+Optional PostgreSQL range partitioning of the purchase request table by ``created_at`` month.
+
+The table is converted once, with ``manage.py partition_purchase_requests --setup``: the existing table
+becomes the partition of every row created before next month, without copying a row, and one partition
+per month is added from then on, plus a default partition that catches rows past the last month created.
+The model doesn't change, Django keeps using the table name, and other databases keep a single table.
+
+Queries with a ``created_at`` range only read the matching partitions: the date filters of the lists and
+exports, and the keyset pagination bound (see buyer.pagination). Vacuum and index maintenance run per
+partition, so the busy recent months stay small, and old months can be detached once the
+``archive_purchase_requests`` command emptied them.
+
+PostgreSQL requires the partition key in every unique index, so the primary key becomes ``(id,
+created_at)``. Ids still come from a single sequence, and the status history keeps referencing them
+without a database constraint.
+"""
+import re
+from datetime import date, datetime, time
+from importlib import import_module
+
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from accounts.models import User
+from buyer.models import PurchaseRequest
+
+TABLE = PurchaseRequest._meta.db_table
+LEGACY_PARTITION = f'{TABLE}_p_legacy'
+DEFAULT_PARTITION = f'{TABLE}_p_default'
+SEQUENCE = f'{TABLE}_id_seq'
+# Created by migrations 0004 and 0008 on top of the model indexes
+SEARCH_INDEX = 'purchase_search_vector_idx'
+# The view depends on the table, so the conversion drops it and recreates it as migration 0008 did
+archive_migration = import_module('buyer.migrations.0008_purchase_request_archive')
+ARCHIVE_VIEW = archive_migration.VIEW
+ARCHIVE_VIEW_SQL = archive_migration.POSTGRESQL_VIEW_SQL
+
+
+def month_start(moment):
+    """
+        Return the first day of the month of ``moment``, a date or an aware datetime (in TIME_ZONE).
+    """
+    if isinstance(moment, datetime):
+        moment = timezone.localdate(moment)
+    return moment.replace(day=1)
+
+
+def add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def bound(month):
+    """
+        Local midnight of ``month`` as a timestamptz literal, matching the local days of the daily rollup.
+    """
+    moment = timezone.make_aware(datetime.combine(month, time.min))
+    return f"'{moment.isoformat()}'"
+
+
+def partition_name(month):
+    return f'{TABLE}_p{month:%Y_%m}'
+
+
+def is_partitioned(connection):
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT EXISTS (SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid '
+                       'WHERE c.relname = %s AND pg_table_is_visible(c.oid))', [TABLE])
+        return cursor.fetchone()[0]
+
+
+def partitions(connection):
+    """
+        Return ``{name: upper bound}`` of the partitions, the bound being an aware datetime, or None for
+        the default partition.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) FROM pg_inherits i '
+                       'JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent '
+                       'WHERE p.relname = %s AND pg_table_is_visible(p.oid)', [TABLE])
+        rows = cursor.fetchall()
+    upper_bounds = {}
+    for name, expression in rows:
+        match = re.search(r"TO \('([^']+)'\)", expression)
+        upper_bounds[name] = parse_datetime(match.group(1)) if match else None
+    return upper_bounds
+
+
+def convert(connection, schema_editor):
+    """
+        Turn the purchase request table into a table partitioned by ``created_at`` month, in the current
+        transaction. The existing table is attached as the partition of everything before next month.
+
+        The table is locked for the whole conversion, and attaching the old table scans it once to check
+        the partition bound, so run it in a maintenance window.
+    """
+    next_month = add_months(month_start(timezone.now()), 1)
+    quote_name = connection.ops.quote_name
+    index_names = [index.name for index in PurchaseRequest._meta.indexes] + [SEARCH_INDEX]
+    with connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE {TABLE} IN ACCESS EXCLUSIVE MODE')
+        cursor.execute(f'SELECT COALESCE(MAX(id), 0) FROM {TABLE}')
+        last_id = cursor.fetchone()[0]
+        cursor.execute("SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'p'", [TABLE])
+        primary_key = cursor.fetchone()[0]
+
+    statements = [
+        f'DROP VIEW IF EXISTS {ARCHIVE_VIEW}',
+        f'ALTER TABLE {TABLE} RENAME TO {LEGACY_PARTITION}',
+        # The identity sequence belongs to a single table, the partitioned table gets its own below
+        f'ALTER TABLE {LEGACY_PARTITION} ALTER COLUMN id DROP IDENTITY IF EXISTS',
+        f'ALTER TABLE {LEGACY_PARTITION} DROP CONSTRAINT {quote_name(primary_key)}',
+        f'ALTER TABLE {LEGACY_PARTITION} ADD PRIMARY KEY (id, created_at)',
+        # Free the index names for the partitioned table; ATTACH PARTITION adopts these indexes
+        *[f'ALTER INDEX {quote_name(name)} RENAME TO {quote_name(f"{name}_legacy")}' for name in index_names],
+        f'CREATE TABLE {TABLE} (LIKE {LEGACY_PARTITION} INCLUDING DEFAULTS INCLUDING CONSTRAINTS '
+        f'INCLUDING GENERATED) PARTITION BY RANGE (created_at)',
+        f'ALTER TABLE {TABLE} ADD PRIMARY KEY (id, created_at)',
+        f'CREATE SEQUENCE {SEQUENCE} OWNED BY {TABLE}.id',
+        f"ALTER TABLE {TABLE} ALTER COLUMN id SET DEFAULT nextval('{SEQUENCE}')",
+    ]
+    for field_name in ('buyer', 'seller'):
+        column = PurchaseRequest._meta.get_field(field_name).column
+        statements.append(f'ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_{column}_fk FOREIGN KEY ({column}) '
+                          f'REFERENCES {User._meta.db_table} (id) DEFERRABLE INITIALLY DEFERRED')
+    statements += [str(index.create_sql(PurchaseRequest, schema_editor)) for index in PurchaseRequest._meta.indexes]
+    statements += [
+        f'CREATE INDEX {SEARCH_INDEX} ON {TABLE} USING GIN (search_vector)',
+        f'ALTER TABLE {TABLE} ATTACH PARTITION {LEGACY_PARTITION} FOR VALUES FROM (MINVALUE) TO ({bound(next_month)})',
+        f'CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {TABLE} DEFAULT',
+        ARCHIVE_VIEW_SQL,
+    ]
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+        cursor.execute('SELECT setval(%s, %s, false)', [SEQUENCE, last_id + 1])
+
+
+def create_partitions(connection, until):
+    """
+        Create the monthly partitions missing after the last one up to the month of ``until`` included,
+        and return their names.
+
+        Creating a partition scans the default partition for rows of its month, which stays cheap as long
+        as the partitions are created ahead of time. Rows of those months already in the default
+        partition, when the command didn't run for a while, are moved to their new partitions: the default
+        partition is detached meanwhile, since PostgreSQL refuses a partition whose rows it holds.
+    """
+    upper_bounds = [upper for upper in partitions(connection).values() if upper is not None]
+    month = month_start(max(upper_bounds)) if upper_bounds else month_start(timezone.now())
+    months = []
+    while month <= month_start(until):
+        months.append(month)
+        month = add_months(month, 1)
+    if not months:
+        return []
+
+    columns = ', '.join(field.column for field in PurchaseRequest._meta.concrete_fields)
+    moved_rows = f'{DEFAULT_PARTITION} WHERE created_at < {bound(add_months(months[-1], 1))}'
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT EXISTS (SELECT 1 FROM {moved_rows})')
+        move = cursor.fetchone()[0]
+        if move:
+            cursor.execute(f'ALTER TABLE {TABLE} DETACH PARTITION {DEFAULT_PARTITION}')
+        for month in months:
+            cursor.execute(f'CREATE TABLE {partition_name(month)} PARTITION OF {TABLE} '
+                           f'FOR VALUES FROM ({bound(month)}) TO ({bound(add_months(month, 1))})')
+        if move:
+            # Inserted through the parent table, so each row lands in the partition of its month
+            cursor.execute(f'WITH moved AS (DELETE FROM {moved_rows} RETURNING {columns}) '
+                           f'INSERT INTO {TABLE} ({columns}) SELECT {columns} FROM moved')
+            cursor.execute(f'ALTER TABLE {TABLE} ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT')
+    return [partition_name(month) for month in months]
+
+
+def detach_partitions(connection, before, force=False):
+    """
+        Detach the partitions that end on or before the month of ``before``, and return ``(detached,
+        skipped)`` name lists. Partitions still holding rows are skipped unless ``force``: their rows
+        would leave the lists, the exports and the rebuilt KPI counters.
+
+        Detached partitions are left as plain tables, to be dumped or dropped.
+    """
+    cutoff = timezone.make_aware(datetime.combine(month_start(before), time.min))
+    detached, skipped = [], []
+    with connection.cursor() as cursor:
+        for name, upper in sorted(partitions(connection).items()):
+            if upper is None or upper > cutoff:
+                continue
+            if not force:
+                cursor.execute(f'SELECT EXISTS (SELECT 1 FROM {name})')
+                if cursor.fetchone()[0]:
+                    skipped.append(name)
+                    continue
+            cursor.execute(f'ALTER TABLE {TABLE} DETACH PARTITION {name}')
+            detached.append(name)
+    return detached, skipped
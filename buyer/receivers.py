@@ -0,0 +1,122 @@
+from decimal import Decimal
+
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from accounts.models import User
+from core.cache import bump_versions, user_scope
+from core.events import publish_on_commit
+from buyer.history import status_history
+from buyer.models import PurchaseRequest, PurchaseRequestDailyStats, PurchaseRequestStats, PurchaseRequestWithArchive
+from buyer.signals import StatusChange, purchase_request_status_changed, purchase_requests_created
+
+
+@receiver(post_save, sender=PurchaseRequest)
+def purchase_request_saved(sender, instance, created, raw=False, **kwargs):
+    """
+        Translate single-instance saves into the purchase request signals.
+
+        Bulk writes bypass post_save and send the signals themselves.
+    """
+    if raw:
+        return
+    previous_status = getattr(instance, '_loaded_status', None)
+    instance._loaded_status = instance.status
+    if created:
+        purchase_requests_created.send(sender=PurchaseRequest, requests=[instance])
+    elif previous_status is not None and previous_status != instance.status:
+        change = StatusChange(
+            request_id=instance.pk, buyer_id=instance.buyer_id, seller_id=instance.seller_id,
+            total_amount=instance.total_amount, created_at=instance.created_at,
+            from_status=previous_status, to_status=instance.status,
+            changed_by_id=getattr(instance, '_changed_by_id', None), version=instance.version,
+        )
+        purchase_request_status_changed.send(sender=PurchaseRequest, changes=[change])
+
+
+@receiver(purchase_requests_created)
+def count_created_requests(sender, requests, **kwargs):
+    PurchaseRequestStats.objects.record_created(requests)
+    PurchaseRequestDailyStats.objects.record_created(requests)
+
+
+@receiver(purchase_request_status_changed)
+def count_status_changes(sender, changes, **kwargs):
+    PurchaseRequestStats.objects.record_status_changes(changes)
+    PurchaseRequestDailyStats.objects.record_status_changes(changes)
+
+
+@receiver(purchase_request_status_changed)
+def record_status_history(sender, changes, **kwargs):
+    status_history.record(changes)
+
+
+def _bump_parties(items):
+    scopes = set()
+    for item in items:
+        scopes.update((user_scope(item.buyer_id), user_scope(item.seller_id)))
+    bump_versions(*scopes)
+
+
+# User fields embedded in the purchase requests of their counterparties, see SellerSerializer and BuyerSerializer
+COUNTERPARTY_FIELDS = {'name', 'email'}
+
+
+@receiver(post_save, sender=User)
+def invalidate_counterparties_on_user_save(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """
+        Invalidate the cached purchase requests of everyone who traded with the saved user, since they
+        embed the user's details. Saves of other fields only, like last_login, are skipped.
+    """
+    if raw or created or (update_fields is not None and not COUNTERPARTY_FIELDS.intersection(update_fields)):
+        return
+    requests = PurchaseRequestWithArchive.objects.order_by()
+    counterparties = requests.filter(seller=instance.pk).values_list('buyer_id', flat=True).union(
+        requests.filter(buyer=instance.pk).values_list('seller_id', flat=True))
+    bump_versions(*(user_scope(user_id) for user_id in counterparties if user_id is not None))
+
+
+@receiver(purchase_requests_created)
+def invalidate_cache_on_create(sender, requests, **kwargs):
+    _bump_parties(requests)
+
+
+@receiver(purchase_request_status_changed)
+def invalidate_cache_on_status_change(sender, changes, **kwargs):
+    _bump_parties(changes)
+
+
+def _amount(value):
+    # Formatted as in the API: a string with the field's decimal places
+    if value is None:
+        return None
+    places = PurchaseRequest._meta.get_field('total_amount').decimal_places
+    return str(Decimal(str(value)).quantize(Decimal(1).scaleb(-places)))
+
+
+def _event_channels(item):
+    return tuple(user_scope(user_id) for user_id in (item.buyer_id, item.seller_id) if user_id is not None)
+
+
+@receiver(purchase_requests_created)
+def publish_created_requests(sender, requests, **kwargs):
+    publish_on_commit([
+        (_event_channels(request), {
+            'type': 'created', 'id': request.pk, 'buyer_id': request.buyer_id, 'seller_id': request.seller_id,
+            'description': request.description, 'total_amount': _amount(request.total_amount),
+            'status': request.status, 'created_at': request.created_at.isoformat(),
+        })
+        for request in requests
+    ])
+
+
+@receiver(purchase_request_status_changed)
+def publish_status_changes(sender, changes, **kwargs):
+    publish_on_commit([
+        (_event_channels(change), {
+            'type': 'status', 'id': change.request_id, 'buyer_id': change.buyer_id, 'seller_id': change.seller_id,
+            'total_amount': _amount(change.total_amount), 'from_status': change.from_status,
+            'to_status': change.to_status, 'version': change.version,
+        })
+        for change in changes
+    ])
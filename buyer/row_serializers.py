@@ -0,0 +1,86 @@
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import serializers
+
+
+class RowSerializer:
+    """
+        Read-only fast path that builds the exact output of a DRF serializer from ``.values()`` rows.
+
+        The serializer's readable fields are compiled once into a plan of (key, column, converter)
+        entries, nested serializers included, so listing rows skips model instantiation and the
+        per-field DRF machinery. Fields whose representation is the raw database value are copied
+        as is; the others go through the bound field's own ``to_representation``.
+
+        Only plain model fields and nested single-object serializers are supported.
+    """
+    # Fields whose representation of a database value is the value itself
+    IDENTITY_FIELDS = (serializers.IntegerField, serializers.CharField, serializers.BooleanField,
+                       serializers.ChoiceField, serializers.ReadOnlyField, serializers.PrimaryKeyRelatedField)
+
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+        self._plan = None
+        self._columns = None
+
+    @property
+    def columns(self):
+        self._compile()
+        return self._columns
+
+    def values(self, queryset, *extra_columns):
+        """
+            Return ``queryset.values()`` over the columns the serializer needs, plus ``extra_columns``
+            (e.g. the pagination ordering fields).
+        """
+        columns = list(self.columns)
+        columns += [column for column in extra_columns if column not in columns]
+        return queryset.values(*columns)
+
+    def serialize(self, rows):
+        """
+            Return the serialized representation of every row, as ``serializer_class(many=True).data`` would.
+        """
+        self._compile()
+        build, plan = self._build, self._plan
+        return [build(plan, row) for row in rows]
+
+    def _compile(self):
+        if self._plan is None:
+            columns = []
+            self._plan = self._compile_fields(self.serializer_class().fields, '', columns)
+            self._columns = columns
+
+    def _compile_fields(self, fields, prefix, columns):
+        plan = []
+        for field in fields.values():
+            if field.write_only:
+                continue
+            if field.source == '*' or isinstance(field, (serializers.SerializerMethodField,
+                                                         serializers.ListSerializer)):
+                raise ImproperlyConfigured(f'{self.serializer_class.__name__}.{field.field_name} '
+                                           f'cannot be read from values() rows.')
+            column = prefix + '__'.join(field.source_attrs)
+            if column not in columns:
+                columns.append(column)
+            if isinstance(field, serializers.BaseSerializer):
+                nested = self._compile_fields(field.fields, column + '__', columns)
+                plan.append((field.field_name, column, None, nested))
+            elif isinstance(field, self.IDENTITY_FIELDS):
+                plan.append((field.field_name, column, None, None))
+            else:
+                plan.append((field.field_name, column, field.to_representation, None))
+        return plan
+
+    @classmethod
+    def _build(cls, plan, row):
+        data = {}
+        for key, column, convert, nested in plan:
+            value = row[column]
+            if nested is not None:
+                # The column of a nested serializer is the foreign key, None when there is no related row
+                data[key] = None if value is None else cls._build(nested, row)
+            elif convert is None or value is None:
+                data[key] = value
+            else:
+                data[key] = convert(value)
+        return data
@@ -0,0 +1,39 @@
+from rest_framework import serializers
+
+from buyer.pagination import KeysetCursorPagination
+
+
+class PurchaseRequestSearchMixin:
+    """
+        Add a ``?q=`` description search to a purchase request list view.
+
+        Search results are ranked, most relevant first, so the keyset pagination switches to the
+        ``(search_rank, id)`` ordering while a search is active.
+    """
+    search_param = 'q'
+    search_max_length = 200
+    search_ordering = ('-search_rank', '-id')
+
+    def get_search_text(self):
+        text = self.request.query_params.get(self.search_param, '').strip()
+        if len(text) > self.search_max_length:
+            raise serializers.ValidationError({
+                self.search_param: f'Ensure this field has no more than {self.search_max_length} characters.'
+            })
+        return text
+
+    @property
+    def cursor_ordering(self):
+        return self.search_ordering if self.get_search_text() else KeysetCursorPagination.ordering
+
+    @property
+    def cursor_fields(self):
+        """
+            Return the fields of the current keyset ordering, to be selected with the page rows.
+        """
+        return [field.lstrip('-') for field in self.cursor_ordering]
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        text = self.get_search_text()
+        return queryset.search(text) if text else queryset
@@ -1,7 +1,11 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.utils import timezone
 from rest_framework import serializers
 
 from accounts.models import User
-from buyer.models import PurchaseRequest
+from buyer.models import PurchaseRequest, PurchaseRequestStatusHistory
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -65,3 +69,141 @@ class PurchaseRequestSerializer(serializers.ModelSerializer):
                 })
 
         return data
+
+
+class PurchaseRequestStatusHistorySerializer(serializers.ModelSerializer):
+    """
+       Serializer for one entry of the status history of a Purchase Request.
+    """
+
+    class Meta:
+        model = PurchaseRequestStatusHistory
+        fields = ['id', 'from_status', 'to_status', 'changed_by', 'changed_at']
+        read_only_fields = fields
+
+
+class PurchaseRequestBulkItemSerializer(serializers.ModelSerializer):
+    """
+       Serializer for one item of a bulk Purchase Request creation. The seller is taken as a plain id,
+       because the view checks the sellers of the whole batch with a single query.
+    """
+    seller = serializers.IntegerField(source='seller_id', write_only=True)
+
+    class Meta:
+        model = PurchaseRequest
+        fields = ['seller', 'description', 'total_amount']
+
+    def validate(self, data):
+        description = data.get('description')
+        total_amount = data.get('total_amount')
+        if not description:
+            raise serializers.ValidationError({
+                'description': 'Description is required.'
+            })
+        if total_amount is None:
+            raise serializers.ValidationError({
+                'total_amount': 'Total amount is required.'
+            })
+        if total_amount <= 0:
+            raise serializers.ValidationError({
+                'total_amount': 'Total amount must be a positive value.'
+            })
+        return data
+
+
+class PurchaseRequestFilterSerializer(serializers.Serializer):
+    """
+       Serializer for validating the query parameters that narrow down a Purchase Request queryset.
+       ``status`` can be repeated to match several statuses; ``buyer`` and ``seller`` are user ids.
+       ``include_archived`` picks the rows to filter rather than filtering them, see buyer.filters.purchase_requests.
+    """
+    status = serializers.MultipleChoiceField(choices=PurchaseRequest.STATUS_CHOICES, required=False)
+    created_after = serializers.DateTimeField(required=False)
+    created_before = serializers.DateTimeField(required=False)
+    min_amount = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal('0'), required=False)
+    max_amount = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal('0'), required=False)
+    buyer = serializers.IntegerField(min_value=1, required=False)
+    seller = serializers.IntegerField(min_value=1, required=False)
+    include_archived = serializers.BooleanField(required=False, default=False)
+
+    def validate(self, data):
+        created_after = data.get('created_after')
+        created_before = data.get('created_before')
+        if created_after and created_before and created_after > created_before:
+            raise serializers.ValidationError({
+                'created_before': 'created_before must not be earlier than created_after.'
+            })
+        min_amount = data.get('min_amount')
+        max_amount = data.get('max_amount')
+        if min_amount is not None and max_amount is not None and min_amount > max_amount:
+            raise serializers.ValidationError({
+                'max_amount': 'max_amount must not be lower than min_amount.'
+            })
+        return data
+
+    def filter_queryset(self, queryset):
+        """
+            Apply the validated filters to ``queryset``.
+        """
+        data = self.validated_data
+        if data.get('status'):
+            queryset = queryset.filter(status__in=sorted(data['status']))
+        if data.get('created_after'):
+            queryset = queryset.filter(created_at__gte=data['created_after'])
+        if data.get('created_before'):
+            queryset = queryset.filter(created_at__lt=data['created_before'])
+        if data.get('min_amount') is not None:
+            queryset = queryset.filter(total_amount__gte=data['min_amount'])
+        if data.get('max_amount') is not None:
+            queryset = queryset.filter(total_amount__lte=data['max_amount'])
+        if data.get('buyer'):
+            queryset = queryset.filter(buyer_id=data['buyer'])
+        if data.get('seller'):
+            queryset = queryset.filter(seller_id=data['seller'])
+        return queryset
+
+
+class PurchaseRequestExportSerializer(PurchaseRequestFilterSerializer):
+    """
+       Serializer for validating the query parameters of a Purchase Request export.
+    """
+    FORMAT_CHOICES = (('csv', 'csv'),
+                      ('ndjson', 'ndjson'))
+    file_format = serializers.ChoiceField(choices=FORMAT_CHOICES, default='csv')
+
+
+class PurchaseAnalyticsSerializer(serializers.Serializer):
+    """
+       Serializer for validating the query parameters of the purchase analytics endpoints.
+       ``start`` defaults to 29 days before ``end``, which defaults to today.
+    """
+    INTERVAL_CHOICES = (('day', 'day'),
+                        ('week', 'week'),
+                        ('month', 'month'))
+    # Longest range per interval, so a request can't ask for an unbounded series
+    MAX_DAYS = {'day': 366, 'week': 366 * 2, 'month': 366 * 5}
+    # Dates whose periods, and default start, stay within the dates Python can represent
+    MIN_DATE, MAX_DATE = date(1, 2, 1), date(9999, 10, 31)
+
+    interval = serializers.ChoiceField(choices=INTERVAL_CHOICES, default='day')
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+
+    def validate(self, data):
+        for name in ('start', 'end'):
+            if name in data and not self.MIN_DATE <= data[name] <= self.MAX_DATE:
+                raise serializers.ValidationError({
+                    name: f'{name} must be between {self.MIN_DATE} and {self.MAX_DATE}.'
+                })
+        data['end'] = data.get('end') or timezone.localdate()
+        data['start'] = data.get('start') or data['end'] - timedelta(days=29)
+        if data['start'] > data['end']:
+            raise serializers.ValidationError({
+                'end': 'end must not be earlier than start.'
+            })
+        max_days = self.MAX_DAYS[data['interval']]
+        if (data['end'] - data['start']).days >= max_days:
+            raise serializers.ValidationError({
+                'start': f'At most {max_days} days can be requested with interval {data["interval"]}.'
+            })
+        return data
@@ -0,0 +1,18 @@
+from collections import namedtuple
+
+from django.dispatch import Signal
+
+# A single status transition of a purchase request, as passed to ``purchase_request_status_changed``.
+# ``version`` is the version of the request after the change, when known.
+StatusChange = namedtuple('StatusChange', [
+    'request_id', 'buyer_id', 'seller_id', 'total_amount', 'created_at',
+    'from_status', 'to_status', 'changed_by_id', 'version',
+], defaults=(None,))
+
+# Sent inside the write transaction once purchase requests have been inserted.
+# Receivers get ``requests``, a list of PurchaseRequest instances.
+purchase_requests_created = Signal()
+
+# Sent inside the write transaction once purchase request statuses have been updated.
+# Receivers get ``changes``, a list of StatusChange tuples.
+purchase_request_status_changed = Signal()
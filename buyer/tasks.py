@@ -0,0 +1,20 @@
+from django.core.mail import send_mass_mail
+
+from buyer.models import PurchaseRequest
+from tasks.queue import task
+
+
+@task()
+def notify_sellers_of_purchase_requests(purchase_request_ids):
+    """
+        Email the seller of every new purchase request.
+    """
+    purchase_requests = PurchaseRequest.objects.filter(id__in=purchase_request_ids, seller__isnull=False) \
+        .select_related('buyer', 'seller')
+    send_mass_mail([
+        (f'New Purchase Request #{purchase_request.id}',
+         f'{purchase_request.buyer.name} sent you a Purchase Request of {purchase_request.total_amount}: '
+         f'{purchase_request.description}',
+         None, [purchase_request.seller.email])
+        for purchase_request in purchase_requests
+    ])
@@ -1,13 +1,46 @@
+import base64
+import csv
+import json
+from decimal import Decimal
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+from unittest import mock, skipIf, skipUnless
+
+from asgiref.sync import sync_to_async
+from django.contrib import admin
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError, connection
+from django.test import AsyncClient, override_settings
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APITestCase
+from rest_framework.throttling import BaseThrottle
 from django.urls import reverse
+from django.utils import timezone
 from accounts.models import User
-from buyer.models import PurchaseRequest
+from accounts.tokens import get_token_version
+from accounts.views import get_tokens_for_user
+from buyer import partitions
+from buyer.admin import PurchaseRequestAdmin
+from buyer.async_views import AsyncBuyerDashboardView, AsyncPurchaseRequestListView
+from buyer.history import status_history
+from buyer.models import ArchivedPurchaseRequest, PurchaseRequest, PurchaseRequestDailyStats, PurchaseRequestStats, \
+    PurchaseRequestStatusHistory
+from buyer.row_serializers import RowSerializer
+from buyer.serializers import PurchaseRequestSerializer, UserSerializer
+from buyer.views import BuyerDashboardView
+from core.async_api import AsyncAPIView
+from tasks.models import Task
 from rest_framework_simplejwt.tokens import AccessToken
 
 
 class BuyersAPITestCase(APITestCase):
     def setUp(self):
+        cache.clear()
+
         # Create a superadmin user
         self.superadmin_user = User.objects.create_user(
             email='superadmin@example.com',
@@ -39,8 +72,8 @@ class BuyersAPITestCase(APITestCase):
         self.seller_user.save()
 
         # Create an access token for the superadmin user
-        self.superadmin_token = AccessToken.for_user(self.superadmin_user)
-        self.buyer_token = AccessToken.for_user(self.buyer_user)
+        self.superadmin_token = get_tokens_for_user(self.superadmin_user)['access']
+        self.buyer_token = get_tokens_for_user(self.buyer_user)['access']
 
         # Create a purchase request for testing
         self.purchase_request = PurchaseRequest.objects.create(
@@ -118,6 +151,193 @@ class BuyersAPITestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertIn('Purchase Request created successfully', response.data['message'])
 
+    def test_create_purchase_request_queues_seller_notification(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.buyer_token}')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('buyer-purchase-request'), data={
+                'seller': self.seller_user.id, 'description': 'Notify', 'total_amount': 15
+            })
+        task = Task.objects.get()
+        self.assertEqual((task.name, task.payload),
+                         ('buyer.tasks.notify_sellers_of_purchase_requests',
+                          {'purchase_request_ids': [response.data['data']['id']]}))
+
+    def test_list_purchase_requests_paginated(self):
+        other_buyer = User.objects.create_user(email='other@example.com', name='Other Buyer',
+                                               password='password123', role='Buyer')
+        PurchaseRequest.objects.create(seller=self.seller_user, buyer=other_buyer, description='Not mine',
+                                       total_amount=10.00)
+        for index in range(2):
+            PurchaseRequest.objects.create(seller=self.seller_user, buyer=self.buyer_user,
+                                           description=f'Purchase {index}', total_amount=10.00)
+        url = reverse('buyer-purchase-request')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.buyer_token}')
+
+        response = self.client.get(url, {'page_size': 2})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('Purchase Request retrieved successfully', response.data['message'])
+        self.assertEqual(len(response.data['data']), 2)
+        self.assertIsNone(response.data['previous'])
+        self.assertIsNotNone(response.data['next'])
+
+        response = self.client.get(response.data['next'])
+
+        self.assertEqual([item['id'] for item in response.data['data']], [self.purchase_request.id])
+        self.assertIsNone(response.data['next'])
+        self.assertIsNotNone(response.data['previous'])
+
+    def test_list_purchase_requests_cached_until_write(self):
+        url = reverse('buyer-purchase-request')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.buyer_token}')
+
+        self.client.get(url)
+        with self.assertNumQueries(0):  # the token claims authenticate the user
+            response = self.client.get(url)
+        self.assertEqual(len(response.data['data']), 1)
+
+        self.client.post(url, data={'seller': self.seller_user.id, 'description': 'Another', 'total_amount': 5})
+        response = self.client.get(url)
+        self.assertEqual(len(response.data['data']), 2)
+
+    def test_list_purchase_requests_cache_invalidated_on_seller_rename(self):
+        url = reverse('buyer-purchase-request')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.buyer_token}')
+        self.assertEqual(self.client.get(url).data['data'][0]['seller_details']['name'], self.seller_user.name)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.superadmin_token}')
+        response = self.client.patch(reverse('seller-retrieve-update-delete', kwargs={'pk': self.seller_user.pk}),
+                                     data={'name': 'Renamed Seller'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.buyer_token}')
+        self.assertEqual(self.client.get(url).data['data'][0]['seller_details']['name'], 'Renamed Seller')
+
+    def test_search_purchase_requests(self):
+        PurchaseRequest.objects.create(seller=self.seller_user, buyer=self.buyer_user, description='Copper cable reel',
+                                       total_amount=5)
+        PurchaseRequest.objects.create(seller=self.seller_user, buyer=self.buyer_user, description='Steel pipe',
+                                       total_amount=5)
+        url = reverse('buyer-purchase-request')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.buyer_token}')
+
+        response = self.client.get(url, {'q': 'copper cable'})
+        self.assertEqual([item['description'] for item in response.data['data']], ['Copper cable reel'])
+
+        response = self.client.get(url, {'q': 'x' * 201})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_search_purchase_requests_cursor_pages(self):
+        PurchaseRequest.objects.bulk_create([
+            PurchaseRequest(seller=self.seller_user, buyer=self.buyer_user, description=f'Copper order {index}',
+                            total_amount=5)
+            for index in range(5)
+        ])
+        url = reverse('buyer-purchase-request')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.buyer_token}')
+
+        ids = []
+        response = self.client.get(url, {'q': 'copper', 'page_size': 2})
+        while True:
+            ids += [item['id'] for item in response.data['data']]
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+        self.assertEqual(sorted(ids), sorted(PurchaseRequest.objects.search('copper').values_list('id', flat=True)))
+        self.assertEqual(len(ids), 5)
+
+    def test_filter_purchase_requests(self):
+        other_seller = User.objects.create_user(email='other@example.com', name='Other Seller',
+                                                password='password123', role='Seller')
+        approved = PurchaseRequest.objects.create(seller=other_seller, buyer=self.buyer_user, description='Big',
+                                                  total_amount=900, status='Approved')
+        PurchaseRequest.objects.create(seller=other_seller, buyer=self.buyer_user, description='Small',
+                                       total_amount=5, status='Rejected')
+        url = reverse('buyer-purchase-request')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.buyer_token}')
+
+        def ids(params):
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return sorted(item['id'] for item in response.data['data'])
+
+        self.assertEqual(len(ids({'seller': other_seller.id})), 2)
+        self.assertEqual(ids({'status': ['Approved', 'In-Process'], 'min_amount': '50'}),
+                         sorted([self.purchase_request.id, approved.id]))
+        self.assertEqual(ids({'seller': other_seller.id, 'min_amount': '10', 'max_amount': '1000'}), [approved.id])
+        self.assertEqual(ids({'created_after': '2000-01-01T00:00:00Z', 'created_before': '2000-01-02T00:00:00Z'}),
+                         [])
+
+    def test_filter_purchase_requests_strict_validation(self):
+        url = reverse('buyer-purchase-request')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.buyer_token}')
+        for params in ({'status': 'Pending'}, {'min_amount': 'ten'}, {'min_amount': '20', 'max_amount': '10'},
+                       {'seller': '0'}, {'created_after': 'yesterday'}, {'stauts': 'Approved'}):
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, msg=params)
+
+    def test_kpi_cache_invalidated_for_counterparty(self):
+        seller_token = AccessToken.for_user(self.seller_user)
+        url = reverse('seller-kpi-card')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {seller_token}')
+        self.assertEqual(self.client.get(url).data['data']['total_purchases'], 1)
+
+        PurchaseRequest.objects.create(seller=self.seller_user, buyer=self.buyer_user, description='Another',
+                                       total_amount=5)
+
+        self.assertEqual(self.client.get(url).data['data']['total_purchases'], 2)
+
+    def test_buyer_list_cache_invalidated_on_soft_delete(self):
+        list_url = reverse('buyer-list')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.superadmin_token}')
+        self.assertEqual(len(self.client.get(list_url).data['data']), 1)
+
+        self.client.delete(reverse('buyer-retrieve-update-delete', kwargs={'pk': self.buyer_user.pk}))
+
+        self.assertEqual(len(self.client.get(list_url).data['data']), 0)
+        response = self.client.get(reverse('cache-stats'))
+        self.assertEqual((response.data['hits'], response.data['misses']), (0, 2))
+
+    def test_kpi_card_conditional_get(self):
+        url = reverse('buyer-kpi-card')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.buyer_token}')
+        response = self.client.get(url)
+        etag, last_modified = response['ETag'], response['Last-Modified']
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+
+        with self.assertNumQueries(0):  # the token claims authenticate the user
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        PurchaseRequest.objects.create(seller=self.seller_user, buyer=self.buyer_user, description='Another',
+                                       total_amount=5)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data['data']['total_purchases'], 2)
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_list_conditional_get_after_seller_update(self):
+        url = reverse('buyer-purchase-request')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.buyer_token}')
+        response = self.client.get(url)
+        etag, last_modified = response['ETag'], response['Last-Modified']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.seller_user.email = 'renamed.seller@example.com'
+        self.seller_user.save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['data'][0]['seller_details']['email'], 'renamed.seller@example.com')
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
     def test_create_purchase_request_validation_errors(self):
         url = reverse('buyer-purchase-request')
         self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.buyer_token}')  # Use stored buyer token
@@ -148,6 +368,125 @@ class BuyersAPITestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertTrue(any('Total amount is required.' in str(err) for err in response.data.get('total_amount', [])))
 
+    def test_bulk_create_purchase_requests(self):
+        url = reverse('buyer-purchase-request-bulk')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.buyer_token}')
+        items = [{'seller': self.seller_user.id, 'description': f'Bulk {index}', 'total_amount': '10.00'}
+                 for index in range(50)]
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(url, data=items, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data['data']['created']), 50)
+        self.assertEqual(response.data['data']['errors'], [])
+        inserts = [query for query in context.captured_queries
+                   if query['sql'].startswith('INSERT INTO "buyer_purchaserequest"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(PurchaseRequest.objects.filter(buyer=self.buyer_user).count(), 51)
+        kpi = PurchaseRequestStats.objects.kpi_for(self.buyer_user, 'buyer')
+        self.assertEqual((kpi['total_purchases'], kpi['total_amount']), (51, Decimal('600.00')))
+
+    def test_bulk_create_rejects_whole_batch_on_error(self):
+        url = reverse('buyer-purchase-request-bulk')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.buyer_token}')
+        items = [
+            {'seller': self.seller_user.id, 'description': 'Valid', 'total_amount': '10.00'},
+            {'seller': self.buyer_user.id, 'description': 'Not a seller', 'total_amount': '10.00'},
+            {'seller': self.seller_user.id, 'description': '', 'total_amount': '10.00'},
+        ]
+
+        response = self.client.post(url, data=items, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([error['index'] for error in response.data['data']['errors']], [1, 2])
+        self.assertIn('seller', response.data['data']['errors'][0]['errors'])
+        self.assertEqual(PurchaseRequest.objects.count(), 1)
+
+    def test_bulk_create_partial_success(self):
+        url = reverse('buyer-purchase-request-bulk') + '?partial=true'
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.buyer_token}')
+        items = [
+            {'seller': self.seller_user.id, 'description': 'Valid', 'total_amount': '10.00'},
+            {'seller': self.seller_user.id, 'description': 'Negative', 'total_amount': '-1.00'},
+        ]
+
+        response = self.client.post(url, data=items, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([item['index'] for item in response.data['data']['created']], [0])
+        self.assertEqual(response.data['data']['errors'][0]['index'], 1)
+        self.assertEqual(PurchaseRequest.objects.count(), 2)
+
+    def test_export_purchase_requests_csv(self):
+        PurchaseRequest.objects.create(seller=self.seller_user, buyer=self.buyer_user, description='Second, "quoted"',
+                                       total_amount=20.00, status='Approved')
+        url = reverse('buyer-purchase-request-export')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.buyer_token}')
+
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        rows = list(csv.reader(b''.join(response.streaming_content).decode().splitlines()))
+        self.assertEqual(rows[0][:3], ['id', 'buyer_id', 'buyer_name'])
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[2][7], 'Second, "quoted"')
+        self.assertEqual(rows[2][8], '20.00')
+
+    def test_export_escapes_formulas(self):
+        PurchaseRequest.objects.create(seller=self.seller_user, buyer=self.buyer_user, description='=1+1',
+                                       total_amount=20.00)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.buyer_token}')
+
+        response = self.client.get(reverse('buyer-purchase-request-export'))
+
+        rows = list(csv.reader(b''.join(response.streaming_content).decode().splitlines()))
+        self.assertEqual(rows[2][7], "'=1+1")
+
+    async def test_export_streams_asynchronously_under_asgi(self):
+        url = reverse('buyer-purchase-request-export')
+        response = await AsyncClient().get(url, headers={'Authorization': f'Bearer {self.buyer_token}'})
+
+        self.assertTrue(response.is_async)
+        content = b''.join([chunk async for chunk in response.streaming_content])
+        expected = await sync_to_async(lambda: b''.join(
+            self.client.get(url, HTTP_AUTHORIZATION=f'Bearer {self.buyer_token}').streaming_content))()
+        self.assertEqual(content, expected)
+
+    def test_export_purchase_requests_ndjson_filtered(self):
+        PurchaseRequest.objects.create(seller=self.seller_user, buyer=self.buyer_user, description='Approved',
+                                       total_amount=20.00, status='Approved')
+        url = reverse('buyer-purchase-request-export')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.buyer_token}')
+
+        response = self.client.get(url, {'file_format': 'ndjson', 'status': ['Approved', 'Rejected']})
+
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 1)
+        row = json.loads(lines[0])
+        self.assertEqual((row['status'], row['total_amount'], row['seller_email']),
+                         ('Approved', '20.00', self.seller_user.email))
+
+    def test_export_invalid_filters(self):
+        url = reverse('buyer-purchase-request-export')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.buyer_token}')
+
+        response = self.client.get(url, {'file_format': 'xml', 'status': 'Unknown', 'created_after': 'yesterday'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(set(response.data), {'file_format', 'status', 'created_after'})
+
+    def test_export_all_purchase_requests_superadmin_only(self):
+        url = reverse('purchase-request-export-all')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.buyer_token}')
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.superadmin_token}')
+        response = self.client.get(url, {'file_format': 'ndjson'})
+        self.assertEqual(len(b''.join(response.streaming_content).splitlines()), 1)
+
     def test_buyer_dashboard(self):
         url = reverse('buyer-kpi-card')
         self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.buyer_token}')  # Use stored buyer token
@@ -157,3 +496,583 @@ class BuyersAPITestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn('Buyer KPI dashboard retrieved successfully', response.data['message'])
         self.assertIn('total_purchases', response.data['data'])
+
+    def test_buyer_dashboard_counts_and_amounts(self):
+        PurchaseRequest.objects.create(seller=self.seller_user, buyer=self.buyer_user, description='Approved',
+                                       total_amount=50.00, status='Approved')
+        PurchaseRequest.objects.create(seller=self.seller_user, buyer=self.buyer_user, description='Approved',
+                                       total_amount=25.50, status='Approved')
+        url = reverse('buyer-kpi-card')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.buyer_token}')
+
+        response = self.client.get(url)
+
+        data = response.data['data']
+        self.assertEqual((data['total_purchases'], data['in_process'], data['approved'], data['rejected']),
+                         (3, 1, 2, 0))
+        self.assertEqual(data['total_amount'], Decimal('175.50'))
+        self.assertEqual(data['in_process_amount'], Decimal('100.00'))
+        self.assertEqual(data['approved_amount'], Decimal('75.50'))
+        self.assertEqual(data['rejected_amount'], Decimal('0.00'))
+
+    def test_buyer_analytics_daily(self):
+        approved = PurchaseRequest.objects.create(seller=self.seller_user, buyer=self.buyer_user,
+                                                  description='Approved', total_amount=50.00)
+        approved.status = 'Approved'
+        approved.save()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.buyer_token}')
+
+        response = self.client.get(reverse('buyer-analytics'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        series = response.data['data']['series']
+        self.assertEqual(len(series), 30)
+        today = series[-1]
+        self.assertEqual(today['period'], timezone.localdate())
+        self.assertEqual((today['total_purchases'], today['in_process'], today['approved']), (2, 1, 1))
+        self.assertEqual((today['total_amount'], today['approved_amount']), (Decimal('150.00'), Decimal('50.00')))
+        self.assertEqual(series[0]['total_purchases'], 0)
+
+    def test_buyer_analytics_default_range_follows_the_date(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.buyer_token}')
+        url = reverse('buyer-analytics')
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        tomorrow = timezone.localdate() + timedelta(days=1)
+        with mock.patch('django.utils.timezone.localdate', return_value=tomorrow):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['data']['series'][-1]['period'], tomorrow)
+
+    def test_buyer_analytics_invalid_params(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.buyer_token}')
+        url = reverse('buyer-analytics')
+        self.assertEqual(self.client.get(url, {'interval': 'year'}).status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(url, {'start': '2024-03-01', 'end': '2024-02-01'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(url, {'start': '2020-01-01', 'end': '2024-01-01'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        # Periods past the last representable date
+        for params in ({'interval': 'month', 'start': '9999-12-01', 'end': '9999-12-31'}, {'end': '0001-01-10'}):
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, msg=params)
+        response = self.client.get(url, {'interval': 'month', 'start': '9999-09-01', 'end': '9999-10-31'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_purchase_request_history(self):
+        url = reverse('purchase-request-history', kwargs={'pk': self.purchase_request.id})
+        seller_token = AccessToken.for_user(self.seller_user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {seller_token}')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(reverse('seller-sale-request-status-update', kwargs={'pk': self.purchase_request.id}),
+                              {'status': 'Approved'})
+        self.assertEqual(PurchaseRequestStatusHistory.objects.count(), 0)  # buffered
+        self.assertEqual(status_history.flush(), 1)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.buyer_token}')
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        [entry] = response.data['data']
+        self.assertEqual((entry['from_status'], entry['to_status'], entry['changed_by']),
+                         ('In-Process', 'Approved', self.seller_user.id))
+        self.assertIsNone(response.data['next'])
+
+    def test_purchase_request_history_of_others_not_found(self):
+        other_buyer = User.objects.create_user(email='other@example.com', name='Other Buyer',
+                                               password='password123', role='Buyer')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(other_buyer)}')
+        response = self.client.get(reverse('purchase-request-history', kwargs={'pk': self.purchase_request.id}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_purchase_request_history_invalid_cursor(self):
+        url = reverse('purchase-request-history', kwargs={'pk': self.purchase_request.id})
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.buyer_token}')
+        cursor = base64.urlsafe_b64encode(json.dumps({'p': ['yesterday', 1]}).encode()).decode()
+        response = self.client.get(url, {'cursor': cursor})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class StatusHistoryWriterTests(APITestCase):
+
+    def setUp(self):
+        self.buyer_user = User.objects.create_user(email='buyer@example.com', name='Buyer', password='password123',
+                                                   role='Buyer')
+        self.seller_user = User.objects.create_user(email='seller@example.com', name='Seller',
+                                                    password='password123', role='Seller')
+        self.requests = PurchaseRequest.objects.bulk_create([
+            PurchaseRequest(buyer=self.buyer_user, seller=self.seller_user, description=f'Purchase {index}',
+                            total_amount=10)
+            for index in range(3)
+        ])
+        self.addCleanup(status_history.flush)
+
+    def approve(self, purchase_request):
+        return PurchaseRequest.objects.filter(pk=purchase_request.pk).set_status('Approved', self.seller_user.id)
+
+    @override_settings(STATUS_HISTORY_BATCH_SIZE=2)
+    def test_flushes_in_batches_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            status_history.record(self.approve(self.requests[0]))
+        self.assertEqual((status_history.pending(), PurchaseRequestStatusHistory.objects.count()), (1, 0))
+
+        changes = self.approve(self.requests[1])
+        with self.assertNumQueries(1), self.captureOnCommitCallbacks(execute=True):  # one INSERT for the batch
+            status_history.record(changes)
+        self.assertEqual((status_history.pending(), PurchaseRequestStatusHistory.objects.count()), (0, 2))
+
+    def test_rolled_back_changes_are_not_recorded(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            status_history.record(self.approve(self.requests[2]))
+        # The transaction never commits, so its callbacks never run
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(status_history.pending(), 0)
+
+    @override_settings(STATUS_HISTORY_BATCH_SIZE=1)
+    def test_failed_batches_are_kept(self):
+        changes = self.approve(self.requests[0])
+        with mock.patch.object(PurchaseRequestStatusHistory.objects, 'bulk_create', side_effect=DatabaseError), \
+                self.assertLogs('buyer.history', 'ERROR'), self.captureOnCommitCallbacks(execute=True):
+            status_history.record(changes)
+        self.assertEqual((status_history.pending(), PurchaseRequestStatusHistory.objects.count()), (1, 0))
+
+        self.assertEqual(status_history.flush(), 1)
+        self.assertEqual((status_history.pending(), PurchaseRequestStatusHistory.objects.count()), (0, 1))
+
+
+class DenyThrottle(BaseThrottle):
+
+    def allow_request(self, request, view):
+        return False
+
+
+@override_settings(ASGI_ROOT_URLCONF='core.asgi_urls')
+class AsyncBuyerViewTests(APITestCase):
+    """
+    Under ASGI the hot GET endpoints are served by native async views, with the same responses.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.buyer_user = User.objects.create_user(email='buyer@example.com', name='Buyer', password='password123',
+                                                   role='Buyer')
+        self.seller_user = User.objects.create_user(email='seller@example.com', name='Seller',
+                                                    password='password123', role='Seller')
+        PurchaseRequest.objects.bulk_create([
+            PurchaseRequest(buyer=self.buyer_user, seller=self.seller_user, description=f'Purchase {index}',
+                            total_amount=10 + index)
+            for index in range(3)
+        ])
+        self.async_client = AsyncClient()
+        token = AccessToken.for_user(self.buyer_user)
+        self.headers = {'Authorization': f'Bearer {token}'}
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    async def test_same_responses_as_sync_views(self):
+        cases = [
+            (reverse('buyer-kpi-card'), AsyncBuyerDashboardView),
+            (reverse('buyer-purchase-request') + '?page_size=2', AsyncPurchaseRequestListView),
+            (reverse('buyer-purchase-request') + '?q=purchase&min_amount=11', AsyncPurchaseRequestListView),
+        ]
+        for url, view_class in cases:
+            response = await self.async_client.get(url, headers=self.headers)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertIs(response.resolver_match.func.view_class, view_class)
+            await sync_to_async(cache.clear)()
+            expected = await sync_to_async(self.client.get)(url)
+            self.assertEqual(response.json(), json.loads(expected.content))
+
+    async def test_cursor_pages(self):
+        url = reverse('buyer-purchase-request') + '?page_size=2'
+        first = (await self.async_client.get(url, headers=self.headers)).json()
+        second = (await self.async_client.get(first['next'], headers=self.headers)).json()
+        self.assertIsNone(second['next'])
+        self.assertEqual(len(first['data']) + len(second['data']), 3)
+
+    async def test_conditional_get(self):
+        url = reverse('buyer-kpi-card')
+        response = await self.async_client.get(url, headers=self.headers)
+        response = await self.async_client.get(url, headers={**self.headers, 'If-None-Match': response['ETag']})
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    async def test_authentication_and_permissions(self):
+        response = await AsyncClient().get(reverse('buyer-kpi-card'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        seller_token = await sync_to_async(AccessToken.for_user)(self.seller_user)
+        response = await AsyncClient().get(reverse('buyer-kpi-card'),
+                                           headers={'Authorization': f'Bearer {seller_token}'})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    async def test_configured_authentication_class(self):
+        token = (await sync_to_async(get_tokens_for_user)(self.buyer_user))['access']
+        await User.objects.filter(pk=self.buyer_user.pk).aupdate(is_active=False)
+        # The claims are trusted until the token is revoked, the database is the source of truth otherwise
+        response = await self.async_client.get(reverse('buyer-kpi-card'), headers={'Authorization': f'Bearer {token}'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        with override_settings(REST_FRAMEWORK={
+            'DEFAULT_AUTHENTICATION_CLASSES': ('accounts.authentication.CachedJWTAuthentication',),
+        }):
+            response = await self.async_client.get(reverse('buyer-kpi-card'),
+                                                   headers={'Authorization': f'Bearer {token}'})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_throttles_and_format(self):
+        with mock.patch.object(BuyerDashboardView, 'throttle_classes', [DenyThrottle]):
+            response = await self.async_client.get(reverse('buyer-kpi-card'), headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        # Rendered as JSON only
+        response = await self.async_client.get(reverse('buyer-kpi-card'), {'format': 'api'}, headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_aget_required(self):
+        with self.assertRaises(ImproperlyConfigured):
+            type('NoAget', (AsyncAPIView,), {'view_class': BuyerDashboardView}).as_view()
+
+    async def test_other_methods_use_sync_view(self):
+        response = await self.async_client.post(reverse('buyer-purchase-request'), {
+            'seller': self.seller_user.id, 'description': 'Async', 'total_amount': '5.00'
+        }, content_type='application/json', headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(await PurchaseRequest.objects.filter(buyer=self.buyer_user).acount(), 4)
+
+
+class PurchaseRequestQueryCountTests(APITestCase):
+    """
+    The purchase request lists must fetch related users in a constant number of queries.
+    """
+    # The token claims authenticate the user, one query selects the page with its related users.
+    expected_queries = 1
+
+    def setUp(self):
+        self.buyer_user = User.objects.create_user(email='buyer@example.com', name='Buyer', password='password123',
+                                                   role='Buyer')
+        self.buyer_token = get_tokens_for_user(self.buyer_user)['access']
+
+    def test_buyer_list_query_count(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.buyer_token}')
+        created = 0
+        for rows in (1, 100, 1000):
+            sellers = User.objects.bulk_create([
+                User(email=f'seller{index}@example.com', name=f'Seller {index}', role='Seller')
+                for index in range(created, rows)
+            ])
+            PurchaseRequest.objects.bulk_create([
+                PurchaseRequest(buyer=self.buyer_user, seller=seller, description='Purchase', total_amount=1)
+                for seller in sellers
+            ])
+            created = rows
+            cache.clear()
+            # Only the first request after a cache flush reads the token version
+            get_token_version(self.buyer_user.id)
+            with self.subTest(rows=rows), self.assertNumQueries(self.expected_queries):
+                response = self.client.get(reverse('buyer-purchase-request'), {'page_size': rows})
+            self.assertEqual(len(response.data['data']), rows)
+            self.assertEqual(response.data['data'][-1]['seller_details']['name'], 'Seller 0')
+
+
+class RowSerializerTests(APITestCase):
+    """
+    The values() fast path must render exactly like the DRF serializers it replaces.
+    """
+
+    def setUp(self):
+        self.buyer_user = User.objects.create_user(email='buyer@example.com', name='Buyer', password='password123',
+                                                   role='Buyer')
+        self.seller_user = User.objects.create_user(email='seller@example.com', name='Seller',
+                                                    password='password123', role='Seller')
+        PurchaseRequest.objects.create(buyer=self.buyer_user, seller=self.seller_user, description='Purchase',
+                                       total_amount=Decimal('12.5'), status='Approved')
+        PurchaseRequest.objects.create(buyer=self.buyer_user, seller=None, description=None, total_amount=None)
+
+    def assertSameOutput(self, serializer_class, queryset):
+        expected = JSONRenderer().render(serializer_class(queryset, many=True).data)
+        rows = RowSerializer(serializer_class)
+        self.assertEqual(JSONRenderer().render(rows.serialize(rows.values(queryset))), expected)
+
+    def test_user_serializer(self):
+        self.assertSameOutput(UserSerializer, User.objects.order_by('id'))
+
+    def test_purchase_request_serializer(self):
+        self.assertSameOutput(PurchaseRequestSerializer, PurchaseRequest.objects.order_by('id'))
+
+
+class RebuildPurchaseStatsCommandTests(APITestCase):
+
+    def setUp(self):
+        self.buyer_user = User.objects.create_user(email='buyer@example.com', name='Buyer', password='password123',
+                                                   role='Buyer')
+        self.seller_user = User.objects.create_user(email='seller@example.com', name='Seller',
+                                                    password='password123', role='Seller')
+        PurchaseRequest.objects.create(buyer=self.buyer_user, seller=self.seller_user, description='Purchase',
+                                       total_amount=10)
+
+    def test_no_drift(self):
+        out = StringIO()
+        call_command('rebuild_purchase_stats', '--check', stdout=out)
+        self.assertIn('Checked 2 stats rows, 0 with drift.', out.getvalue())
+
+    def test_admin_cannot_edit_counted_fields(self):
+        model_admin = PurchaseRequestAdmin(PurchaseRequest, admin.site)
+        purchase_request = PurchaseRequest.objects.get()
+        self.assertEqual(model_admin.get_readonly_fields(None), ())
+        self.assertEqual(set(model_admin.get_readonly_fields(None, purchase_request)),
+                         {'buyer', 'seller', 'total_amount'})
+        self.assertFalse(model_admin.has_delete_permission(None, purchase_request))
+
+    def test_rebuild_repairs_drift(self):
+        # bulk_create bypasses the counters
+        PurchaseRequest.objects.bulk_create([PurchaseRequest(buyer=self.buyer_user, seller=self.seller_user,
+                                                             description='Bulk', total_amount=5)])
+        out = StringIO()
+        call_command('rebuild_purchase_stats', stdout=out)
+        self.assertIn('buyer %s: total_purchases 1 != 2' % self.buyer_user.id, out.getvalue())
+        self.assertIn('Rebuilt 2 stats rows, 2 with drift.', out.getvalue())
+        kpi = PurchaseRequestStats.objects.kpi_for(self.seller_user, 'seller')
+        self.assertEqual((kpi['total_purchases'], kpi['total_amount']), (2, Decimal('15.00')))
+
+
+class RebuildPurchaseDailyStatsCommandTests(APITestCase):
+
+    def setUp(self):
+        self.buyer_user = User.objects.create_user(email='buyer@example.com', name='Buyer', password='password123',
+                                                   role='Buyer')
+        self.seller_user = User.objects.create_user(email='seller@example.com', name='Seller',
+                                                    password='password123', role='Seller')
+        PurchaseRequest.objects.bulk_create([
+            PurchaseRequest(buyer=self.buyer_user, seller=self.seller_user, description=f'Purchase {day}',
+                            total_amount=10, status=request_status)
+            for day, request_status in ((1, 'In-Process'), (6, 'Approved'), (20, 'Rejected'), (40, 'Approved'))
+        ])
+        # Spread the requests over January and February 2024
+        for request in PurchaseRequest.objects.all():
+            day = int(request.description.split()[1])
+            PurchaseRequest.objects.filter(pk=request.pk).update(
+                created_at=datetime(2024, 1, 1, 12, tzinfo=dt_timezone.utc) + timedelta(days=day - 1))
+
+    def test_backfill_weekly_and_monthly_series(self):
+        out = StringIO()
+        call_command('rebuild_purchase_daily_stats', stdout=out)
+        self.assertIn('Rebuilt 8 daily stats rows for all days.', out.getvalue())
+
+        months = PurchaseRequestDailyStats.objects.series(self.seller_user, 'seller', 'month',
+                                                          date(2024, 1, 15), date(2024, 3, 2))
+        self.assertEqual([(month['period'], month['total_purchases'], month['approved']) for month in months],
+                         [(date(2024, 1, 1), 3, 1), (date(2024, 2, 1), 1, 1), (date(2024, 3, 1), 0, 0)])
+        weeks = PurchaseRequestDailyStats.objects.series(self.buyer_user, 'buyer', 'week',
+                                                         date(2024, 1, 3), date(2024, 1, 10))
+        self.assertEqual([(week['period'], week['total_purchases']) for week in weeks],
+                         [(date(2024, 1, 1), 2), (date(2024, 1, 8), 0)])
+
+    def test_backfill_since(self):
+        call_command('rebuild_purchase_daily_stats', stdout=StringIO())
+        PurchaseRequestDailyStats.objects.filter(day=date(2024, 2, 9)).delete()
+        PurchaseRequestDailyStats.objects.filter(day=date(2024, 1, 1)).update(count=5)
+
+        call_command('rebuild_purchase_daily_stats', '--since', '2024-02-01', stdout=StringIO())
+
+        self.assertEqual(PurchaseRequestDailyStats.objects.filter(day=date(2024, 2, 9)).count(), 2)
+        self.assertEqual(PurchaseRequestDailyStats.objects.get(side='buyer', day=date(2024, 1, 1)).count, 5)
+
+
+class ArchivePurchaseRequestsCommandTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.buyer_user = User.objects.create_user(email='buyer@example.com', name='Buyer', password='password123',
+                                                   role='Buyer')
+        self.seller_user = User.objects.create_user(email='seller@example.com', name='Seller',
+                                                    password='password123', role='Seller')
+        self.requests = {}
+        for name, request_status, age in (('old approved', 'Approved', 200), ('old rejected', 'Rejected', 300),
+                                          ('old in process', 'In-Process', 400), ('recent approved', 'Approved', 10)):
+            request = PurchaseRequest.objects.create(buyer=self.buyer_user, seller=self.seller_user, description=name,
+                                                     total_amount=10, status=request_status)
+            PurchaseRequest.objects.filter(pk=request.pk).update(updated_at=timezone.now() - timedelta(days=age))
+            self.requests[name] = request.id
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.buyer_user)}')
+
+    def archive(self, *args):
+        out = StringIO()
+        call_command('archive_purchase_requests', '--older-than', '180', *args, stdout=out)
+        return out.getvalue()
+
+    def test_moves_closed_requests_past_age_in_chunks(self):
+        kpi = PurchaseRequestStats.objects.kpi_for(self.buyer_user, 'buyer')
+
+        self.assertIn('Archived 2 purchase requests', self.archive('--chunk-size', '1'))
+
+        self.assertEqual(set(PurchaseRequest.objects.values_list('id', flat=True)),
+                         {self.requests['old in process'], self.requests['recent approved']})
+        self.assertEqual(set(ArchivedPurchaseRequest.objects.values_list('id', flat=True)),
+                         {self.requests['old approved'], self.requests['old rejected']})
+        self.assertEqual(PurchaseRequestStats.objects.kpi_for(self.buyer_user, 'buyer'), kpi)
+        out = StringIO()
+        call_command('rebuild_purchase_stats', '--check', stdout=out)
+        self.assertIn('Checked 2 stats rows, 0 with drift.', out.getvalue())
+        self.assertIn('Archived 0 purchase requests', self.archive())
+
+    def test_dry_run_and_resume(self):
+        self.assertIn('2 purchase requests', self.archive('--dry-run'))
+        self.assertEqual(ArchivedPurchaseRequest.objects.count(), 0)
+
+        self.assertIn('Archived 1 purchase requests', self.archive('--chunk-size', '1', '--max-chunks', '1'))
+        self.assertIn('Archived 1 purchase requests', self.archive())
+        self.assertEqual(PurchaseRequest.objects.count(), 2)
+        self.assertEqual(ArchivedPurchaseRequest.objects.count(), 2)
+
+    def test_lists_and_exports_include_archived_on_request(self):
+        url = reverse('buyer-purchase-request')
+        self.assertEqual(len(self.client.get(url).data['data']), 4)
+
+        self.archive()
+
+        # The cached list was invalidated by the move
+        self.assertEqual(len(self.client.get(url).data['data']), 2)
+        response = self.client.get(url, {'include_archived': 'true'})
+        self.assertEqual([row['id'] for row in response.data['data']], sorted(self.requests.values(), reverse=True))
+        response = self.client.get(url, {'include_archived': 'true', 'status': 'Rejected', 'q': 'old'})
+        self.assertEqual([row['id'] for row in response.data['data']], [self.requests['old rejected']])
+        response = self.client.get(url, {'include_archived': 'maybe'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.seller_user)}')
+        response = self.client.get(reverse('seller-sale-request-list'), {'include_archived': 'true'})
+        self.assertEqual(len(response.data['data']), 4)
+        response = self.client.get(reverse('seller-sale-request-export'),
+                                   {'include_archived': 'true', 'file_format': 'ndjson'})
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([row['id'] for row in rows], sorted(self.requests.values()))
+        response = self.client.get(reverse('purchase-request-history', kwargs={'pk': self.requests['old approved']}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class PartitionPurchaseRequestsCommandTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.buyer_user = User.objects.create_user(email='buyer@example.com', name='Buyer', password='password123',
+                                                   role='Buyer')
+        self.seller_user = User.objects.create_user(email='seller@example.com', name='Seller',
+                                                    password='password123', role='Seller')
+        self.purchase_request = PurchaseRequest.objects.create(buyer=self.buyer_user, seller=self.seller_user,
+                                                               description='Purchase', total_amount=10)
+
+    def test_month_arithmetic(self):
+        self.assertEqual(partitions.add_months(date(2024, 11, 1), 3), date(2025, 2, 1))
+        self.assertEqual(partitions.add_months(date(2024, 1, 1), -13), date(2022, 12, 1))
+        self.assertEqual(partitions.partition_name(date(2025, 2, 1)), 'buyer_purchaserequest_p2025_02')
+
+    @skipIf(connection.vendor == 'postgresql', 'Partitioning is supported on PostgreSQL')
+    def test_needs_postgresql(self):
+        with self.assertRaisesMessage(CommandError, 'Partitioning needs PostgreSQL'):
+            call_command('partition_purchase_requests', '--setup', stdout=StringIO())
+
+    @skipUnless(connection.vendor == 'postgresql', 'Partitioning is only supported on PostgreSQL')
+    def test_setup_creates_partitions_that_dated_queries_prune(self):
+        out = StringIO()
+        call_command('partition_purchase_requests', '--setup', '--ahead', '2', stdout=out)
+        self.assertIn('Created 2 partitions, detached 0.', out.getvalue())
+        self.assertTrue(partitions.is_partitioned(connection))
+        call_command('partition_purchase_requests', '--ahead', '2', stdout=out)
+        self.assertIn('Created 0 partitions', out.getvalue())
+
+        # Rows keep their ids, new ones continue the sequence
+        self.assertTrue(PurchaseRequest.objects.filter(pk=self.purchase_request.pk).exists())
+        created = PurchaseRequest.objects.create(buyer=self.buyer_user, seller=self.seller_user,
+                                                 description='Partitioned', total_amount=5)
+        self.assertGreater(created.pk, self.purchase_request.pk)
+
+        next_month = partitions.add_months(partitions.month_start(timezone.now()), 1)
+        queryset = PurchaseRequest.objects.filter(buyer=self.buyer_user, created_at__gte=datetime(
+            next_month.year, next_month.month, 1, tzinfo=dt_timezone.utc))
+        plan = queryset.explain()
+        self.assertNotIn(partitions.LEGACY_PARTITION, plan)
+        self.assertIn(partitions.partition_name(next_month), plan)
+
+        # Partitions still holding rows are kept
+        detached, skipped = partitions.detach_partitions(connection, partitions.add_months(next_month, 1))
+        self.assertEqual((detached, skipped), ([partitions.partition_name(next_month)], [partitions.LEGACY_PARTITION]))
+        self.assertEqual(PurchaseRequest.objects.count(), 2)
+
+    @skipUnless(connection.vendor == 'postgresql', 'Partitioning is only supported on PostgreSQL')
+    def test_rows_in_the_default_partition_move_to_new_partitions(self):
+        call_command('partition_purchase_requests', '--setup', '--ahead', '0', stdout=StringIO())
+        later_month = partitions.add_months(partitions.month_start(timezone.now()), 2)
+        created_at = timezone.make_aware(datetime(later_month.year, later_month.month, 3))
+        PurchaseRequest.objects.filter(pk=self.purchase_request.pk).update(created_at=created_at)
+
+        out = StringIO()
+        call_command('partition_purchase_requests', '--ahead', '3', stdout=out)
+        self.assertIn('Created 3 partitions', out.getvalue())
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT id FROM {partitions.partition_name(later_month)}')
+            self.assertEqual(cursor.fetchall(), [(self.purchase_request.pk,)])
+            cursor.execute(f'SELECT COUNT(*) FROM {partitions.DEFAULT_PARTITION}')
+            self.assertEqual(cursor.fetchone()[0], 0)
+        self.assertIsNone(partitions.partitions(connection)[partitions.DEFAULT_PARTITION])
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Query plans are only checked on PostgreSQL')
+class PurchaseRequestQueryPlanTests(APITestCase):
+    """
+    EXPLAIN every query issued by the KPI and list endpoints and fail on sequential scans.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.buyer_user = User.objects.create_user(email='buyer@example.com', name='Buyer', password='password123',
+                                                   role='Buyer')
+        self.seller_user = User.objects.create_user(email='seller@example.com', name='Seller',
+                                                    password='password123', role='Seller')
+        PurchaseRequest.objects.bulk_create([
+            PurchaseRequest(buyer=self.buyer_user, seller=self.seller_user, description=f'Purchase {index}',
+                            total_amount=10, status=('In-Process', 'Approved', 'Rejected')[index % 3])
+            for index in range(30)
+        ])
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE buyer_purchaserequest')
+            # The tables are tiny, so make the planner prefer any usable index over a scan.
+            cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def assertNoSequentialScans(self, url_name, user, params=None):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse(url_name), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        statements = [query['sql'] for query in context.captured_queries if query['sql'].startswith('SELECT')]
+        self.assertTrue(statements)
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(f'EXPLAIN {sql}')
+                plan = '\n'.join(row[0] for row in cursor.fetchall())
+                self.assertNotIn('Seq Scan', plan, msg=f'{sql}\n{plan}')
+
+    def test_buyer_kpi_plan(self):
+        self.assertNoSequentialScans('buyer-kpi-card', self.buyer_user)
+
+    def test_seller_kpi_plan(self):
+        self.assertNoSequentialScans('seller-kpi-card', self.seller_user)
+
+    def test_buyer_list_plan(self):
+        self.assertNoSequentialScans('buyer-purchase-request', self.buyer_user)
+
+    def test_seller_list_plan(self):
+        self.assertNoSequentialScans('seller-sale-request-list', self.seller_user)
+
+    def test_buyer_search_plan(self):
+        self.assertNoSequentialScans('buyer-purchase-request', self.buyer_user, {'q': 'purchase'})
+
+    def test_buyer_filtered_list_plans(self):
+        for params in ({'status': ['Approved', 'Rejected']},
+                       {'created_after': '2024-01-01T00:00:00Z', 'created_before': '2030-01-01T00:00:00Z'},
+                       {'min_amount': '5', 'max_amount': '50'},
+                       {'seller': self.seller_user.id, 'status': 'Approved', 'min_amount': '5'}):
+            self.assertNoSequentialScans('buyer-purchase-request', self.buyer_user, params)
+
+    def test_seller_filtered_list_plans(self):
+        for params in ({'buyer': self.buyer_user.id},
+                       {'status': 'In-Process', 'created_after': '2024-01-01T00:00:00Z', 'max_amount': '50'}):
+            self.assertNoSequentialScans('seller-sale-request-list', self.seller_user, params)
@@ -1,13 +1,20 @@
 from django.urls import path
 
 from buyer.views import BuyersListAPIView, BuyerRetrieveUpdateDestroyAPIView, PurchaseRequestListCreateAPIView, \
-    BuyerDashboardView
+    BuyerDashboardView, PurchaseRequestBulkCreateAPIView, PurchaseRequestExportView, AllPurchaseRequestExportView, \
+    BuyerAnalyticsView, PurchaseRequestHistoryView
 
 urlpatterns = [
     path('list/', BuyersListAPIView.as_view(), name='buyer-list'),
     path('<int:pk>/', BuyerRetrieveUpdateDestroyAPIView.as_view(), name='buyer-retrieve-update-delete'),
     path('purchase-request/', PurchaseRequestListCreateAPIView.as_view(), name='buyer-purchase-request'),
+    path('purchase-request/bulk/', PurchaseRequestBulkCreateAPIView.as_view(), name='buyer-purchase-request-bulk'),
+    path('purchase-request/export/', PurchaseRequestExportView.as_view(), name='buyer-purchase-request-export'),
+    path('purchase-request/<int:pk>/history/', PurchaseRequestHistoryView.as_view(),
+         name='purchase-request-history'),
+    path('purchase-request/export/all/', AllPurchaseRequestExportView.as_view(), name='purchase-request-export-all'),
     path('kpi-card/', BuyerDashboardView.as_view(), name='buyer-kpi-card'),
+    path('analytics/', BuyerAnalyticsView.as_view(), name='buyer-analytics'),
 
 
 ]
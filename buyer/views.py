@@ -1,23 +1,46 @@
+from django.db import transaction
+from django.db.models import Q
 from django.shortcuts import render
 from rest_framework import generics, status
+from rest_framework.exceptions import NotFound
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from accounts.models import User
 from accounts.permissions import IsSuperAdmin, IsBuyer
-from buyer.models import PurchaseRequest
-from buyer.serializers import UserSerializer, PurchaseRequestSerializer
+from accounts.tokens import revoke_tokens
+from buyer.analytics import PurchaseRequestAnalyticsMixin
+from buyer.exports import PurchaseRequestExportMixin
+from buyer.filters import PurchaseRequestFilterMixin, purchase_requests
+from buyer.models import PurchaseRequest, PurchaseRequestStats, PurchaseRequestStatusHistory, \
+    PurchaseRequestWithArchive
+from buyer.pagination import KeysetCursorPagination
+from buyer.row_serializers import RowSerializer
+from buyer.search import PurchaseRequestSearchMixin
+from buyer.serializers import UserSerializer, PurchaseRequestSerializer, PurchaseRequestBulkItemSerializer, \
+    PurchaseRequestStatusHistorySerializer
+from buyer.signals import purchase_requests_created
+from buyer.tasks import notify_sellers_of_purchase_requests
+from core.cache import cache_response
 
 
 # Create your views here.
+# Read-only fast paths for the list endpoints, with the same output as their serializers
+user_rows = RowSerializer(UserSerializer)
+purchase_request_rows = RowSerializer(PurchaseRequestSerializer)
+status_history_rows = RowSerializer(PurchaseRequestStatusHistorySerializer)
+
 
 class CustomAPIViewMixin:
-    def create_response(self, data=None, message="Operation successful", status_code=status.HTTP_200_OK):
+    def create_response(self, data=None, message="Operation successful", status_code=status.HTTP_200_OK, links=None):
         response_data = {
             'message': message,
             'data': data
         }
+        if links is not None:
+            # Pagination links sit next to the data so the envelope stays the same.
+            response_data.update(links)
         return Response(response_data, status=status_code)
 
 
@@ -29,13 +52,13 @@ class BuyersListAPIView(CustomAPIViewMixin, generics.ListAPIView):
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticated, IsSuperAdmin]
 
+    @cache_response('users', conditional=True)
     def list(self, request, *args, **kwargs):
         """
                 Handle GET requests to list all Buyers.
         """
-        queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True)
-        return self.create_response(data=serializer.data, message="Buyers retrieved successfully")
+        rows = user_rows.values(self.get_queryset())
+        return self.create_response(data=user_rows.serialize(rows), message="Buyers retrieved successfully")
 
 
 class BuyerRetrieveUpdateDestroyAPIView(CustomAPIViewMixin, generics.RetrieveUpdateDestroyAPIView):
@@ -48,6 +71,7 @@ class BuyerRetrieveUpdateDestroyAPIView(CustomAPIViewMixin, generics.RetrieveUpd
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticated, IsSuperAdmin]
 
+    @cache_response('users')
     def retrieve(self, request, *args, **kwargs):
         """
             Retrieve a specific Buyer instance.
@@ -80,6 +104,13 @@ class BuyerRetrieveUpdateDestroyAPIView(CustomAPIViewMixin, generics.RetrieveUpd
         self.perform_update(serializer)
         return self.create_response(data=serializer.data, message="Buyer updated successfully")
 
+    def perform_update(self, serializer):
+        """
+            Save the changes and revoke the tokens of the user, which carry its previous claims.
+        """
+        with transaction.atomic():
+            revoke_tokens(serializer.save())
+
     def destroy(self, request, *args, **kwargs):
         """
            Soft Delete a specific Buyer.
@@ -91,26 +122,40 @@ class BuyerRetrieveUpdateDestroyAPIView(CustomAPIViewMixin, generics.RetrieveUpd
                Response: A DRF Response object with a success message
         """
         instance = self.get_object()
-        instance.is_active = False
-        instance.save()
+        with transaction.atomic():
+            instance.is_active = False
+            instance.save()
+            revoke_tokens(instance)
         return self.create_response(message="Buyer deleted successfully")
 
 
-class PurchaseRequestListCreateAPIView(CustomAPIViewMixin, generics.ListCreateAPIView):
+class PurchaseRequestListCreateAPIView(PurchaseRequestSearchMixin, PurchaseRequestFilterMixin, CustomAPIViewMixin,
+                                      generics.ListCreateAPIView):
     """
         API view to handle listing and creating Purchase Request.
     """
     queryset = PurchaseRequest.objects.all()
     serializer_class = PurchaseRequestSerializer
     permission_classes = [IsAuthenticated, IsBuyer]
+    pagination_class = KeysetCursorPagination
 
+    def get_queryset(self):
+        # Only list the purchase requests made by the buyer who is currently logged in,
+        # fetching the sellers in the same query for seller_details
+        return purchase_requests(self.request).filter(buyer_id=self.request.user.id).select_related('seller')
+
+    @cache_response('user', conditional=True)
     def list(self, request, *args, **kwargs):
         """
-                Handle GET requests to list all Purchase Request made.
+                Handle GET requests to list the Purchase Requests made, newest first,
+                one cursor page at a time. ``?q=`` searches the descriptions, most relevant first,
+                and the PurchaseRequestFilterMixin query parameters narrow the list down.
         """
-        queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True)
-        return self.create_response(data=serializer.data, message="Purchase Request retrieved successfully")
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(purchase_request_rows.values(queryset, *self.cursor_fields))
+        return self.create_response(data=purchase_request_rows.serialize(page),
+                                    message="Purchase Request retrieved successfully",
+                                    links=self.paginator.get_links())
 
     def create(self, request, *args, **kwargs):
         """
@@ -125,8 +170,129 @@ class PurchaseRequestListCreateAPIView(CustomAPIViewMixin, generics.ListCreateAP
     def perform_create(self, serializer):
         """
         Automatically save the buyer as the currently authenticated user.
+        The KPI counters are updated in the same transaction.
         """
-        serializer.save(buyer=self.request.user)
+        with transaction.atomic():
+            purchase_request = serializer.save(buyer_id=self.request.user.id)
+            notify_sellers_of_purchase_requests.enqueue(purchase_request_ids=[purchase_request.id])
+
+
+class PurchaseRequestBulkCreateAPIView(CustomAPIViewMixin, APIView):
+    """
+        API view for creating many Purchase Requests in one call.
+
+        The body is a list of purchase requests. All sellers are checked with one query and the valid
+        rows are inserted with a single bulk insert. By default any invalid item rejects the whole batch;
+        with ``?partial=true`` the valid items are created and the invalid ones are reported.
+    """
+    permission_classes = [IsAuthenticated, IsBuyer]
+    max_batch_size = 1000
+
+    def post(self, request):
+        """
+            Handle POST request to create a batch of Purchase Requests.
+
+            Returns:
+                Response: The ids of the created items and the errors of the rejected ones,
+                both with the index of the item in the request body.
+        """
+        items = request.data
+        if not isinstance(items, list) or not items:
+            return self.create_response(message="A non-empty list of Purchase Requests is required",
+                                        status_code=status.HTTP_400_BAD_REQUEST)
+        if len(items) > self.max_batch_size:
+            return self.create_response(message=f"At most {self.max_batch_size} Purchase Requests can be created "
+                                                f"at once", status_code=status.HTTP_400_BAD_REQUEST)
+        partial = request.query_params.get('partial', '').lower() in ('1', 'true', 'yes')
+
+        errors, valid = [], []
+        for index, item in enumerate(items):
+            serializer = PurchaseRequestBulkItemSerializer(data=item)
+            if serializer.is_valid():
+                valid.append((index, serializer.validated_data))
+            else:
+                errors.append({'index': index, 'errors': serializer.errors})
+
+        seller_ids = {data['seller_id'] for _, data in valid}
+        sellers = set(User.objects.filter(id__in=seller_ids, role='Seller').values_list('id', flat=True))
+        accepted = []
+        for index, data in valid:
+            if data['seller_id'] in sellers:
+                accepted.append((index, data))
+            else:
+                errors.append({'index': index,
+                               'errors': {'seller': [f'Invalid pk "{data["seller_id"]}" - object does not exist.']}})
+        errors.sort(key=lambda error: error['index'])
+
+        if not accepted or (errors and not partial):
+            return self.create_response(data={'created': [], 'errors': errors},
+                                        message="Purchase Requests could not be created",
+                                        status_code=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            created = PurchaseRequest.objects.bulk_create([
+                PurchaseRequest(buyer_id=request.user.id, **data) for _, data in accepted
+            ])
+            purchase_requests_created.send(sender=PurchaseRequest, requests=created)
+            notify_sellers_of_purchase_requests.enqueue(
+                purchase_request_ids=[purchase_request.id for purchase_request in created])
+
+        results = [{'index': index, 'id': purchase_request.id}
+                   for (index, _), purchase_request in zip(accepted, created)]
+        return self.create_response(data={'created': results, 'errors': errors},
+                                    message="Purchase Requests created successfully",
+                                    status_code=status.HTTP_201_CREATED)
+
+
+class PurchaseRequestExportView(PurchaseRequestExportMixin, APIView):
+    """
+        API view for a Buyer to export their Purchase Requests as a streamed CSV or NDJSON file.
+    """
+    permission_classes = [IsAuthenticated, IsBuyer]
+
+    def get_queryset(self):
+        return purchase_requests(self.request).filter(buyer_id=self.request.user.id)
+
+
+class PurchaseRequestHistoryView(CustomAPIViewMixin, generics.ListAPIView):
+    """
+        API view to list the status history of one Purchase Request, newest first.
+        The Buyer and the Seller of the request and Superadmins can read it.
+    """
+    serializer_class = PurchaseRequestStatusHistorySerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = KeysetCursorPagination
+    cursor_ordering = ('-changed_at', '-id')
+
+    def get_queryset(self):
+        # The history of archived requests stays readable
+        requests = PurchaseRequestWithArchive.objects.filter(pk=self.kwargs['pk'])
+        user = self.request.user
+        if user.role != 'Superadmin':
+            requests = requests.filter(Q(buyer_id=user.id) | Q(seller_id=user.id))
+        if not requests.exists():
+            raise NotFound('Purchase Request not found')
+        return PurchaseRequestStatusHistory.objects.filter(purchase_request_id=self.kwargs['pk'])
+
+    def list(self, request, *args, **kwargs):
+        """
+            Handle GET requests to list the status changes of the Purchase Request, one cursor page at a time.
+            Recent changes can take up to STATUS_HISTORY_FLUSH_INTERVAL seconds to appear.
+        """
+        page = self.paginate_queryset(status_history_rows.values(self.get_queryset(), 'changed_at'))
+        return self.create_response(data=status_history_rows.serialize(page),
+                                    message="Purchase Request history retrieved successfully",
+                                    links=self.paginator.get_links())
+
+
+class AllPurchaseRequestExportView(PurchaseRequestExportMixin, APIView):
+    """
+        API view for a Superadmin to export every Purchase Request as a streamed CSV or NDJSON file.
+    """
+    permission_classes = [IsAuthenticated, IsSuperAdmin]
+
+    def get_queryset(self):
+        return purchase_requests(self.request).all()
 
 
 class BuyerDashboardView(CustomAPIViewMixin, APIView):
@@ -137,16 +303,19 @@ class BuyerDashboardView(CustomAPIViewMixin, APIView):
     """
     permission_classes = [IsAuthenticated, IsBuyer]
 
+    @cache_response('user', conditional=True)
     def get(self, request):
         """
             Handle GET requests to retrieve KPI data for individual Buyer.
         """
         buyer = request.user
-        purchases = PurchaseRequest.objects.filter(buyer=buyer)
-        data = {
-            'total_purchases': purchases.count(),
-            'in_process': purchases.filter(status='In-Process').count(),
-            'approved': purchases.filter(status='Approved').count(),
-            'rejected': purchases.filter(status='Rejected').count()
-        }
+        data = PurchaseRequestStats.objects.kpi_for(buyer, 'buyer')
         return self.create_response(data=data, message="Buyer KPI dashboard retrieved successfully")
+
+
+class BuyerAnalyticsView(PurchaseRequestAnalyticsMixin, CustomAPIViewMixin, APIView):
+    """
+           API view for retrieving the purchase trends of a Buyer, per day, week or month.
+    """
+    permission_classes = [IsAuthenticated, IsBuyer]
+    analytics_side = 'buyer'
@@ -2,6 +2,8 @@
 ASGI config for core project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Requests served through it are routed with ASGI_ROOT_URLCONF, which adds the event stream and, with
+core.asgi_urls, serves the hot GET endpoints with native async views (see core.async_api).
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
@@ -0,0 +1,14 @@
+"""
+URL configuration of the requests served through ASGI by default, see core.middleware.
+
+core.urls plus the Server-Sent Events stream, which is only routed under ASGI: a stream would hold a
+WSGI worker for its whole duration.
+"""
+from django.urls import path
+
+from accounts.async_views import AsyncEventStreamView
+from core.urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+    path('api/users/events/', AsyncEventStreamView.as_view(), name='user-events'),
+] + sync_urlpatterns
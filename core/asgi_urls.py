@@ -0,0 +1,16 @@
+"""
+URL configuration of the requests served through ASGI with the native async views, opt-in with
+ASGI_ROOT_URLCONF=core.asgi_urls, see core.middleware.
+
+The native async views of the hot GET endpoints come first; every other request falls through to
+the routes of core.asgi_stream_urls, so URL names and reverse() are unchanged.
+"""
+from django.urls import path, include
+
+from core.asgi_stream_urls import urlpatterns as stream_urlpatterns
+
+urlpatterns = [
+    path('api/users/', include('accounts.async_urls')),
+    path('api/buyers/', include('buyer.async_urls')),
+    path('api/sellers/', include('seller.async_urls')),
+] + stream_urlpatterns
@@ -0,0 +1,124 @@
+"""
+Native async GET endpoints for ASGI deployments.
+
+DRF views are synchronous, so under ASGI every request to them holds a worker thread for its whole
+duration. An ``AsyncAPIView`` serves the GET requests of an existing DRF view as a coroutine instead:
+it reuses the DRF view's permissions, queryset building, envelope and exception handling, which never
+touch the database, and only replaces the database work with Django's async ORM.
+
+The async views are routed through ``settings.ASGI_ROOT_URLCONF`` by core.middleware when it is set to
+core.asgi_urls, so WSGI deployments and the test client keep using the DRF views. That is opt-in: the
+``benchmark_asgi`` command measured them slower than the WSGI views so far.
+"""
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.core.exceptions import ImproperlyConfigured
+from django.http import HttpResponse
+from django.views import View
+from rest_framework import exceptions
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+
+def api_authentication():
+    return api_settings.DEFAULT_AUTHENTICATION_CLASSES[0]()
+
+
+async def aauthenticate(request):
+    """
+        Async variant of the authenticate() of the API authentication class (API_AUTHENTICATION_CLASS):
+        return the user of the request's bearer token, or ``None`` when the request carries no token.
+    """
+    authentication = api_authentication()
+    header = authentication.get_header(request)
+    if header is None:
+        return None
+    raw_token = authentication.get_raw_token(header)
+    if raw_token is None:
+        return None
+    return await atoken_user(raw_token)
+
+
+async def atoken_user(raw_token):
+    """
+        Validate the access token ``raw_token`` (bytes) and return its active user, as the API
+        authentication class does for the DRF views.
+    """
+    authentication = api_authentication()
+    validated_token = authentication.get_validated_token(raw_token)
+    # The user is read through the synchronous cache framework and user cache, or the database on a miss
+    return await sync_to_async(authentication.get_user)(validated_token)
+
+
+class AsyncAPIView(View):
+    """
+        Serve GET requests of the DRF view ``view_class`` with the ``aget`` coroutine.
+
+        Subclasses define the coroutine ``aget(request, *args, **kwargs)``, checked by ``as_view()``. It runs
+        after the view's authentication, permission and throttle checks, with ``self.api_view`` set to a
+        ``view_class`` instance bound to the request, and returns a DRF Response or a plain Django response.
+        Responses are rendered as JSON only, here, so Django doesn't hand them to a thread to render: a
+        ``?format=`` other than json is a 404, as DRF answers a format none of its renderers has.
+        Other methods are delegated to ``view_class`` itself, in a thread.
+    """
+    view_class = None
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        if cls.view_class is None or not iscoroutinefunction(getattr(cls, 'aget', None)):
+            raise ImproperlyConfigured(f'{cls.__name__} must set view_class and define an async aget().')
+        view = super().as_view(**initkwargs)
+        # Like DRF views: authentication is by bearer token, not session
+        view.csrf_exempt = True
+        return view
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+        return self.delegate(request, *args, **kwargs)
+
+    async def get(self, request, *args, **kwargs):
+        drf_request = Request(request)
+        view = self.view_class(request=drf_request, args=args, kwargs=kwargs, format_kwarg=None, headers={})
+        view.renderer_classes = [JSONRenderer]
+        self.api_view = view
+        try:
+            # What DRF's initial() does, with the authentication awaited
+            drf_request.accepted_renderer, drf_request.accepted_media_type = \
+                view.perform_content_negotiation(drf_request)
+            drf_request.user = await self.authenticate(drf_request) or AnonymousUser()
+            self.check_permissions(view, drf_request)
+            if view.get_throttles():
+                # Throttles keep their history in the synchronous cache framework
+                await sync_to_async(view.check_throttles)(drf_request)
+            response = await self.aget(drf_request, *args, **kwargs)
+        except Exception as exc:
+            response = view.handle_exception(exc)
+        if not isinstance(response, Response):
+            # e.g. a streaming response
+            return response
+        return self.render(view.finalize_response(drf_request, response, *args, **kwargs))
+
+    async def authenticate(self, request):
+        return await aauthenticate(request)
+
+    async def delegate(self, request, *args, **kwargs):
+        return await sync_to_async(self.view_class.as_view())(request, *args, **kwargs)
+
+    @staticmethod
+    def check_permissions(view, request):
+        for permission in view.get_permissions():
+            if not permission.has_permission(request, view):
+                if not request.user.is_authenticated:
+                    raise exceptions.NotAuthenticated()
+                raise exceptions.PermissionDenied(getattr(permission, 'message', None))
+
+    @staticmethod
+    def render(response):
+        response.render()
+        rendered = HttpResponse(response.content, status=response.status_code)
+        for header, value in response.items():
+            rendered[header] = value
+        return rendered
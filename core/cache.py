@@ -0,0 +1,245 @@
+"""
+Versioned per-user cache for GET API responses.
+
+Responses are stored in Django's cache framework under a key built from the requesting user,
+the path, the query string and the current version of every scope the response depends on.
+Writes invalidate by bumping a scope version (``user:<id>`` for a user's own data, ``users`` for
+the buyer/seller directory), so stale entries are never read again and simply expire. A user's
+scope also covers the counterparty details embedded in their purchase requests, so saving a user
+bumps the scope of everyone they traded with (see buyer.receivers).
+
+The same versions double as HTTP validators: ``conditional=True`` adds an ETag and Last-Modified to
+the responses and answers matching If-None-Match / If-Modified-Since requests with a 304, before the
+handler runs.
+"""
+import hashlib
+import math
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+VERSION_KEY_PREFIX = 'api-version'
+MODIFIED_KEY_PREFIX = 'api-modified'
+RESPONSE_KEY_PREFIX = 'api-response'
+STATS_KEYS = {'hits': 'api-response-stats:hits', 'misses': 'api-response-stats:misses'}
+
+
+def user_scope(user_id):
+    return f'user:{user_id}'
+
+
+def _version_key(scope):
+    return f'{VERSION_KEY_PREFIX}:{scope}'
+
+
+def _initial_version():
+    # Start from the clock rather than 1, so a version lost to eviction never repeats an older one.
+    return time.time_ns()
+
+
+def _modified_key(scope):
+    return f'{MODIFIED_KEY_PREFIX}:{scope}'
+
+
+def _next_modified(previous=None):
+    # Whole seconds as in HTTP dates, rounded up and always moving forward, so a write in the same
+    # second as an earlier response still changes Last-Modified.
+    now = math.ceil(time.time())
+    return now if previous is None else max(now, previous + 1)
+
+
+def get_versions(scopes):
+    """
+        Return ``(versions, last_modified)`` for ``scopes``: the current version of every scope, and the
+        latest time one of them changed, as a timestamp. Missing scopes are created.
+    """
+    keys = {scope: (_version_key(scope), _modified_key(scope)) for scope in scopes}
+    found = cache.get_many([key for pair in keys.values() for key in pair])
+    versions, last_modified = {}, 0
+    for scope, (version_key, modified_key) in keys.items():
+        if version_key not in found:
+            cache.add(version_key, _initial_version(), timeout=None)
+            found[version_key] = cache.get(version_key)
+        if modified_key not in found:
+            cache.add(modified_key, _next_modified(), timeout=None)
+            found[modified_key] = cache.get(modified_key)
+        versions[scope] = found[version_key]
+        last_modified = max(last_modified, found[modified_key])
+    return versions, last_modified
+
+
+def _bump(scopes):
+    for scope in scopes:
+        key = _version_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _initial_version(), timeout=None)
+        cache.set(_modified_key(scope), _next_modified(cache.get(_modified_key(scope))), timeout=None)
+
+
+def bump_versions(*scopes):
+    """
+        Invalidate every cached response that depends on one of ``scopes``.
+
+        The versions are bumped right away and again once the current transaction commits, so a
+        reader that raced the write can't keep serving the data it read before the commit.
+    """
+    scopes = [scope for scope in scopes if scope]
+    if not scopes:
+        return
+    _bump(scopes)
+    transaction.on_commit(lambda: _bump(scopes))
+
+
+def _count(outcome):
+    key = STATS_KEYS[outcome]
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+
+
+def get_stats():
+    """
+        Return the hit/miss counters of the response cache.
+    """
+    counters = cache.get_many(list(STATS_KEYS.values()))
+    hits, misses = counters.get(STATS_KEYS['hits'], 0), counters.get(STATS_KEYS['misses'], 0)
+    lookups = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / lookups, 4) if lookups else None,
+    }
+
+
+def reset_stats():
+    cache.delete_many(list(STATS_KEYS.values()))
+
+
+def response_fingerprint(request, scopes, vary=''):
+    """
+        Return ``(digest, last_modified)`` of the response to ``request``: a digest of the user, path,
+        query string, scope versions and ``vary``, used as both cache key and ETag, and its Last-Modified
+        time.
+    """
+    versions, last_modified = get_versions(scopes)
+    query = '&'.join(sorted(request.GET.urlencode().split('&')))
+    raw = '|'.join([str(request.user.id), request.path, query, vary] +
+                   [f'{scope}={versions[scope]}' for scope in sorted(versions)])
+    return hashlib.md5(raw.encode('utf-8')).hexdigest(), last_modified
+
+
+def is_not_modified(request, etag, last_modified):
+    """
+        Evaluate If-None-Match, or failing that If-Modified-Since, against the response validators.
+    """
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        tags = parse_etags(if_none_match)
+        # Weak comparison: W/"x" matches "x"
+        return '*' in tags or any(tag.removeprefix('W/') == etag for tag in tags)
+    if last_modified is None:
+        return False
+    if_modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE') or '')
+    return if_modified_since is not None and last_modified <= if_modified_since
+
+
+def _set_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    # Per-user responses: private caches only, and always revalidate
+    response['Cache-Control'] = 'private, no-cache'
+    response['Vary'] = 'Authorization'
+    return response
+
+
+def _lookup(request, scopes, conditional, vary=None):
+    """
+        Return ``(key, validators, response)`` for ``request``: the cache key, the ``(etag, last_modified)``
+        pair, and the response to send without running the handler (a 304 or a cache hit), if any.
+    """
+    resolved = [user_scope(request.user.id) if scope == 'user' else scope for scope in scopes]
+    varies_on = vary(request) if vary else ''
+    digest, last_modified = response_fingerprint(request, resolved, varies_on)
+    if varies_on:
+        # The versions don't date what ``vary`` depends on, only the ETag does
+        last_modified = None
+    validators = (quote_etag(digest), last_modified)
+    if conditional and is_not_modified(request, *validators):
+        return None, validators, _set_validators(Response(status=status.HTTP_304_NOT_MODIFIED), *validators)
+
+    key = f'{RESPONSE_KEY_PREFIX}:{digest}'
+    cached = cache.get(key)
+    if cached is not None:
+        _count('hits')
+        return key, validators, Response(cached)
+    _count('misses')
+    return key, validators, None
+
+
+def _store(key, response):
+    if response.status_code == status.HTTP_200_OK and getattr(response, 'data', None) is not None:
+        cache.set(key, response.data, settings.API_RESPONSE_CACHE_TIMEOUT)
+
+
+def cache_response(*scopes, conditional=False, vary=None):
+    """
+        Cache the successful responses of a DRF view handler per user, path and query string.
+
+        ``scopes`` name what the response depends on: ``'user'`` for the requesting user's own data,
+        or any shared scope such as ``'users'``. The handler runs after authentication and
+        permission checks, so only authorized responses are ever cached or served.
+
+        With ``conditional=True`` the responses carry ETag and Last-Modified validators, and matching
+        conditional requests get a 304 without reading the cache or running the handler.
+
+        ``vary(request)`` returns a string of whatever else the response depends on, such as the current
+        date, to be part of the cache key and ETag. Responses it returns a non-empty string for carry no
+        Last-Modified.
+
+        Coroutine handlers (see core.async_api) are supported too; the cache itself is then accessed
+        from a worker thread, as Django's cache backends are synchronous.
+    """
+    scopes = scopes or ('user',)
+
+    def decorator(handler):
+        if iscoroutinefunction(handler):
+            lookup = sync_to_async(_lookup, thread_sensitive=False)
+            store = sync_to_async(_store, thread_sensitive=False)
+
+            @wraps(handler)
+            async def async_wrapper(view, request, *args, **kwargs):
+                key, validators, response = await lookup(request, scopes, conditional, vary)
+                if response is None:
+                    response = await handler(view, request, *args, **kwargs)
+                    await store(key, response)
+                if conditional and response.status_code == status.HTTP_200_OK:
+                    _set_validators(response, *validators)
+                return response
+
+            return async_wrapper
+
+        @wraps(handler)
+        def wrapper(view, request, *args, **kwargs):
+            key, validators, response = _lookup(request, scopes, conditional, vary)
+            if response is None:
+                response = handler(view, request, *args, **kwargs)
+                _store(key, response)
+            if conditional and response.status_code == status.HTTP_200_OK:
+                _set_validators(response, *validators)
+            return response
+
+        return wrapper
+
+    return decorator
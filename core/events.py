@@ -0,0 +1,120 @@
+"""
+Publish/subscribe of the live events pushed to dashboards, see accounts.async_views.AsyncEventStreamView.
+
+Events are JSON-ready dicts published to channels, one per user (``user:<id>``, as core.cache.user_scope).
+The broker is ``settings.EVENT_BROKER``, a dotted path to a class with:
+
+``publish(channel, event)``
+    Deliver ``event`` to every current subscriber of ``channel``. Called from any thread.
+``subscribe(channel)``
+    Return a subscription, called from the event loop of the subscriber. Its ``get()`` coroutine
+    returns the next event, and ``close()`` ends the subscription.
+
+InProcessBroker only reaches subscribers of the process that published the event, which suits a single
+ASGI process serving both the writes and the streams. Deployments with several processes need a
+shared broker (e.g. Redis pub/sub) behind the same interface.
+"""
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# Sent in place of the events a subscriber missed, when it fell too far behind: refetch everything.
+RESET_EVENT = {'type': 'reset'}
+
+
+class Subscription:
+    """
+        Queue of the events of one channel, consumed on the event loop that created it.
+    """
+
+    def __init__(self, broker, channel, maxsize):
+        self.broker = broker
+        self.channel = channel
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize)
+
+    def put(self, event):
+        try:
+            self._loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # The event loop is closed, the subscriber is gone
+            self.close()
+
+    def _put(self, event):
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            self._queue.put_nowait(RESET_EVENT)
+
+    async def get(self):
+        return await self._queue.get()
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    """
+        Fan out events to the subscribers of the current process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)
+
+    def publish(self, channel, event):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            subscription.put(event)
+
+    def subscribe(self, channel):
+        subscription = Subscription(self, channel, settings.EVENT_QUEUE_SIZE)
+        with self._lock:
+            self._subscriptions[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.channel)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.channel]
+
+    def subscriber_count(self, channel):
+        with self._lock:
+            return len(self._subscriptions.get(channel, ()))
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    return import_string(settings.EVENT_BROKER)()
+
+
+def _publish(messages):
+    broker = get_broker()
+    for channels, event in messages:
+        for channel in channels:
+            try:
+                broker.publish(channel, event)
+            except Exception:
+                logger.exception('Failed to publish a %s event to %s', event.get('type'), channel)
+
+
+def publish_on_commit(messages):
+    """
+        Publish ``messages``, a list of ``(channels, event)`` pairs, once the current transaction commits.
+    """
+    if messages:
+        transaction.on_commit(lambda: _publish(messages))
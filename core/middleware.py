@@ -0,0 +1,29 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+
+class ASGIURLConfMiddleware:
+    """
+        Resolve the requests served through ASGI with ``settings.ASGI_ROOT_URLCONF``, which adds the event
+        stream and may route the hot GET endpoints to their native async views (see core.async_api).
+
+        Django runs the middleware chain asynchronously only under ASGI, so WSGI requests keep the
+        default ROOT_URLCONF.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        if settings.ASGI_ROOT_URLCONF:
+            request.urlconf = settings.ASGI_ROOT_URLCONF
+        return await self.get_response(request)
@@ -46,6 +46,7 @@ INSTALLED_APPS = [
     'accounts.apps.AccountsConfig',
     'buyer.apps.BuyerConfig',
     'seller.apps.SellerConfig',
+    'tasks.apps.TasksConfig',
     'user_interface.apps.UserInterfaceConfig',
 
     # Third Party Apps listed here
@@ -60,9 +61,14 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.ASGIURLConfMiddleware',
 ]
 
 ROOT_URLCONF = 'core.urls'
+# URLconf of requests served through ASGI: core.asgi_stream_urls adds the event stream to ROOT_URLCONF, and
+# core.asgi_urls also serves the hot GET endpoints with native async views. Those are opt-in, as
+# ``benchmark_asgi`` measured them at 0.6-0.7x the WSGI views so far.
+ASGI_ROOT_URLCONF = env('ASGI_ROOT_URLCONF', default='core.asgi_stream_urls')
 
 TEMPLATES = [
     {
@@ -95,6 +101,54 @@ DATABASES = {
     }
 }
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Local memory by default; set CACHE_URL (e.g. redis://...) to share the cache between processes.
+
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+
+# Seconds a cached GET API response is kept; writes invalidate it earlier through version bumps.
+API_RESPONSE_CACHE_TIMEOUT = env.int('API_RESPONSE_CACHE_TIMEOUT', default=300)
+
+# Purchase request status history is buffered per process and written in batches of this many events,
+# or after this many seconds, whichever comes first.
+STATUS_HISTORY_BATCH_SIZE = env.int('STATUS_HISTORY_BATCH_SIZE', default=200)
+STATUS_HISTORY_FLUSH_INTERVAL = env.float('STATUS_HISTORY_FLUSH_INTERVAL', default=2.0)
+
+# Approved and Rejected purchase requests are moved to the archive table by ``archive_purchase_requests``
+# once they were last updated this many days ago.
+PURCHASE_REQUEST_ARCHIVE_AFTER_DAYS = env.int('PURCHASE_REQUEST_ARCHIVE_AFTER_DAYS', default=180)
+
+# Months of purchase request partitions ``partition_purchase_requests`` creates ahead of the current one
+# (PostgreSQL only, see buyer.partitions).
+PURCHASE_REQUEST_PARTITIONS_AHEAD = env.int('PURCHASE_REQUEST_PARTITIONS_AHEAD', default=3)
+
+# Live dashboard events (see core.events): the broker class, the events buffered per subscriber before
+# it is told to refetch, and the seconds between keep-alive comments and before a stream is closed for
+# the browser to reconnect.
+EVENT_BROKER = env('EVENT_BROKER', default='core.events.InProcessBroker')
+EVENT_QUEUE_SIZE = env.int('EVENT_QUEUE_SIZE', default=100)
+EVENT_STREAM_KEEPALIVE = env.float('EVENT_STREAM_KEEPALIVE', default=15.0)
+EVENT_STREAM_MAX_AGE = env.float('EVENT_STREAM_MAX_AGE', default=300.0)
+# Seconds a stream ticket opens the stream for: the stream is opened with a ticket, not the access token,
+# and hands the next ticket to the browser when it closes (see accounts.async_views).
+EVENT_STREAM_TICKET_MAX_AGE = env.int('EVENT_STREAM_TICKET_MAX_AGE', default=60)
+
+# Background task queue (see tasks.queue): seconds between polls of an idle worker, attempts before a task
+# is marked failed, the retry delay (doubled after every failure, up to the maximum), and the seconds after
+# which a task still running is assumed to belong to a dead worker and is claimed again.
+TASK_POLL_INTERVAL = env.float('TASK_POLL_INTERVAL', default=1.0)
+TASK_MAX_ATTEMPTS = env.int('TASK_MAX_ATTEMPTS', default=5)
+TASK_RETRY_BACKOFF = env.float('TASK_RETRY_BACKOFF', default=5.0)
+TASK_RETRY_BACKOFF_MAX = env.float('TASK_RETRY_BACKOFF_MAX', default=3600.0)
+TASK_LOCK_TIMEOUT = env.float('TASK_LOCK_TIMEOUT', default=900.0)
+
+# Notification emails sent by the background tasks
+EMAIL_BACKEND = env('EMAIL_BACKEND', default='django.core.mail.backends.console.EmailBackend')
+DEFAULT_FROM_EMAIL = env('DEFAULT_FROM_EMAIL', default='noreply@buyer-seller.local')
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -113,9 +167,33 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing, see accounts.hashers. Logins are CPU-bound on the hash: pbkdf2 costs
+# PASSWORD_PBKDF2_ITERATIONS iterations (Django's default 600000), scrypt is memory-hard, argon2 is
+# memory-hard too and needs ``pip install argon2-cffi``. Compare them with ``manage.py benchmark_login``.
+PASSWORD_HASHER_PROFILES = {
+    'pbkdf2': 'accounts.hashers.PBKDF2PasswordHasher',
+    'scrypt': 'django.contrib.auth.hashers.ScryptPasswordHasher',
+    'argon2': 'django.contrib.auth.hashers.Argon2PasswordHasher',
+}
+PASSWORD_HASHER_PROFILE = env('PASSWORD_HASHER_PROFILE', default='pbkdf2')
+PASSWORD_PBKDF2_ITERATIONS = env.int('PASSWORD_PBKDF2_ITERATIONS', default=600000)
+# The preferred hasher first, the others to verify the hashes made before switching profile
+PASSWORD_HASHERS = sorted(PASSWORD_HASHER_PROFILES.values(),
+                          key=lambda hasher: hasher != PASSWORD_HASHER_PROFILES[PASSWORD_HASHER_PROFILE])
+
+# Authentication of the API requests: TokenClaimsAuthentication trusts the user claims signed into the tokens,
+# CachedJWTAuthentication keeps reading the users from the database, through a per-process cache of
+# USER_CACHE_SIZE users kept up to USER_CACHE_TIMEOUT seconds (see accounts.user_cache).
+API_AUTHENTICATION_CLASS = env('API_AUTHENTICATION_CLASS', default='accounts.authentication.TokenClaimsAuthentication')
+USER_CACHE_SIZE = env.int('USER_CACHE_SIZE', default=10000)
+USER_CACHE_TIMEOUT = env.float('USER_CACHE_TIMEOUT', default=60.0)
+# Seconds a process trusts a token version read from the cache (see accounts.tokens): with a per-process
+# cache, how late a revocation made in another process is seen. Share CACHE_URL in production.
+TOKEN_REVOCATION_CACHE_TIMEOUT = env.int('TOKEN_REVOCATION_CACHE_TIMEOUT', default=30)
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        API_AUTHENTICATION_CLASS,
     )
 }
 
@@ -125,6 +203,7 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
     'ROTATE_REFRESH_TOKENS': False,
     'BLACKLIST_AFTER_ROTATION': False,
+    'TOKEN_USER_CLASS': 'accounts.tokens.ClaimsUser',
 }
 
 # Internationalization
@@ -0,0 +1,10 @@
+from django.urls import path
+
+from seller.async_views import AsyncSellerListView, AsyncSellerDashboardView, AsyncSellerPurchaseRequestListView
+
+# Served under ASGI only, in front of seller.urls, see core.asgi_urls
+urlpatterns = [
+    path('list/', AsyncSellerListView.as_view()),
+    path('seller-kpi-card/', AsyncSellerDashboardView.as_view()),
+    path('all-sale-request-list/', AsyncSellerPurchaseRequestListView.as_view()),
+]
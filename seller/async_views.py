@@ -0,0 +1,46 @@
+from buyer.models import PurchaseRequestStats
+from core.async_api import AsyncAPIView
+from core.cache import cache_response
+from seller.views import SellerListAPIView, SellerDashboardView, SellerPurchaseRequestListView, sale_request_rows, \
+    user_rows
+
+
+class AsyncSellerListView(AsyncAPIView):
+    """
+        Native async GET of SellerListAPIView.
+    """
+    view_class = SellerListAPIView
+
+    @cache_response('users', conditional=True)
+    async def aget(self, request, *args, **kwargs):
+        rows = [row async for row in user_rows.values(self.api_view.get_queryset())]
+        return self.api_view.create_response(data=user_rows.serialize(rows), message="Sellers retrieved successfully")
+
+
+class AsyncSellerDashboardView(AsyncAPIView):
+    """
+        Native async GET of SellerDashboardView.
+    """
+    view_class = SellerDashboardView
+
+    @cache_response('user', conditional=True)
+    async def aget(self, request, *args, **kwargs):
+        data = await PurchaseRequestStats.objects.akpi_for(request.user, 'seller')
+        return self.api_view.create_response(data=data, message="Seller KPI dashboard retrieved successfully")
+
+
+class AsyncSellerPurchaseRequestListView(AsyncAPIView):
+    """
+        Native async GET of SellerPurchaseRequestListView, with the same search, filters and cursor pages.
+    """
+    view_class = SellerPurchaseRequestListView
+
+    @cache_response('user', conditional=True)
+    async def aget(self, request, *args, **kwargs):
+        view = self.api_view
+        queryset = view.filter_queryset(view.get_queryset())
+        page = await view.paginator.apaginate_queryset(sale_request_rows.values(queryset, *view.cursor_fields),
+                                                       request, view=view)
+        return view.create_response(data=sale_request_rows.serialize(page),
+                                    message="Sale Requests retrieved successfully",
+                                    links=view.paginator.get_links())
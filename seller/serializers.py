@@ -24,8 +24,8 @@ class PurchaseRequestSellerSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = PurchaseRequest
-        fields = ['id', 'buyer', 'description', 'total_amount', 'status']
-        read_only_fields = ['id', 'description', 'total_amount']
+        fields = ['id', 'buyer', 'description', 'total_amount', 'status', 'version']
+        read_only_fields = ['id', 'description', 'total_amount', 'version']
 
     def validate_status(self, value):
         """
@@ -56,3 +56,21 @@ class PurchaseRequestSellerSerializer(serializers.ModelSerializer):
         # Perform the update
         instance = super().update(instance, validated_data)
         return instance
+
+
+class PurchaseRequestStatusSerializer(serializers.Serializer):
+    """
+       Serializer for a Seller to move one purchase request to a new status. ``version`` is the version
+       the Seller last read; when given, the update only applies if nobody changed the request since.
+    """
+    status = serializers.ChoiceField(choices=PurchaseRequest.STATUS_CHOICES)
+    version = serializers.IntegerField(min_value=1, required=False)
+
+
+class PurchaseRequestBulkStatusSerializer(serializers.Serializer):
+    """
+       Serializer for a Seller to apply one status to many of their purchase requests. Only statuses
+       a request can move to are accepted.
+    """
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=1000)
+    status = serializers.ChoiceField(choices=list(PurchaseRequest.STATUS_SOURCES))
@@ -0,0 +1,20 @@
+from django.core.mail import send_mass_mail
+
+from buyer.models import PurchaseRequest
+from tasks.queue import task
+
+
+@task()
+def notify_buyers_of_status_changes(purchase_request_ids):
+    """
+        Email the buyer of every Sale Request whose status changed, with its current status.
+    """
+    purchase_requests = PurchaseRequest.objects.filter(id__in=purchase_request_ids, buyer__isnull=False) \
+        .select_related('buyer', 'seller')
+    send_mass_mail([
+        (f'Purchase Request #{purchase_request.id} {purchase_request.status}',
+         f'{purchase_request.seller.name} marked your Purchase Request "{purchase_request.description}" '
+         f'as {purchase_request.status}.',
+         None, [purchase_request.buyer.email])
+        for purchase_request in purchase_requests
+    ])
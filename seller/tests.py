@@ -1,14 +1,31 @@
+import base64
+import json
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import connection
+from django.test import AsyncClient, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APITestCase
 from accounts.models import User
-from buyer.models import PurchaseRequest
+from accounts.tokens import get_token_version
+from accounts.views import get_tokens_for_user
+from buyer.history import status_history
+from buyer.models import PurchaseRequest, PurchaseRequestStats
+from buyer.row_serializers import RowSerializer
+from seller.serializers import PurchaseRequestSellerSerializer
+from tasks.models import Task
 from rest_framework_simplejwt.tokens import RefreshToken
 
 
 class SellerAPITestCase(APITestCase):
 
     def setUp(self):
+        cache.clear()
         # Create a superadmin user
         self.superadmin_user = User.objects.create_user(
             email='superadmin@example.com', name='Super Admin', password='password', role='Superadmin'
@@ -31,8 +48,8 @@ class SellerAPITestCase(APITestCase):
         )
 
         # Generate tokens for users
-        self.superadmin_token = str(RefreshToken.for_user(self.superadmin_user).access_token)
-        self.seller_token = str(RefreshToken.for_user(self.seller_user).access_token)
+        self.superadmin_token = get_tokens_for_user(self.superadmin_user)['access']
+        self.seller_token = get_tokens_for_user(self.seller_user)['access']
 
     def authenticate(self, user_token):
         self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {user_token}')
@@ -104,6 +121,57 @@ class SellerRetrieveUpdateDestroyAPIViewTest(SellerAPITestCase):
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
+class SellerDashboardViewTest(SellerAPITestCase):
+
+    def test_seller_dashboard(self):
+        """
+        Ensure the seller KPI card reports counts and amounts per status.
+        """
+        PurchaseRequest.objects.create(buyer=self.buyer_user, seller=self.seller_user,
+                                       description='Rejected Request', total_amount=20, status='Rejected')
+        self.authenticate(self.seller_token)
+        response = self.client.get(reverse('seller-kpi-card'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['message'], "Seller KPI dashboard retrieved successfully")
+        data = response.data['data']
+        self.assertEqual((data['total_purchases'], data['in_process'], data['approved'], data['rejected']),
+                         (2, 1, 0, 1))
+        self.assertEqual(data['total_amount'], Decimal('520.00'))
+        self.assertEqual(data['rejected_amount'], Decimal('20.00'))
+
+    def test_seller_dashboard_not_modified_until_status_change(self):
+        """
+        Ensure a revalidated KPI card is a 304 until one of the seller's requests changes.
+        """
+        self.authenticate(self.seller_token)
+        url = reverse('seller-kpi-card')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code,
+                         status.HTTP_304_NOT_MODIFIED)
+
+        self.client.patch(reverse('seller-sale-request-status-update', kwargs={'pk': self.purchase_request.id}),
+                          {'status': 'Approved'})
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['data']['approved'], 1)
+
+    def test_seller_analytics_follow_status_changes(self):
+        """
+        Ensure a status change moves the request between the status buckets of its creation day.
+        """
+        self.authenticate(self.seller_token)
+        self.client.patch(reverse('seller-sale-request-status-update', kwargs={'pk': self.purchase_request.id}),
+                          {'status': 'Rejected'})
+
+        response = self.client.get(reverse('seller-analytics'), {'interval': 'month'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        month = response.data['data']['series'][-1]
+        self.assertEqual((month['total_purchases'], month['in_process'], month['rejected']), (1, 0, 1))
+        self.assertEqual(month['rejected_amount'], month['total_amount'])
+
+
 class SellerPurchaseRequestListViewTest(SellerAPITestCase):
 
     def test_seller_purchase_request_list(self):
@@ -114,8 +182,71 @@ class SellerPurchaseRequestListViewTest(SellerAPITestCase):
         url = reverse('seller-sale-request-list')
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertGreaterEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['buyer']['email'], self.buyer_user.email)
+        self.assertEqual(response.data['message'], "Sale Requests retrieved successfully")
+        self.assertGreaterEqual(len(response.data['data']), 1)
+        self.assertEqual(response.data['data'][0]['buyer']['email'], self.buyer_user.email)
+        self.assertIsNone(response.data['next'])
+        self.assertIsNone(response.data['previous'])
+
+    def test_seller_purchase_request_list_cursor_pages(self):
+        """
+        Ensure the seller list walks forward and back through cursor pages without gaps.
+        """
+        for index in range(4):
+            PurchaseRequest.objects.create(buyer=self.buyer_user, seller=self.seller_user,
+                                           description=f'Request {index}', total_amount=10)
+        self.authenticate(self.seller_token)
+        url = reverse('seller-sale-request-list')
+
+        first = self.client.get(url, {'page_size': 2})
+        second = self.client.get(first.data['next'])
+        third = self.client.get(second.data['next'])
+        self.assertEqual(len(first.data['data']), 2)
+        self.assertEqual(len(third.data['data']), 1)
+        self.assertIsNone(third.data['next'])
+        seen = [item['id'] for page in (first, second, third) for item in page.data['data']]
+        self.assertEqual(seen, sorted(seen, reverse=True))
+        self.assertEqual(len(set(seen)), 5)
+
+        back = self.client.get(third.data['previous'])
+        self.assertEqual(back.data['data'], second.data['data'])
+
+    def test_seller_purchase_request_list_search(self):
+        """
+        Ensure ?q= only lists the sale requests whose description matches every word.
+        """
+        PurchaseRequest.objects.create(buyer=self.buyer_user, seller=self.seller_user,
+                                       description='Office chairs', total_amount=20)
+        self.authenticate(self.seller_token)
+        response = self.client.get(reverse('seller-sale-request-list'), {'q': 'office chairs'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['description'] for item in response.data['data']], ['Office chairs'])
+
+    def test_seller_purchase_request_list_filters(self):
+        """
+        Ensure the sale requests can be narrowed down by buyer, status and amount range.
+        """
+        PurchaseRequest.objects.create(buyer=self.buyer_user, seller=self.seller_user,
+                                       description='Rejected Request', total_amount=20, status='Rejected')
+        self.authenticate(self.seller_token)
+        url = reverse('seller-sale-request-list')
+        response = self.client.get(url, {'buyer': self.buyer_user.id, 'status': 'Rejected', 'max_amount': '100'})
+        self.assertEqual([item['description'] for item in response.data['data']], ['Rejected Request'])
+        response = self.client.get(url, {'buyer': 'me'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_seller_purchase_request_list_invalid_cursor(self):
+        """
+        Ensure a tampered cursor is rejected.
+        """
+        self.authenticate(self.seller_token)
+        url = reverse('seller-sale-request-list')
+        response = self.client.get(url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        for position in (['garbage', 1], ['2024-01-01T00:00:00Z', 'abc'], [{'a': 1}, 1], [None, 1]):
+            cursor = base64.urlsafe_b64encode(json.dumps({'p': position}).encode()).decode()
+            response = self.client.get(url, {'cursor': cursor})
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND, position)
 
     def test_seller_purchase_request_list_unauthorized(self):
         """
@@ -126,6 +257,99 @@ class SellerPurchaseRequestListViewTest(SellerAPITestCase):
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
+@override_settings(ASGI_ROOT_URLCONF='core.asgi_urls')
+class AsyncSellerViewTest(SellerAPITestCase):
+
+    async def test_same_responses_as_sync_views(self):
+        """
+        Under ASGI the seller GET endpoints are served by native async views, with the same responses.
+        """
+        cases = [
+            (reverse('seller-list'), self.superadmin_token),
+            (reverse('seller-kpi-card'), self.seller_token),
+            (reverse('seller-sale-request-list') + '?status=In-Process', self.seller_token),
+        ]
+        for url, token in cases:
+            response = await AsyncClient().get(url, headers={'Authorization': f'Bearer {token}'})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertTrue(response.resolver_match.func.view_class.__name__.startswith('Async'))
+            self.authenticate(token)
+            await sync_to_async(cache.clear)()
+            expected = await sync_to_async(self.client.get)(url)
+            self.assertEqual(response.json(), expected.json())
+
+
+class SellerPurchaseRequestQueryCountTest(SellerAPITestCase):
+    # The token claims authenticate the user, one query selects the rows with their buyers.
+    expected_queries = 1
+
+    def test_list_query_count(self):
+        """
+        Ensure the nested buyer details don't cost one query per row.
+        """
+        self.authenticate(self.seller_token)
+        created = 1
+        for rows in (1, 100, 1000):
+            buyers = User.objects.bulk_create([
+                User(email=f'buyer{index}@example.com', name=f'Buyer {index}', role='Buyer')
+                for index in range(created, rows)
+            ])
+            PurchaseRequest.objects.bulk_create([
+                PurchaseRequest(buyer=buyer, seller=self.seller_user, description='Request', total_amount=1)
+                for buyer in buyers
+            ])
+            created = rows
+            cache.clear()
+            # Only the first request after a cache flush reads the token version
+            get_token_version(self.seller_user.id)
+            with self.subTest(rows=rows), self.assertNumQueries(self.expected_queries):
+                response = self.client.get(reverse('seller-sale-request-list'), {'page_size': rows})
+            self.assertEqual(len(response.data['data']), rows)
+
+    def test_retrieve_query_count(self):
+        """
+        Ensure retrieving one request fetches its buyer in the same query.
+        """
+        self.authenticate(self.seller_token)
+        url = reverse('seller-sale-request-status-update', kwargs={'pk': self.purchase_request.id})
+        get_token_version(self.seller_user.id)
+        with self.assertNumQueries(self.expected_queries):
+            response = self.client.get(url)
+        self.assertEqual(response.data['data']['buyer']['email'], self.buyer_user.email)
+
+
+class SaleRequestRowSerializerTest(SellerAPITestCase):
+
+    def test_same_output_as_serializer(self):
+        """
+        Ensure the values() fast path renders the sale requests exactly like their serializer.
+        """
+        PurchaseRequest.objects.create(buyer=None, seller=self.seller_user, description=None, total_amount=None)
+        queryset = PurchaseRequest.objects.order_by('id')
+        expected = JSONRenderer().render(PurchaseRequestSellerSerializer(queryset, many=True).data)
+        rows = RowSerializer(PurchaseRequestSellerSerializer)
+        self.assertEqual(JSONRenderer().render(rows.serialize(rows.values(queryset))), expected)
+
+
+class SellerPurchaseRequestExportViewTest(SellerAPITestCase):
+
+    def test_export_sale_requests(self):
+        """
+        Ensure the seller can stream their sale requests, filtered by creation date.
+        """
+        self.authenticate(self.seller_token)
+        url = reverse('seller-sale-request-export')
+        response = self.client.get(url, {'created_after': '2000-01-01T00:00:00Z'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="sale-requests.csv"')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertIn(self.buyer_user.email, lines[1])
+
+        response = self.client.get(url, {'created_before': '2000-01-01T00:00:00Z'})
+        self.assertEqual(len(b''.join(response.streaming_content).decode().splitlines()), 1)
+
+
 class SellerUpdatePurchaseRequestStatusViewTest(SellerAPITestCase):
 
     def test_update_purchase_request_status(self):
@@ -140,6 +364,97 @@ class SellerUpdatePurchaseRequestStatusViewTest(SellerAPITestCase):
         self.purchase_request.refresh_from_db()
         self.assertEqual(self.purchase_request.status, 'Approved')
 
+    def test_update_purchase_request_status_queues_buyer_notification(self):
+        self.addCleanup(status_history.flush)
+        self.authenticate(self.seller_token)
+        url = reverse('seller-sale-request-status-update', kwargs={'pk': self.purchase_request.id})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(url, data={'status': 'Rejected'})
+        self.assertEqual(list(Task.objects.values_list('name', 'payload')),
+                         [('seller.tasks.notify_buyers_of_status_changes',
+                           {'purchase_request_ids': [self.purchase_request.id]})])
+
+    def test_update_purchase_request_status_moves_kpi_counters(self):
+        """
+        Ensure a status change moves the request between the KPI counters of both sides.
+        """
+        self.authenticate(self.seller_token)
+        url = reverse('seller-sale-request-status-update', kwargs={'pk': self.purchase_request.id})
+        self.client.patch(url, data={'status': 'Rejected'})
+        for user, side in ((self.seller_user, 'seller'), (self.buyer_user, 'buyer')):
+            kpi = PurchaseRequestStats.objects.kpi_for(user, side)
+            self.assertEqual((kpi['total_purchases'], kpi['in_process'], kpi['rejected']), (1, 0, 1))
+            self.assertEqual((kpi['in_process_amount'], kpi['rejected_amount']), (Decimal('0.00'), Decimal('500.00')))
+
+    def test_update_purchase_request_status_single_update(self):
+        """
+        Ensure a status change is one conditional UPDATE that bumps the version, without a prior read,
+        and returns the updated request.
+        """
+        self.authenticate(self.seller_token)
+        url = reverse('seller-sale-request-status-update', kwargs={'pk': self.purchase_request.id})
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.patch(url, data={'status': 'Approved', 'version': 1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.purchase_request.refresh_from_db()
+        self.assertEqual(response.data['data'], PurchaseRequestSellerSerializer(self.purchase_request).data)
+        self.assertEqual((response.data['data']['status'], response.data['data']['version']), ('Approved', 2))
+        # The stats tables are updated too, only count the statements on the purchase request table itself
+        request_queries = [query['sql'] for query in context.captured_queries
+                           if '"buyer_purchaserequest"' in query['sql']]
+        self.assertEqual(len(request_queries), 2)
+        self.assertTrue(request_queries[0].startswith('UPDATE "buyer_purchaserequest" SET'))
+        self.assertTrue(request_queries[1].startswith('SELECT'))
+
+    def test_update_purchase_request_status_conflicts(self):
+        """
+        Ensure a stale version or an illegal move returns 409 and leaves the request untouched.
+        """
+        self.authenticate(self.seller_token)
+        url = reverse('seller-sale-request-status-update', kwargs={'pk': self.purchase_request.id})
+        self.assertEqual(self.client.patch(url, data={'status': 'Approved', 'version': 1}).status_code,
+                         status.HTTP_200_OK)
+
+        response = self.client.patch(url, data={'status': 'Rejected', 'version': 1})
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data['data'], {'id': self.purchase_request.id, 'status': 'Approved', 'version': 2})
+        self.assertIn('modified by another request', response.data['message'])
+
+        response = self.client.patch(url, data={'status': 'Rejected', 'version': 2})
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data['message'], "Sale Request can't move from Approved to Rejected")
+        self.purchase_request.refresh_from_db()
+        self.assertEqual((self.purchase_request.status, self.purchase_request.version), ('Approved', 2))
+        kpi = PurchaseRequestStats.objects.kpi_for(self.seller_user, 'seller')
+        self.assertEqual((kpi['in_process'], kpi['approved'], kpi['rejected']), (0, 1, 0))
+
+    def test_status_saved_directly_bumps_the_version(self):
+        """
+        Ensure a status change saved on the instance, as the admin does, makes a stale version conflict.
+        """
+        purchase_request = PurchaseRequest.objects.get(pk=self.purchase_request.id)
+        purchase_request.status = 'Rejected'
+        purchase_request.save()
+        purchase_request.refresh_from_db()
+        self.assertEqual((purchase_request.status, purchase_request.version), ('Rejected', 2))
+
+        self.authenticate(self.seller_token)
+        url = reverse('seller-sale-request-status-update', kwargs={'pk': self.purchase_request.id})
+        response = self.client.patch(url, data={'status': 'Approved', 'version': 1})
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertIn('modified by another request', response.data['message'])
+
+    def test_update_purchase_request_status_not_found(self):
+        """
+        Ensure a request of another seller can't be updated and is reported as missing.
+        """
+        other_seller = User.objects.create_user(email='other@example.com', name='Other Seller',
+                                                password='password', role='Seller')
+        self.authenticate(str(RefreshToken.for_user(other_seller).access_token))
+        url = reverse('seller-sale-request-status-update', kwargs={'pk': self.purchase_request.id})
+        response = self.client.patch(url, data={'status': 'Approved'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
     def test_update_purchase_request_status_invalid(self):
         """
         Ensure invalid status updates return an error.
@@ -157,3 +472,51 @@ class SellerUpdatePurchaseRequestStatusViewTest(SellerAPITestCase):
         url = reverse('seller-sale-request-status-update', kwargs={'pk': self.purchase_request.id})
         response = self.client.patch(url, data={'status': 'Approved'})
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class SellerBulkUpdatePurchaseRequestStatusViewTest(SellerAPITestCase):
+
+    def test_bulk_update_status(self):
+        """
+        Ensure the seller can approve many requests at once and gets back what changed and what was skipped.
+        """
+        other_seller = User.objects.create_user(email='other@example.com', name='Other Seller',
+                                                password='password', role='Seller')
+        approved = PurchaseRequest.objects.create(buyer=self.buyer_user, seller=self.seller_user,
+                                                  description='Approved', total_amount=10, status='Approved')
+        foreign = PurchaseRequest.objects.create(buyer=self.buyer_user, seller=other_seller,
+                                                 description='Not mine', total_amount=10)
+        self.authenticate(self.seller_token)
+        url = reverse('seller-sale-request-status-bulk-update')
+        ids = [self.purchase_request.id, approved.id, foreign.id, 999999]
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(url, data={'ids': ids, 'status': 'Approved'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['data']['updated'], [self.purchase_request.id])
+        self.assertEqual(response.data['data']['skipped'], [approved.id, foreign.id, 999999])
+        updates = [query for query in context.captured_queries
+                   if query['sql'].startswith('UPDATE "buyer_purchaserequest"')]
+        self.assertEqual(len(updates), 1)
+        foreign.refresh_from_db()
+        self.assertEqual(foreign.status, 'In-Process')
+        kpi = PurchaseRequestStats.objects.kpi_for(self.seller_user, 'seller')
+        self.assertEqual((kpi['in_process'], kpi['approved']), (0, 2))
+
+    def test_bulk_update_status_invalid(self):
+        """
+        Ensure an invalid status or an empty id list is rejected.
+        """
+        self.authenticate(self.seller_token)
+        url = reverse('seller-sale-request-status-bulk-update')
+        response = self.client.post(url, data={'ids': [], 'status': 'Unknown'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('ids', response.data)
+        self.assertIn('status', response.data)
+        # No request can move back to In-Process
+        response = self.client.post(url, data={'ids': [self.purchase_request.id], 'status': 'In-Process'},
+                                    format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('status', response.data)
+
@@ -1,14 +1,19 @@
 from django.urls import path
 
 from seller.views import SellerListAPIView, SellerRetrieveUpdateDestroyAPIView, SellerDashboardView, \
-    SellerPurchaseRequestListView, SellerUpdatePurchaseRequestStatusView
+    SellerPurchaseRequestListView, SellerUpdatePurchaseRequestStatusView, \
+    SellerBulkUpdatePurchaseRequestStatusView, SellerPurchaseRequestExportView, SellerAnalyticsView
 
 urlpatterns = [
     path('list/', SellerListAPIView.as_view(), name='seller-list'),
     path('seller-kpi-card/', SellerDashboardView.as_view(), name='seller-kpi-card'),
+    path('analytics/', SellerAnalyticsView.as_view(), name='seller-analytics'),
     path('all-sale-request-list/', SellerPurchaseRequestListView.as_view(), name='seller-sale-request-list'),
+    path('sale-request/export/', SellerPurchaseRequestExportView.as_view(), name='seller-sale-request-export'),
     path('<int:pk>/', SellerRetrieveUpdateDestroyAPIView.as_view(), name='seller-retrieve-update-delete'),
     path('sale-request-status-update/<int:pk>/', SellerUpdatePurchaseRequestStatusView.as_view(),
          name='seller-sale-request-status-update'),
+    path('sale-request-status-update/bulk/', SellerBulkUpdatePurchaseRequestStatusView.as_view(),
+         name='seller-sale-request-status-bulk-update'),
 
 ]
@@ -1,5 +1,7 @@
+from django.db import transaction
 from django.shortcuts import render
 from rest_framework import generics, status
+from rest_framework.exceptions import NotFound
 from rest_framework.generics import UpdateAPIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
@@ -7,19 +9,37 @@ from rest_framework.views import APIView
 
 from accounts.models import User
 from accounts.permissions import IsSuperAdmin, IsSeller
-from buyer.models import PurchaseRequest
+from accounts.tokens import revoke_tokens
+from buyer.analytics import PurchaseRequestAnalyticsMixin
+from buyer.exports import PurchaseRequestExportMixin
+from buyer.filters import PurchaseRequestFilterMixin, purchase_requests
+from buyer.models import PurchaseRequest, PurchaseRequestStats
+from buyer.pagination import KeysetCursorPagination
+from buyer.row_serializers import RowSerializer
+from buyer.search import PurchaseRequestSearchMixin
 from buyer.serializers import UserSerializer
-from seller.serializers import PurchaseRequestSellerSerializer
+from buyer.signals import purchase_request_status_changed
+from core.cache import cache_response
+from seller.serializers import PurchaseRequestSellerSerializer, PurchaseRequestBulkStatusSerializer, \
+    PurchaseRequestStatusSerializer
+from seller.tasks import notify_buyers_of_status_changes
 
 
 # Create your views here.
+# Read-only fast paths for the list endpoints, with the same output as their serializers
+user_rows = RowSerializer(UserSerializer)
+sale_request_rows = RowSerializer(PurchaseRequestSellerSerializer)
+
 
 class CustomAPIViewMixin:
-    def create_response(self, data=None, message="Operation successful", status_code=status.HTTP_200_OK):
+    def create_response(self, data=None, message="Operation successful", status_code=status.HTTP_200_OK, links=None):
         response_data = {
             'message': message,
             'data': data
         }
+        if links is not None:
+            # Pagination links sit next to the data so the envelope stays the same.
+            response_data.update(links)
         return Response(response_data, status=status_code)
 
 
@@ -31,13 +51,13 @@ class SellerListAPIView(CustomAPIViewMixin, generics.ListAPIView):
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticated, IsSuperAdmin]
 
+    @cache_response('users', conditional=True)
     def list(self, request, *args, **kwargs):
         """
                 Handle GET requests to list all Sellers.
         """
-        queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True)
-        return self.create_response(data=serializer.data, message="Sellers retrieved successfully")
+        rows = user_rows.values(self.get_queryset())
+        return self.create_response(data=user_rows.serialize(rows), message="Sellers retrieved successfully")
 
 
 class SellerRetrieveUpdateDestroyAPIView(CustomAPIViewMixin, generics.RetrieveUpdateDestroyAPIView):
@@ -50,6 +70,7 @@ class SellerRetrieveUpdateDestroyAPIView(CustomAPIViewMixin, generics.RetrieveUp
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticated, IsSuperAdmin]
 
+    @cache_response('users')
     def retrieve(self, request, *args, **kwargs):
         """
             Retrieve a specific Seller instance.
@@ -82,6 +103,13 @@ class SellerRetrieveUpdateDestroyAPIView(CustomAPIViewMixin, generics.RetrieveUp
         self.perform_update(serializer)
         return self.create_response(data=serializer.data, message="Seller updated successfully")
 
+    def perform_update(self, serializer):
+        """
+            Save the changes and revoke the tokens of the user, which carry its previous claims.
+        """
+        with transaction.atomic():
+            revoke_tokens(serializer.save())
+
     def destroy(self, request, *args, **kwargs):
         """
            Soft Delete a specific Seller.
@@ -93,8 +121,10 @@ class SellerRetrieveUpdateDestroyAPIView(CustomAPIViewMixin, generics.RetrieveUp
                Response: A DRF Response object with a success message
         """
         instance = self.get_object()
-        instance.is_active = False
-        instance.save()
+        with transaction.atomic():
+            instance.is_active = False
+            instance.save()
+            revoke_tokens(instance)
         return self.create_response(message="Seller deleted successfully")
 
 
@@ -106,31 +136,61 @@ class SellerDashboardView(CustomAPIViewMixin, APIView):
     """
     permission_classes = [IsAuthenticated, IsSeller]
 
+    @cache_response('user', conditional=True)
     def get(self, request):
         """
             Handle GET requests to retrieve KPI data for individual Seller.
         """
         seller = request.user
-        purchases = PurchaseRequest.objects.filter(seller=seller)
-        data = {
-            'total_purchases': purchases.count(),
-            'in_process': purchases.filter(status='In-Process').count(),
-            'approved': purchases.filter(status='Approved').count(),
-            'rejected': purchases.filter(status='Rejected').count()
-        }
+        data = PurchaseRequestStats.objects.kpi_for(seller, 'seller')
         return self.create_response(data=data, message="Seller KPI dashboard retrieved successfully")
 
 
-class SellerPurchaseRequestListView(generics.ListAPIView):
+class SellerAnalyticsView(PurchaseRequestAnalyticsMixin, CustomAPIViewMixin, APIView):
+    """
+            API view for retrieving the sale trends of a Seller, per day, week or month.
+    """
+    permission_classes = [IsAuthenticated, IsSeller]
+    analytics_side = 'seller'
+
+
+class SellerPurchaseRequestListView(PurchaseRequestSearchMixin, PurchaseRequestFilterMixin, CustomAPIViewMixin,
+                                    generics.ListAPIView):
     """
     View for a seller to list all purchase requests belonging to them.
     """
     serializer_class = PurchaseRequestSellerSerializer
     permission_classes = [IsAuthenticated, IsSeller]
+    pagination_class = KeysetCursorPagination
+
+    def get_queryset(self):
+        # Filter the purchase requests by the seller who is currently logged in,
+        # fetching the buyers in the same query for the nested buyer details
+        return purchase_requests(self.request).filter(seller_id=self.request.user.id).select_related('buyer')
+
+    @cache_response('user', conditional=True)
+    def list(self, request, *args, **kwargs):
+        """
+            Handle GET requests to list the Sale Requests of the Seller, newest first,
+            one cursor page at a time. ``?q=`` searches the descriptions, most relevant first,
+            and the PurchaseRequestFilterMixin query parameters narrow the list down.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(sale_request_rows.values(queryset, *self.cursor_fields))
+        return self.create_response(data=sale_request_rows.serialize(page),
+                                    message="Sale Requests retrieved successfully",
+                                    links=self.paginator.get_links())
+
+
+class SellerPurchaseRequestExportView(PurchaseRequestExportMixin, APIView):
+    """
+    View for a seller to export their sale requests as a streamed CSV or NDJSON file.
+    """
+    permission_classes = [IsAuthenticated, IsSeller]
+    export_filename = 'sale-requests'
 
     def get_queryset(self):
-        # Filter the purchase requests by the seller who is currently logged in
-        return PurchaseRequest.objects.filter(seller=self.request.user)
+        return purchase_requests(self.request).filter(seller_id=self.request.user.id)
 
 
 class SellerUpdatePurchaseRequestStatusView(CustomAPIViewMixin, generics.RetrieveUpdateAPIView):
@@ -142,8 +202,9 @@ class SellerUpdatePurchaseRequestStatusView(CustomAPIViewMixin, generics.Retriev
 
     def get_queryset(self):
         # Only allow the seller to update requests that belong to them
-        return PurchaseRequest.objects.filter(seller=self.request.user)
+        return PurchaseRequest.objects.filter(seller_id=self.request.user.id).select_related('buyer')
 
+    @cache_response('user')
     def retrieve(self, request, *args, **kwargs):
         """
             Retrieve a specific Sale Request instance.
@@ -153,10 +214,73 @@ class SellerUpdatePurchaseRequestStatusView(CustomAPIViewMixin, generics.Retriev
         return self.create_response(data=serializer.data, message="Sale Request retrieved successfully")
 
     def update(self, request, *args, **kwargs):
-        # Handle the status update for the purchase request
-        partial = kwargs.pop('partial', False)
-        instance = self.get_object()
-        serializer = self.get_serializer(instance, data=request.data, partial=partial)
+        """
+            Move the Sale Request to a new status with a single conditional UPDATE.
+
+            Only legal moves are applied (a request is decided once, from In-Process), and only if the
+            request is still at ``version`` when one is given. Otherwise nothing is written and a
+            409 returns the current status and version, so the Seller can reload and decide again.
+            A successful move returns the updated Sale Request, with its new version.
+        """
+        serializer = PurchaseRequestStatusSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        self.perform_update(serializer)
-        return Response({'message': 'Sale Request status updated successfully'}, status=status.HTTP_200_OK)
+        new_status = serializer.validated_data['status']
+        version = serializer.validated_data.get('version')
+
+        queryset = PurchaseRequest.objects.filter(pk=kwargs['pk'], seller_id=request.user.id)
+        with transaction.atomic():
+            changes = queryset.set_status(new_status, changed_by_id=request.user.id, version=version)
+            if changes:
+                purchase_request_status_changed.send(sender=PurchaseRequest, changes=changes)
+                notify_buyers_of_status_changes.enqueue(purchase_request_ids=[change.request_id for change in changes])
+
+        if not changes:
+            current = queryset.values('id', 'status', 'version').first()
+            if current is None:
+                raise NotFound()
+            return self.create_response(data=current, message=self.conflict_message(current, new_status, version),
+                                        status_code=status.HTTP_409_CONFLICT)
+        # Read back once written, for the same representation as a retrieve
+        instance = self.get_queryset().get(pk=changes[0].request_id)
+        return self.create_response(data=self.get_serializer(instance).data,
+                                    message='Sale Request status updated successfully')
+
+    @staticmethod
+    def conflict_message(current, new_status, version):
+        if version is not None and current['version'] != version:
+            return 'Sale Request was modified by another request, reload it and try again'
+        return f"Sale Request can't move from {current['status']} to {new_status}"
+
+
+class SellerBulkUpdatePurchaseRequestStatusView(CustomAPIViewMixin, APIView):
+    """
+    View for a seller to approve or reject many of their purchase requests at once.
+    """
+    permission_classes = [IsAuthenticated, IsSeller]
+
+    def post(self, request):
+        """
+            Apply one status to a list of Sale Request ids owned by the seller with a single
+            conditional UPDATE.
+
+            Returns:
+                Response: The ids that changed status and the ids that were skipped, because they
+                don't belong to the seller, don't exist or already had that status.
+        """
+        serializer = PurchaseRequestBulkStatusSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = list(dict.fromkeys(serializer.validated_data['ids']))
+        new_status = serializer.validated_data['status']
+
+        with transaction.atomic():
+            queryset = PurchaseRequest.objects.filter(seller_id=request.user.id, id__in=ids)
+            changes = queryset.set_status(new_status, changed_by_id=request.user.id)
+            if changes:
+                purchase_request_status_changed.send(sender=PurchaseRequest, changes=changes)
+                notify_buyers_of_status_changes.enqueue(purchase_request_ids=[change.request_id for change in changes])
+
+        updated = {change.request_id for change in changes}
+        return self.create_response(
+            data={'updated': [pk for pk in ids if pk in updated], 'skipped': [pk for pk in ids if pk not in updated]},
+            message='Sale Request statuses updated successfully'
+        )
@@ -0,0 +1,16 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from tasks.models import Task
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'status', 'attempts', 'run_at', 'locked_by', 'created_at')
+    list_filter = ('status', 'name')
+    actions = ('retry',)
+
+    @admin.action(description='Queue the selected tasks again')
+    def retry(self, request, queryset):
+        queryset.exclude(status=Task.RUNNING).update(status=Task.QUEUED, run_at=timezone.now(), attempts=0,
+                                                     last_error='')
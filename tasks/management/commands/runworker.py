@@ -0,0 +1,69 @@
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError
+
+from tasks import worker
+from tasks.queue import claim, execute, worker_name
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+        Claim due background tasks and run them in a pool of processes, until stopped with SIGINT or
+        SIGTERM. Running tasks are finished before the worker exits.
+    """
+    help = 'Run the queued background tasks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=os.cpu_count(),
+                            help='Size of the process pool. 0 runs the tasks in the worker process itself.')
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Tasks claimed at once. Defaults to twice the number of processes.')
+        parser.add_argument('--poll-interval', type=float, default=settings.TASK_POLL_INTERVAL,
+                            help='Seconds to wait when no task is due.')
+        parser.add_argument('--once', action='store_true', help='Run the tasks that are due, then exit.')
+
+    def handle(self, *args, **options):
+        processes, poll_interval = options['processes'], options['poll_interval']
+        batch_size = options['batch_size'] or max(processes, 1) * 2
+        name = worker_name()
+        stop = threading.Event()
+        handlers = {signum: signal.signal(signum, lambda *_: stop.set())
+                    for signum in (signal.SIGINT, signal.SIGTERM)}
+
+        executor = None
+        if processes:
+            executor = ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context('spawn'),
+                                           initializer=worker.init_process)
+        run = executor.map if executor else map
+        succeeded = failed = 0
+        try:
+            while not stop.is_set():
+                try:
+                    claimed = claim(name, batch_size)
+                except DatabaseError:
+                    logger.exception('Failed to claim tasks')
+                    stop.wait(poll_interval)
+                    continue
+                if not claimed:
+                    if options['once']:
+                        break
+                    stop.wait(poll_interval)
+                    continue
+                results = list(run(worker.execute if executor else execute, claimed))
+                succeeded += results.count(True)
+                failed += results.count(False)
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True)
+            for signum, handler in handlers.items():
+                signal.signal(signum, handler)
+        self.stdout.write(f'Worker {name} ran {succeeded + failed} tasks, {failed} failed.')
@@ -0,0 +1,40 @@
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+
+class Task(models.Model):
+    """
+        A queued call of a registered task function, see tasks.queue.
+
+        Successful tasks are deleted; tasks that failed ``max_attempts`` times are kept as ``failed``
+        with their last error.
+    """
+    QUEUED, RUNNING, FAILED = 'queued', 'running', 'failed'
+    STATUS_CHOICES = (
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (FAILED, 'Failed'),
+    )
+
+    name = models.CharField(max_length=200)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    run_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # The workers' claim query: queued tasks that are due, oldest first
+            models.Index(fields=['run_at', 'id'], condition=Q(status='queued'), name='task_queued_run_at_idx'),
+            # Running tasks whose worker may have died
+            models.Index(fields=['locked_at'], condition=Q(status='running'), name='task_running_locked_at_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.name} #{self.pk} ({self.status})'
@@ -0,0 +1,136 @@
+"""
+Lightweight background task queue stored in the database.
+
+Task functions are registered with the ``task`` decorator in an app's ``tasks`` module, and queued with
+``function.enqueue(**payload)`` once the current transaction commits; the payload must be JSON
+serializable. ``manage.py runworker`` claims the due tasks and runs them in a process pool.
+
+Workers claim tasks with ``SELECT ... FOR UPDATE SKIP LOCKED`` where the database supports it, so any
+number of them can share the queue. Elsewhere (SQLite) the claim relies on a conditional UPDATE, which
+is safe because SQLite serializes writes. A failed task is retried with exponential backoff, up to its
+``max_attempts``, and a task left running by a dead worker is claimed again after TASK_LOCK_TIMEOUT.
+"""
+import logging
+import os
+import random
+import socket
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from tasks.models import Task
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+
+class TaskFunction:
+    """
+        A registered task function. Calling it runs the function inline.
+    """
+
+    def __init__(self, function, name, max_attempts=None):
+        self.function = function
+        self.name = name
+        self.max_attempts = max_attempts
+        self.__doc__ = function.__doc__
+
+    def __call__(self, *args, **kwargs):
+        return self.function(*args, **kwargs)
+
+    def enqueue(self, **payload):
+        enqueue(self.name, payload, max_attempts=self.max_attempts)
+
+
+def task(name=None, max_attempts=None):
+    """
+        Register the decorated function as a task, by default under ``<module>.<function name>``.
+    """
+    def decorator(function):
+        registered = TaskFunction(function, name or f'{function.__module__}.{function.__name__}', max_attempts)
+        _registry[registered.name] = registered
+        return registered
+
+    return decorator
+
+
+def get_task(name):
+    return _registry[name]
+
+
+def enqueue(name, payload=None, run_at=None, max_attempts=None, using=None):
+    """
+        Queue the task ``name`` once the current transaction commits, right away outside of one.
+
+        Rolled back writes never queue their side effects, and the task can't run before the data it
+        reads is committed. A process that dies between the commit and the INSERT loses the task.
+    """
+    fields = {'name': name, 'payload': payload or {}, 'max_attempts': max_attempts or settings.TASK_MAX_ATTEMPTS}
+    if run_at is not None:
+        fields['run_at'] = run_at
+    transaction.on_commit(lambda: Task.objects.using(using).create(**fields), using=using)
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def claim(worker, limit):
+    """
+        Mark up to ``limit`` due tasks as running for ``worker`` and return them, oldest first.
+    """
+    now = timezone.now()
+    due = Q(status=Task.QUEUED, run_at__lte=now) | Q(status=Task.RUNNING,
+                                                    locked_at__lt=now - timedelta(seconds=settings.TASK_LOCK_TIMEOUT))
+    with transaction.atomic():
+        queryset = Task.objects.filter(due).order_by('run_at', 'id')
+        if connection.features.has_select_for_update_skip_locked:
+            queryset = queryset.select_for_update(skip_locked=True)
+        ids = list(queryset.values_list('id', flat=True)[:limit])
+        if not ids:
+            return []
+        # Without SKIP LOCKED another worker may have claimed some of them in between: ``due`` no
+        # longer matches those, and only the tasks locked by this claim are returned.
+        Task.objects.filter(due, id__in=ids).update(status=Task.RUNNING, locked_by=worker, locked_at=now,
+                                                    attempts=F('attempts') + 1)
+        return list(Task.objects.filter(id__in=ids, status=Task.RUNNING, locked_by=worker, locked_at=now)
+                    .order_by('run_at', 'id'))
+
+
+def backoff(attempts):
+    """
+        Delay before the next attempt of a task that failed ``attempts`` times: doubling from
+        TASK_RETRY_BACKOFF seconds up to TASK_RETRY_BACKOFF_MAX, plus up to 20% jitter.
+    """
+    delay = min(settings.TASK_RETRY_BACKOFF * 2 ** (attempts - 1), settings.TASK_RETRY_BACKOFF_MAX)
+    return timedelta(seconds=delay * random.uniform(1, 1.2))
+
+
+def execute(claimed):
+    """
+        Run a claimed task and record the outcome: the task is deleted when it succeeds, and queued
+        again after ``backoff`` or marked failed when it raises. Return whether it succeeded.
+    """
+    # Leave the task alone if it was claimed again in the meantime, after TASK_LOCK_TIMEOUT
+    mine = Task.objects.filter(pk=claimed.pk, locked_by=claimed.locked_by, locked_at=claimed.locked_at)
+    try:
+        get_task(claimed.name)(**claimed.payload)
+    except Exception:
+        error = traceback.format_exc()
+        if claimed.attempts >= claimed.max_attempts:
+            logger.error('Task %s #%s failed after %s attempts:\n%s', claimed.name, claimed.pk, claimed.attempts,
+                         error)
+            mine.update(status=Task.FAILED, last_error=error, locked_by='', locked_at=None)
+        else:
+            logger.warning('Task %s #%s failed, attempt %s of %s:\n%s', claimed.name, claimed.pk,
+                           claimed.attempts, claimed.max_attempts, error)
+            mine.update(status=Task.QUEUED, run_at=timezone.now() + backoff(claimed.attempts), last_error=error,
+                        locked_by='', locked_at=None)
+        return False
+    mine.delete()
+    return True
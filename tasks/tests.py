@@ -0,0 +1,112 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from accounts.models import User
+from buyer.models import PurchaseRequest
+from buyer.tasks import notify_sellers_of_purchase_requests
+from seller.tasks import notify_buyers_of_status_changes
+from tasks.models import Task
+from tasks.queue import claim, task
+
+calls = []
+
+
+@task(name='tasks.tests.flaky', max_attempts=2)
+def flaky(fail):
+    calls.append(fail)
+    if fail:
+        raise RuntimeError('Task failed')
+
+
+@override_settings(TASK_RETRY_BACKOFF=10, TASK_RETRY_BACKOFF_MAX=60, TASK_LOCK_TIMEOUT=60)
+class TaskQueueTests(TestCase):
+
+    def setUp(self):
+        calls.clear()
+
+    def run_worker(self):
+        out = StringIO()
+        call_command('runworker', once=True, processes=0, stdout=out)
+        return out.getvalue()
+
+    def test_enqueued_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            flaky.enqueue(fail=False)
+        self.assertFalse(Task.objects.exists())
+        callbacks[0]()
+        task = Task.objects.get()
+        self.assertEqual((task.name, task.payload, task.status, task.max_attempts),
+                         ('tasks.tests.flaky', {'fail': False}, Task.QUEUED, 2))
+
+    def test_successful_tasks_are_deleted(self):
+        Task.objects.create(name='tasks.tests.flaky', payload={'fail': False})
+        Task.objects.create(name='tasks.tests.flaky', payload={'fail': False},
+                            run_at=timezone.now() + timedelta(hours=1))
+        self.assertIn('ran 1 tasks, 0 failed', self.run_worker())
+        self.assertEqual(calls, [False])
+        self.assertEqual(Task.objects.count(), 1)
+
+    def test_retries_with_backoff_then_fails(self):
+        task = Task.objects.create(name='tasks.tests.flaky', payload={'fail': True}, max_attempts=2)
+        with self.assertLogs('tasks.queue', 'WARNING'):
+            self.assertIn('ran 1 tasks, 1 failed', self.run_worker())
+        task.refresh_from_db()
+        self.assertEqual((task.status, task.attempts, task.locked_by), (Task.QUEUED, 1, ''))
+        self.assertIn('RuntimeError: Task failed', task.last_error)
+        self.assertGreaterEqual(task.run_at, timezone.now() + timedelta(seconds=9))
+
+        # Not due yet
+        self.assertIn('ran 0 tasks', self.run_worker())
+        Task.objects.update(run_at=timezone.now())
+        with self.assertLogs('tasks.queue', 'ERROR'):
+            self.run_worker()
+        task.refresh_from_db()
+        self.assertEqual((task.status, task.attempts), (Task.FAILED, 2))
+        self.assertEqual(calls, [True, True])
+
+    def test_claims_do_not_overlap(self):
+        Task.objects.bulk_create([Task(name='tasks.tests.flaky', payload={'fail': False}) for _ in range(3)])
+        first, second = claim('worker-1', 2), claim('worker-2', 2)
+        self.assertEqual((len(first), len(second)), (2, 1))
+        self.assertFalse({task.id for task in first} & {task.id for task in second})
+        self.assertEqual(claim('worker-3', 2), [])
+
+    def test_tasks_of_dead_workers_are_claimed_again(self):
+        Task.objects.create(name='tasks.tests.flaky', payload={'fail': False}, status=Task.RUNNING, attempts=1,
+                            locked_by='dead', locked_at=timezone.now() - timedelta(minutes=5))
+        Task.objects.create(name='tasks.tests.flaky', payload={'fail': False}, status=Task.RUNNING, attempts=1,
+                            locked_by='busy', locked_at=timezone.now())
+        claimed = claim('worker', 10)
+        self.assertEqual([(task.locked_by, task.attempts) for task in claimed], [('worker', 2)])
+
+    def test_notify_sellers(self):
+        buyer = User.objects.create_user(email='buyer@example.com', name='Buyer', password='password', role='Buyer')
+        seller = User.objects.create_user(email='seller@example.com', name='Seller', password='password',
+                                          role='Seller')
+        purchase_request = PurchaseRequest.objects.create(buyer=buyer, seller=seller, description='Steel pipes',
+                                                          total_amount=10)
+        with self.captureOnCommitCallbacks(execute=True):
+            notify_sellers_of_purchase_requests.enqueue(purchase_request_ids=[purchase_request.id])
+        self.run_worker()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['seller@example.com'])
+        self.assertIn('Steel pipes', mail.outbox[0].body)
+        self.assertFalse(Task.objects.exists())
+
+    def test_notify_buyers_skips_requests_without_buyer(self):
+        buyer = User.objects.create_user(email='buyer@example.com', name='Buyer', password='password', role='Buyer')
+        seller = User.objects.create_user(email='seller@example.com', name='Seller', password='password',
+                                          role='Seller')
+        purchase_requests = [PurchaseRequest.objects.create(buyer=owner, seller=seller, description='Steel pipes',
+                                                            total_amount=10, status='Approved')
+                             for owner in (buyer, None)]
+        with self.captureOnCommitCallbacks(execute=True):
+            notify_buyers_of_status_changes.enqueue(purchase_request_ids=[request.id for request in purchase_requests])
+        self.run_worker()
+        self.assertEqual([message.to for message in mail.outbox], [['buyer@example.com']])
+        self.assertFalse(Task.objects.exists())
@@ -0,0 +1,19 @@
+"""
+Entry points of the runworker pool processes.
+
+The processes are spawned rather than forked, so they don't share the database connections of the
+parent, and this module must be importable before Django is set up.
+"""
+import signal
+
+
+def init_process():
+    import django
+    django.setup()
+    # Ctrl-C stops the parent, which waits for the running tasks
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def execute(claimed):
+    from tasks.queue import execute as execute_task
+    return execute_task(claimed)